@@ -0,0 +1,183 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 异步多站点图片链接爬取器（全局并发上限 + 单主机并发上限）
+Version: 1.0
+'''
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+
+from image_extractor import ImageExtractor
+
+logger = logging.getLogger(__name__)
+
+class AsyncImageCrawler:
+    """
+    异步图片链接爬取器，并发抓取多个网页并按完成顺序返回结果
+
+    事件循环只负责调度和并发限制：每个网页仍由阻塞的 extract_image_urls 在线程池中
+    获取和解析（run_in_executor），所有工作线程共用 extractor 的同一个 Session
+    （共享连接池、重试统计和缓存）。解析占用 GIL，CPU 密集时请使用多进程解析。
+    """
+
+    def __init__(self, extractor=None, max_concurrency=20, per_host_limit=4):
+        """
+        初始化异步爬取器
+
+        Args:
+            extractor (ImageExtractor): 图片提取器，默认新建一个
+            max_concurrency (int): 全局最大并发请求数
+            per_host_limit (int): 单个主机的最大并发请求数
+        """
+        if max_concurrency < 1 or per_host_limit < 1:
+            raise ValueError("max_concurrency 和 per_host_limit 必须大于0")
+
+        self.extractor = extractor or ImageExtractor()
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+
+        # 扩大连接池，避免并发请求时反复新建连接
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.extractor.session.mount('http://', adapter)
+        self.extractor.session.mount('https://', adapter)
+
+    def _fetch_and_extract(self, url, include_data_urls):
+        """
+        在工作线程中获取网页并提取图片链接
+
+        Args:
+            url (str): 目标网址
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Returns:
+            list: 图片链接列表
+        """
+        try:
+            return self.extractor.extract_image_urls(url, include_data_urls)
+        except Exception as e:
+            logger.error(f"提取图片链接失败 {url}: {e}")
+            return []
+
+    async def crawl(self, urls, include_data_urls=False):
+        """
+        并发爬取多个网页，按完成顺序逐个产出结果
+
+        Args:
+            urls (iterable): 网址可迭代对象
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Yields:
+            tuple: (page_url, image_urls)
+        """
+        loop = asyncio.get_running_loop()
+        results = asyncio.Queue()
+        global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 限制已创建但未完成的任务数量，避免超大URL列表一次性创建全部任务
+        pending_slots = asyncio.Semaphore(self.max_concurrency * 4)
+        host_semaphores = {}
+        # 只保存未完成的任务，完成后立即移除，内存不随URL数量增长
+        tasks = set()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        async def fetch(url):
+            try:
+                host = urlparse(url).netloc.lower()
+                host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+                async with host_semaphore:
+                    async with global_semaphore:
+                        # 阻塞的获取和解析在线程池中执行，线程共用同一个 Session
+                        image_urls = await loop.run_in_executor(
+                            executor, self._fetch_and_extract, url, include_data_urls)
+                await results.put((url, image_urls))
+            finally:
+                pending_slots.release()
+
+        async def produce():
+            try:
+                for url in urls:
+                    await pending_slots.acquire()
+                    task = asyncio.ensure_future(fetch(url))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                while tasks:
+                    await asyncio.wait(set(tasks))
+            finally:
+                await results.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    break
+                yield item
+            await producer
+        finally:
+            # 调用方提前停止迭代时，取消生产者、已创建的抓取任务和线程池中尚未开始的请求
+            if not producer.done():
+                producer.cancel()
+            for task in list(tasks):
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def crawl_all(self, urls, include_data_urls=False):
+        """
+        并发爬取多个网页并收集全部结果
+
+        Args:
+            urls (iterable): 网址可迭代对象
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Returns:
+            dict: {page_url: image_urls}
+        """
+        results = {}
+        async for page_url, image_urls in self.crawl(urls, include_data_urls):
+            results[page_url] = image_urls
+        return results
+
+def crawl_urls(urls, max_concurrency=20, per_host_limit=4, include_data_urls=False):
+    """
+    同步调用入口：并发爬取多个网页
+
+    Args:
+        urls (iterable): 网址可迭代对象
+        max_concurrency (int): 全局最大并发请求数
+        per_host_limit (int): 单个主机的最大并发请求数
+        include_data_urls (bool): 是否包含data URL格式的图片
+
+    Returns:
+        dict: {page_url: image_urls}
+    """
+    crawler = AsyncImageCrawler(max_concurrency=max_concurrency, per_host_limit=per_host_limit)
+    return asyncio.run(crawler.crawl_all(urls, include_data_urls))
+
+def main():
+    """主函数示例"""
+    print("请输入要爬取的网址，每行一个，输入空行结束:")
+    urls = []
+    while True:
+        url = input().strip()
+        if not url:
+            break
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        urls.append(url)
+
+    if not urls:
+        print("网址不能为空！")
+        return
+
+    results = crawl_urls(urls)
+    for page_url, image_urls in results.items():
+        print(f"\n{page_url}: {len(image_urls)} 个图片链接")
+        for i, img_url in enumerate(image_urls[:5], 1):
+            print(f"  {i}. {img_url}")
+
+if __name__ == "__main__":
+    main()
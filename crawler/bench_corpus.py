@@ -0,0 +1,162 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 基准测试用网页语料生成器（懒加载/srcset/内联JS 等不同风格的大页面）
+Version: 1.0
+'''
+import os
+import random
+
+# 默认语料目录（按需生成，不纳入版本控制）
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_pages')
+# 小语料目录（纳入版本控制，离线基准测试套件默认使用，与参考基线对比）
+SMALL_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_pages_small')
+
+# 页面风格 -> (目标大小KB)
+PAGE_STYLES = {
+    'lazyload': 512,
+    'srcset': 512,
+    'inline_js': 512,
+    'mixed_large': 2048,
+}
+# 小语料：相同的风格和随机种子，页面较小
+SMALL_PAGE_STYLES = {
+    'lazyload': 32,
+    'srcset': 32,
+    'inline_js': 32,
+    'mixed_large': 128,
+}
+
+_WORDS = ['product', 'sale', 'new', 'hot', 'gallery', 'item', 'detail', 'price', 'review', 'cart']
+
+def _text(rng, count):
+    """生成随机文本"""
+    return ' '.join(rng.choice(_WORDS) for _ in range(count))
+
+def _lazyload_block(rng, i):
+    return (f'<div class="item" style="background-image: url(/bg/item-{i}.jpg)">'
+            f'<img src="/static/placeholder.gif" data-src="/img/lazy-{i}.jpg" '
+            f'data-original="/img/orig-{i}.png" alt="{_text(rng, 3)}">'
+            f'<a href="/detail/{i}.html">{_text(rng, 5)}</a></div>\n')
+
+def _srcset_block(rng, i):
+    return (f'<picture><source srcset="/img/p-{i}.webp 1x, /img/p-{i}@2x.webp 2x" type="image/webp">'
+            f'<img src="/img/p-{i}.jpg" srcset="/img/p-{i}-480.jpg 480w, /img/p-{i}-960.jpg 960w" '
+            f'alt="{_text(rng, 3)}"></picture>'
+            f'<a href="/img/full/p-{i}.jpeg">{_text(rng, 2)}</a><p>{_text(rng, 12)}</p>\n')
+
+def _inline_js_block(rng, i):
+    return (f'<script>var item{i} = {{"id": {i}, "name": "{_text(rng, 2)}", '
+            f'"thumb": "/img/thumb-{i}.png", "cover": "https://cdn.example.com/image/{i}/cover", '
+            f'"desc": "{_text(rng, 8)}", "url": "/detail/{i}.html"}};</script>'
+            f'<p class="desc">{_text(rng, 15)}</p>\n')
+
+def _mixed_block(rng, i):
+    builder = rng.choice([_lazyload_block, _srcset_block, _inline_js_block])
+    return builder(rng, i)
+
+_BUILDERS = {
+    'lazyload': _lazyload_block,
+    'srcset': _srcset_block,
+    'inline_js': _inline_js_block,
+    'mixed_large': _mixed_block,
+}
+
+def generate_page(style, size_kb, seed=0):
+    """
+    生成指定风格和大小的HTML页面
+
+    Args:
+        style (str): 页面风格
+        size_kb (int): 目标页面大小（KB）
+        seed (int): 随机种子
+
+    Returns:
+        str: HTML内容
+    """
+    rng = random.Random(seed)
+    builder = _BUILDERS[style]
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>bench</title>',
+             '<style>.logo { background: url("/static/logo.png") no-repeat; }',
+             '.icon:before { content: url(/static/icon.svg); }</style></head><body>\n']
+    size = sum(len(p) for p in parts)
+    i = 0
+    while size < size_kb * 1024:
+        block = builder(rng, i)
+        parts.append(block)
+        size += len(block)
+        i += 1
+    parts.append('</body></html>\n')
+    return ''.join(parts)
+
+def ensure_corpus(corpus_dir=CORPUS_DIR, styles=None):
+    """
+    确保语料目录存在，缺失的页面会按固定种子重新生成
+
+    Args:
+        corpus_dir (str): 语料目录
+        styles (dict): 页面风格 -> 目标大小KB，默认 PAGE_STYLES
+
+    Returns:
+        dict: {页面名: 文件路径}
+    """
+    if not os.path.exists(corpus_dir):
+        os.makedirs(corpus_dir)
+
+    pages = {}
+    for seed, (style, size_kb) in enumerate((styles or PAGE_STYLES).items()):
+        path = os.path.join(corpus_dir, f"{style}.html")
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(generate_page(style, size_kb, seed))
+        pages[style] = path
+    return pages
+
+def save_page(url, name=None, corpus_dir=CORPUS_DIR):
+    """
+    抓取真实网页并保存到语料目录（之后的基准测试离线回放）
+
+    Args:
+        url (str): 网页地址
+        name (str): 页面名，默认取自网址
+        corpus_dir (str): 语料目录
+
+    Returns:
+        str: 保存的文件路径，抓取失败时返回None
+    """
+    from image_extractor import ImageExtractor
+
+    html_content = ImageExtractor().get_page_content(url)
+    if not html_content:
+        return None
+
+    name = name or ''.join(c if c.isalnum() else '_' for c in url.split('://', 1)[-1]).strip('_')[:80]
+    if not os.path.exists(corpus_dir):
+        os.makedirs(corpus_dir)
+    path = os.path.join(corpus_dir, f"{name}.html")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html_content)
+    return path
+
+def load_corpus(corpus_dir=CORPUS_DIR, styles=None):
+    """
+    加载语料页面（生成的页面在前，其后是用 save_page 保存的页面）
+
+    Args:
+        corpus_dir (str): 语料目录
+        styles (dict): 页面风格 -> 目标大小KB，默认 PAGE_STYLES
+
+    Returns:
+        dict: {页面名: HTML内容}
+    """
+    paths = ensure_corpus(corpus_dir, styles)
+    for filename in sorted(os.listdir(corpus_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext == '.html' and name not in paths:
+            paths[name] = os.path.join(corpus_dir, filename)
+
+    pages = {}
+    for name, path in paths.items():
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[name] = f.read()
+    return pages
@@ -0,0 +1,132 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 图片提取引擎基准测试 - 单次流式扫描 vs 旧版BeautifulSoup多次全文扫描
+Version: 1.0
+'''
+import re
+import time
+import logging
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from image_extractor import ImageExtractor
+from bench_corpus import load_corpus
+
+BASE_URL = 'https://www.example.com/list/'
+
+# 旧版实现使用的正则（对整个HTML全文执行）
+LEGACY_CSS_PATTERNS = [
+    r'background(?:-image)?\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
+    r'background\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
+    r'content\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
+]
+LEGACY_JS_PATTERNS = [
+    r'["\']([^"\']*\.(?:jpg|jpeg|png|gif|bmp|webp|svg|ico))["\']',
+    r'["\']([^"\']*image[^"\']*)["\']',
+    r'["\']([^"\']*img[^"\']*)["\']',
+]
+
+def legacy_extract(extractor, html_content, url, include_data_urls=False):
+    """
+    旧版提取实现：BeautifulSoup(html.parser) + 多次find_all + 全文正则
+
+    Args:
+        extractor (ImageExtractor): 提供URL校验和srcset解析
+        html_content (str): HTML内容
+        url (str): 网页地址
+        include_data_urls (bool): 是否包含data URL
+
+    Returns:
+        list: 图片链接列表
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    image_urls = []
+
+    for img in soup.find_all('img'):
+        for attr in ['src', 'data-src', 'data-original', 'data-lazy-src', 'data-srcset', 'data-original-src']:
+            value = img.get(attr)
+            if value:
+                absolute_url = urljoin(url, value.strip())
+                if extractor._is_valid_image_url(absolute_url, include_data_urls):
+                    image_urls.append(absolute_url)
+        srcset = img.get('srcset')
+        if srcset:
+            image_urls.extend(extractor._parse_srcset(srcset, url))
+
+    for patterns in (LEGACY_CSS_PATTERNS, LEGACY_JS_PATTERNS):
+        for pattern in patterns:
+            for match in re.findall(pattern, html_content, re.IGNORECASE):
+                absolute_url = urljoin(url, match)
+                if extractor._is_valid_image_url(absolute_url):
+                    image_urls.append(absolute_url)
+
+    for picture in soup.find_all('picture'):
+        for source in picture.find_all('source'):
+            srcset = source.get('srcset')
+            if srcset:
+                image_urls.extend(extractor._parse_srcset(srcset, url))
+        img = picture.find('img')
+        if img and img.get('src'):
+            absolute_url = urljoin(url, img.get('src').strip())
+            if extractor._is_valid_image_url(absolute_url):
+                image_urls.append(absolute_url)
+
+    for link in soup.find_all('a', href=True):
+        href = link.get('href')
+        if href and extractor._is_valid_image_url(href):
+            image_urls.append(urljoin(url, href))
+
+    return list(set(image_urls))
+
+def _cpu_time(func, repeat):
+    """返回多次执行中最短的CPU时间（秒）及最后一次的结果"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        best = min(best, time.process_time() - start)
+    return best, result
+
+def run_benchmark(repeat=3):
+    """
+    在语料页面上对比新旧实现的单页CPU耗时
+
+    Args:
+        repeat (int): 每个页面重复次数（取最短时间）
+
+    Returns:
+        list: 每个页面的结果字典
+    """
+    extractor = ImageExtractor()
+    results = []
+
+    for name, html in load_corpus().items():
+        legacy_time, legacy_urls = _cpu_time(lambda: legacy_extract(extractor, html, BASE_URL), repeat)
+        new_time, new_urls = _cpu_time(lambda: extractor.extract_from_html(html, BASE_URL), repeat)
+        results.append({
+            'page': name,
+            'size_kb': len(html.encode('utf-8')) // 1024,
+            'legacy_ms': legacy_time * 1000,
+            'new_ms': new_time * 1000,
+            'speedup': legacy_time / new_time if new_time else float('inf'),
+            'legacy_urls': len(legacy_urls),
+            'new_urls': len(new_urls),
+        })
+
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('image_extractor').setLevel(logging.WARNING)
+
+    print("=== 图片提取引擎基准测试 ===")
+    print(f"{'页面':<14}{'大小KB':>8}{'旧版ms':>10}{'新版ms':>10}{'加速比':>8}{'旧URL数':>9}{'新URL数':>9}")
+    for r in run_benchmark():
+        print(f"{r['page']:<14}{r['size_kb']:>8}{r['legacy_ms']:>10.1f}{r['new_ms']:>10.1f}"
+              f"{r['speedup']:>8.1f}{r['legacy_urls']:>9}{r['new_urls']:>9}")
+
+if __name__ == "__main__":
+    main()
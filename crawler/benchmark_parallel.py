@@ -0,0 +1,77 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 多进程解析基准测试 - 在本地网页语料上测量 1~N 个解析进程的每秒页面数
+Version: 1.0
+'''
+import os
+import sys
+import time
+import logging
+
+from parallel_crawler import ParallelImageCrawler
+from bench_corpus import load_corpus
+
+BASE_URL = 'https://www.example.com/list/'
+
+def build_pages(copies=8):
+    """
+    将语料页面复制多份，组成解析任务列表
+
+    Args:
+        copies (int): 每个语料页面的份数
+
+    Returns:
+        list: (url, content_bytes, encoding) 列表
+    """
+    pages = []
+    for name, html in load_corpus().items():
+        content = html.encode('utf-8')
+        for i in range(copies):
+            pages.append((f"{BASE_URL}{name}-{i}.html", content, 'utf-8'))
+    return pages
+
+def run_benchmark(max_workers=None, copies=8):
+    """
+    测量不同解析进程数下的吞吐量
+
+    Args:
+        max_workers (int): 最大解析进程数，默认等于CPU核数
+        copies (int): 每个语料页面的份数
+
+    Returns:
+        list: 每个进程数的结果字典
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    pages = build_pages(copies)
+    results = []
+
+    worker_counts = sorted({1, 2, 4, 8, 16, max_workers} & set(range(1, max_workers + 1)))
+    for workers in worker_counts:
+        crawler = ParallelImageCrawler(parse_workers=workers)
+        # 进程启动和初始化在计时之前完成，只测量解析吞吐量
+        with crawler.create_parse_pool(warm_up=True) as parse_pool:
+            start = time.perf_counter()
+            count = sum(1 for _ in crawler.parse_pages(pages, parse_pool=parse_pool))
+            elapsed = time.perf_counter() - start
+        results.append({'workers': workers, 'pages': count, 'seconds': elapsed, 'pages_per_sec': count / elapsed})
+
+    base = results[0]['pages_per_sec']
+    for r in results:
+        r['scaling'] = r['pages_per_sec'] / base
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('image_extractor').setLevel(logging.WARNING)
+
+    print("=== 多进程解析基准测试 ===")
+    # 可通过命令行参数指定最大进程数: python benchmark_parallel.py 8
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(f"CPU核数: {os.cpu_count()}")
+    print(f"{'进程数':>6}{'页面数':>8}{'耗时s':>10}{'页面/秒':>10}{'加速比':>8}")
+    for r in run_benchmark(max_workers):
+        print(f"{r['workers']:>6}{r['pages']:>8}{r['seconds']:>10.2f}{r['pages_per_sec']:>10.2f}{r['scaling']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
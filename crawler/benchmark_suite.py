@@ -0,0 +1,239 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 离线基准测试套件 - 将语料页面回放给 extract_image_urls，统计吞吐量、延迟分位数和峰值内存，并与基线对比
+Version: 1.0
+'''
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import logging
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from image_extractor import ImageExtractor
+from bench_corpus import load_corpus, CORPUS_DIR, SMALL_CORPUS_DIR, SMALL_PAGE_STYLES
+
+# 参考基线文件（小语料、注入页面模式，纳入版本控制）
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# 语料名称 -> (语料目录, 页面风格)
+CORPORA = {
+    'small': (SMALL_CORPUS_DIR, SMALL_PAGE_STYLES),
+    'large': (CORPUS_DIR, None),
+}
+
+BASE_URL = 'https://www.example.com/list/'
+
+class CorpusExtractor(ImageExtractor):
+    """从内存语料中"抓取"网页的提取器，只测量解码和提取，不产生网络请求"""
+
+    def __init__(self, pages, **kwargs):
+        """
+        Args:
+            pages (dict): {网址: HTML字节}
+        """
+        super().__init__(**kwargs)
+        self.pages = pages
+
+    def _fetch_page(self, url):
+        content = self.pages.get(url)
+        if content is None:
+            return None, None, 0
+        return content, 'utf-8', len(content)
+
+class _CorpusHandler(BaseHTTPRequestHandler):
+    """本地替身服务器：按路径返回语料页面"""
+
+    def do_GET(self):
+        data = self.server.pages.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_corpus_server(corpus):
+    """
+    在后台线程中启动本地替身服务器
+
+    Args:
+        corpus (dict): {页面名: HTML内容}
+
+    Returns:
+        tuple: (server, {页面名: 网址})
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _CorpusHandler)
+    server.pages = {f"/{name}.html": html.encode('utf-8') for name, html in corpus.items()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, {name: f"{base_url}/{name}.html" for name in corpus}
+
+def percentile(values, pct):
+    """
+    最近秩法计算分位数
+
+    Args:
+        values (list): 数值列表
+        pct (float): 百分位（0~100）
+
+    Returns:
+        float: 分位数
+    """
+    ordered = sorted(values)
+    # 最近秩：第 ceil(p/100*n) 个
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def run_suite(repeat=20, use_server=False, corpus_name='small'):
+    """
+    回放语料页面，统计每个页面的延迟和峰值内存
+
+    Args:
+        repeat (int): 每个页面回放次数
+        use_server (bool): 通过本地HTTP替身服务器抓取（包含网络栈开销），默认直接注入页面内容
+        corpus_name (str): 语料名称 small（纳入版本控制的小语料）/ large（按需生成的大页面）
+
+    Returns:
+        dict: {'mode': 回放方式, 'corpus': 语料名称, 'pages': {页面名: 结果}, 'total': 汇总结果}
+    """
+    corpus = load_corpus(*CORPORA[corpus_name])
+    sizes = {name: len(html.encode('utf-8')) for name, html in corpus.items()}
+    url_counts = {}
+    server = None
+    if use_server:
+        server, urls = start_corpus_server(corpus)
+        extractor = ImageExtractor()
+    else:
+        urls = {name: f"{BASE_URL}{name}.html" for name in corpus}
+        extractor = CorpusExtractor({urls[name]: html.encode('utf-8') for name, html in corpus.items()})
+
+    try:
+        # 预热：填充URL缓存，加载lxml等
+        for url in urls.values():
+            extractor.extract_image_urls(url)
+
+        latencies = {name: [] for name in corpus}
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for name, url in urls.items():
+                page_start = time.perf_counter()
+                extractor.extract_image_urls(url)
+                latencies[name].append(time.perf_counter() - page_start)
+        elapsed = time.perf_counter() - start
+
+        # 峰值内存单独测量（tracemalloc 会明显拖慢执行）
+        peaks = {}
+        for name, url in urls.items():
+            tracemalloc.start()
+            image_urls = extractor.extract_image_urls(url)
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            url_counts[name] = len(image_urls)
+    finally:
+        if server:
+            server.shutdown()
+
+    pages = {}
+    for name, values in latencies.items():
+        pages[name] = {
+            'size_kb': sizes[name] // 1024,
+            'urls': url_counts[name],
+            'pages_per_sec': len(values) / sum(values),
+            'p50_ms': percentile(values, 50) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'peak_kb': peaks[name] // 1024,
+        }
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = {
+        'pages': len(all_latencies),
+        'pages_per_sec': len(all_latencies) / elapsed,
+        'p50_ms': percentile(all_latencies, 50) * 1000,
+        'p99_ms': percentile(all_latencies, 99) * 1000,
+        'peak_kb': max(peaks.values()) // 1024,
+    }
+    return {'mode': 'server' if use_server else 'fetcher', 'corpus': corpus_name, 'pages': pages, 'total': total}
+
+def compare_with_baseline(results, baseline, tolerance=0.2):
+    """
+    与基线结果对比，找出变慢或内存增长超过容差的指标，以及提取到的URL数量变化（与机器无关）
+
+    Args:
+        results (dict): run_suite 的返回值
+        baseline (dict): 之前保存的 run_suite 结果
+        tolerance (float): 允许的相对退化比例
+
+    Returns:
+        list: 退化描述列表，为空表示没有退化
+    """
+    regressions = []
+    for name, current in list(results['pages'].items()) + [('total', results['total'])]:
+        previous = baseline['total'] if name == 'total' else baseline['pages'].get(name)
+        if not previous:
+            continue
+        if 'urls' in current and previous.get('urls') is not None and current['urls'] != previous['urls']:
+            regressions.append(f"{name} urls: {previous['urls']} -> {current['urls']}")
+        for key in ('p50_ms', 'p99_ms', 'peak_kb'):
+            if previous[key] and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{name} {key}: {previous[key]:.1f} -> {current[key]:.1f}")
+        if current['pages_per_sec'] < previous['pages_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name} pages_per_sec: {previous['pages_per_sec']:.2f} -> {current['pages_per_sec']:.2f}")
+    return regressions
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='图片提取离线基准测试')
+    parser.add_argument('--repeat', type=int, default=20, help='每个页面回放次数')
+    parser.add_argument('--server', action='store_true', help='通过本地HTTP替身服务器回放')
+    parser.add_argument('--corpus', choices=sorted(CORPORA), default='small', help='语料（small 纳入版本控制）')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='将本次结果保存为基线')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='允许的相对退化比例')
+    args = parser.parse_args()
+
+    logging.getLogger('image_extractor').setLevel(logging.WARNING)
+
+    print(f"=== 离线基准测试（{args.corpus} 语料，{'本地服务器' if args.server else '注入页面'}，每页 {args.repeat} 次）===")
+    results = run_suite(args.repeat, args.server, args.corpus)
+    print(f"{'页面':<16}{'大小KB':>8}{'URL数':>8}{'页面/秒':>10}{'p50 ms':>10}{'p99 ms':>10}{'峰值KB':>10}")
+    for name, r in list(results['pages'].items()) + [('总计', results['total'])]:
+        print(f"{name:<16}{r.get('size_kb', ''):>8}{r.get('urls', ''):>8}{r['pages_per_sec']:>10.2f}"
+              f"{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['peak_kb']:>10}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("没有基线文件，使用 --save-baseline 保存本次结果作为基线")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if (baseline.get('mode'), baseline.get('corpus', 'large')) != (results['mode'], results['corpus']):
+        print(f"基线为 {baseline.get('corpus', 'large')} 语料、{baseline.get('mode')} 模式，与本次不同，跳过对比")
+        return
+
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能退化（容差 {args.tolerance:.0%}）:")
+        for item in regressions:
+            print(f"  {item}")
+        sys.exit(1)
+    print(f"与基线相比无性能退化（容差 {args.tolerance:.0%}）")
+
+if __name__ == "__main__":
+    main()
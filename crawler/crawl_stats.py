@@ -0,0 +1,129 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 爬取性能统计 - 记录每个网页各阶段耗时、候选项数量和下载字节数，导出为JSON Lines或Prometheus文本格式
+Version: 1.0
+'''
+import json
+import threading
+from collections import OrderedDict
+
+# 各阶段的输出顺序
+PHASES = ('fetch', 'decode', 'parse', 'extract_img', 'extract_picture', 'extract_link',
+          'extract_css', 'extract_js', 'dedupe')
+
+class CrawlStats:
+    """按网页汇总的性能统计（线程安全），传给 ImageExtractor(stats=...) 后启用"""
+
+    def __init__(self):
+        # url -> {'url': ..., 'timings': {阶段: 秒}, 'counts': {名称: 数量}}
+        self.pages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, url, timings=None, counts=None):
+        """
+        累加一个网页的阶段耗时和计数
+
+        Args:
+            url (str): 网页地址
+            timings (dict): 阶段 -> 耗时（秒）
+            counts (dict): 名称 -> 数量
+        """
+        with self._lock:
+            page = self.pages.get(url)
+            if page is None:
+                page = self.pages[url] = {'url': url, 'timings': {}, 'counts': {}}
+            for name, value in (timings or {}).items():
+                page['timings'][name] = page['timings'].get(name, 0.0) + value
+            for name, value in (counts or {}).items():
+                page['counts'][name] = page['counts'].get(name, 0) + value
+
+    def summary(self):
+        """
+        汇总所有网页的统计
+
+        Returns:
+            dict: pages/timings/counts，timings 和 counts 为所有网页之和
+        """
+        timings = {}
+        counts = {}
+        with self._lock:
+            pages = list(self.pages.values())
+            for page in pages:
+                for name, value in page['timings'].items():
+                    timings[name] = timings.get(name, 0.0) + value
+                for name, value in page['counts'].items():
+                    counts[name] = counts.get(name, 0) + value
+        ordered = {name: timings.pop(name) for name in PHASES if name in timings}
+        ordered.update(timings)
+        return {'pages': len(pages), 'timings': ordered, 'counts': counts}
+
+    def reset(self):
+        with self._lock:
+            self.pages.clear()
+
+    def write_json_lines(self, filename):
+        """
+        每个网页一行JSON写入文件
+
+        Args:
+            filename (str): 输出文件路径
+
+        Returns:
+            int: 写入的行数
+        """
+        with self._lock:
+            pages = [dict(page, timings=dict(page['timings']), counts=dict(page['counts']))
+                     for page in self.pages.values()]
+        with open(filename, 'w', encoding='utf-8') as f:
+            for page in pages:
+                f.write(json.dumps(page, ensure_ascii=False) + '\n')
+        return len(pages)
+
+    def to_prometheus(self, prefix='image_extractor'):
+        """
+        生成Prometheus文本格式的指标
+
+        Args:
+            prefix (str): 指标名前缀
+
+        Returns:
+            str: 指标文本
+        """
+        summary = self.summary()
+        counts = dict(summary['counts'])
+        lines = [
+            f"# HELP {prefix}_pages_total 已统计的网页数",
+            f"# TYPE {prefix}_pages_total counter",
+            f"{prefix}_pages_total {summary['pages']}",
+            f"# HELP {prefix}_phase_seconds_total 各阶段累计耗时（秒）",
+            f"# TYPE {prefix}_phase_seconds_total counter",
+        ]
+        for phase, seconds in summary['timings'].items():
+            lines.append(f'{prefix}_phase_seconds_total{{phase="{phase}"}} {seconds:.6f}')
+
+        lines += [
+            f"# HELP {prefix}_bytes_total 下载的网页字节数",
+            f"# TYPE {prefix}_bytes_total counter",
+            f"{prefix}_bytes_total {counts.pop('bytes', 0)}",
+        ]
+        for metric, key_prefix, help_text in (('candidates', 'candidates_', '各阶段的候选项数量'),
+                                              ('urls', 'urls_', '各阶段产出的图片链接数量（去重前）')):
+            lines += [f"# HELP {prefix}_{metric}_total {help_text}",
+                      f"# TYPE {prefix}_{metric}_total counter"]
+            for name in sorted(name for name in counts if name.startswith(key_prefix)):
+                lines.append(f'{prefix}_{metric}_total{{stage="{name[len(key_prefix):]}"}} {counts.pop(name)}')
+        for name in sorted(counts):
+            lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {counts[name]}"]
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, filename, prefix='image_extractor'):
+        """
+        将Prometheus文本格式的指标写入文件（可供 node_exporter textfile 采集）
+
+        Args:
+            filename (str): 输出文件路径
+            prefix (str): 指标名前缀
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus(prefix))
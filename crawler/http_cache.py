@@ -0,0 +1,95 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 网页响应磁盘缓存 - 保存ETag/Last-Modified和编码，用于条件请求
+Version: 1.0
+'''
+import os
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+class HttpCache:
+    """按URL存储网页响应的磁盘缓存，每个条目包含元数据文件(.json)和响应体文件(.body)"""
+
+    def __init__(self, cache_dir):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir (str): 缓存目录
+        """
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def _paths(self, url):
+        """返回URL对应的元数据文件和响应体文件路径"""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def get(self, url):
+        """
+        读取缓存条目
+
+        Args:
+            url (str): 网址
+
+        Returns:
+            dict: 缓存条目（url/etag/last_modified/encoding/body），不存在时返回None
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('url') != url:
+                return None
+            with open(body_path, 'rb') as f:
+                entry['body'] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, body, etag=None, last_modified=None, encoding=None):
+        """
+        写入缓存条目（先写临时文件再替换，避免中断时留下损坏的缓存）
+
+        Args:
+            url (str): 网址
+            body (bytes): 响应体
+            etag (str): ETag响应头
+            last_modified (str): Last-Modified响应头
+            encoding (str): 网页编码
+        """
+        meta_path, body_path = self._paths(url)
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified, 'encoding': encoding}
+        try:
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(body_path + '.tmp', body_path)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(meta_path + '.tmp', meta_path)
+        except OSError as e:
+            logger.warning(f"写入缓存失败 {url}: {e}")
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        根据缓存条目生成条件请求头
+
+        Args:
+            entry (dict): 缓存条目
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since 请求头
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
@@ -0,0 +1,202 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 图片并发下载器 - 下载 ImageExtractor 提取到的图片链接
+Version: 1.0
+'''
+import os
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from resilience import ResilientSession
+
+logger = logging.getLogger(__name__)
+
+# 下载时使用的默认请求头
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+}
+
+class ImageDownloader:
+    """图片并发下载器：连接池复用、分块写盘、跳过已存在文件"""
+
+    def __init__(self, workers=8, timeout=30, chunk_size=64 * 1024, headers=None, session=None):
+        """
+        初始化下载器
+
+        Args:
+            workers (int): 并发下载线程数
+            timeout (int): 请求超时时间（秒）
+            chunk_size (int): 分块写盘的块大小（字节）
+            headers (dict): 请求头信息
+            session (requests.Session): 复用的会话，默认新建带重试和熔断的会话
+        """
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+        self.session = session or ResilientSession()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        # 连接池大小与并发数一致，保证每个线程都能复用连接
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def download(self, urls, output_directory):
+        """
+        并发下载图片
+
+        Args:
+            urls (iterable): 图片链接（如 extract_image_urls 的返回值）
+            output_directory (str): 输出目录路径
+
+        Returns:
+            dict: 下载结果统计
+        """
+        # 去重并保持顺序
+        urls = list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+
+        if not os.path.exists(output_directory):
+            os.makedirs(output_directory)
+            logger.info(f"创建输出目录: {output_directory}")
+
+        stats = {
+            'total': len(urls),
+            'success': 0,
+            'failed': 0,
+            'skipped': 0,
+            'bytes': 0,
+        }
+
+        logger.info(f"开始下载 {len(urls)} 张图片（{self.workers} 个线程）...")
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for status, size in executor.map(lambda url: self._download_one(url, output_directory), urls):
+                stats[status] += 1
+                stats['bytes'] += size
+
+        elapsed = time.perf_counter() - start
+        stats['elapsed'] = elapsed
+        stats['bytes_per_sec'] = stats['bytes'] / elapsed if elapsed > 0 else 0.0
+        stats['files_per_sec'] = stats['success'] / elapsed if elapsed > 0 else 0.0
+
+        # 输出统计结果
+        logger.info(f"批量下载完成:")
+        logger.info(f"  总计: {stats['total']}")
+        logger.info(f"  成功: {stats['success']}")
+        logger.info(f"  失败: {stats['failed']}")
+        logger.info(f"  跳过: {stats['skipped']}")
+        logger.info(f"  耗时: {elapsed:.2f}s, {stats['bytes_per_sec'] / 1024:.1f} KB/s, "
+                    f"{stats['files_per_sec']:.1f} 个/s")
+
+        return stats
+
+    def download_from_file(self, url_file, output_directory):
+        """
+        下载链接文件（save_urls_to_file 的输出）中的所有图片
+
+        Args:
+            url_file (str): 链接文件路径，每行一个链接
+            output_directory (str): 输出目录路径
+
+        Returns:
+            dict: 下载结果统计
+        """
+        try:
+            with open(url_file, 'r', encoding='utf-8') as f:
+                urls = [line.strip() for line in f if line.strip()]
+        except Exception as e:
+            logger.error(f"读取链接文件失败: {e}")
+            return {'total': 0, 'success': 0, 'failed': 0, 'skipped': 0, 'bytes': 0}
+
+        return self.download(urls, output_directory)
+
+    def get_output_path(self, url, output_directory):
+        """
+        根据图片链接生成固定的本地文件路径（同一链接总是对应同一文件）
+
+        Args:
+            url (str): 图片链接
+            output_directory (str): 输出目录路径
+
+        Returns:
+            str: 本地文件路径
+        """
+        name = os.path.basename(unquote(urlparse(url).path)) or 'image'
+        # 去除文件名中的非法字符
+        name = ''.join(c if c.isalnum() or c in '._-' else '_' for c in name)[-100:]
+        # 加上链接哈希前缀，避免不同路径下的同名文件互相覆盖
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]
+        return os.path.join(output_directory, f"{digest}_{name}")
+
+    def _download_one(self, url, output_directory):
+        """
+        下载单张图片，响应体分块写入临时文件后再重命名
+
+        Args:
+            url (str): 图片链接
+            output_directory (str): 输出目录路径
+
+        Returns:
+            tuple: (状态 success/failed/skipped, 下载字节数)
+        """
+        if not url.startswith(('http://', 'https://')):
+            logger.warning(f"不支持的链接: {url[:80]}")
+            return 'failed', 0
+
+        output_path = self.get_output_path(url, output_directory)
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            logger.debug(f"文件已存在，跳过: {output_path}")
+            return 'skipped', 0
+
+        temp_path = output_path + '.part'
+        size = 0
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                with open(temp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            size += len(chunk)
+            os.replace(temp_path, output_path)
+            logger.debug(f"下载完成: {url} -> {output_path} ({size} 字节)")
+            return 'success', size
+        except (requests.exceptions.RequestException, OSError) as e:
+            logger.error(f"下载失败 {url}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return 'failed', 0
+
+def main():
+    """主函数"""
+    print("=== 图片并发下载器 ===")
+
+    url_file = input("请输入图片链接文件 (默认: image_urls.txt): ").strip() or 'image_urls.txt'
+    output_directory = input("请输入保存目录 (默认: images): ").strip() or 'images'
+
+    if not os.path.exists(url_file):
+        print(f"链接文件不存在: {url_file}")
+        return
+
+    downloader = ImageDownloader(workers=8)
+    stats = downloader.download_from_file(url_file, output_directory)
+
+    print(f"\n下载完成:")
+    print(f"  总计: {stats['total']} 张")
+    print(f"  成功: {stats['success']} 张")
+    print(f"  失败: {stats['failed']} 张")
+    print(f"  跳过: {stats['skipped']} 张")
+    if 'elapsed' in stats:
+        print(f"  速度: {stats['bytes_per_sec'] / 1024:.1f} KB/s, {stats['files_per_sec']:.1f} 个/s")
+
+if __name__ == "__main__":
+    main()
@@ -5,28 +5,191 @@ Description: 网页图片链接提取器
 Version: 1.1
 '''
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 from urllib.parse import urljoin, urlparse
 import re
 import time
 import logging
+import codecs
+import threading
+from collections import OrderedDict
+
+from http_cache import HttpCache
+from resilience import ResilientSession
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# img标签中可能包含图片地址的属性
+IMG_URL_ATTRS = ('src', 'data-src', 'data-original', 'data-lazy-src', 'data-srcset', 'data-original-src')
+
+# CSS图片正则：background/background-image/content 的 url(...)，
+# 分组 background/content 标明匹配的规则，分组 url 为图片地址
+CSS_IMAGE_PATTERN = re.compile(
+    r'(?:(?P<background>background(?:-image)?)|(?P<content>content))'
+    r'\s*:\s*url\(["\']?(?P<url>[^"\')\s]+)["\']?\)',
+    re.IGNORECASE)
+
+# JavaScript图片正则：引号内以图片扩展名结尾（ext）或包含image/img关键词（keyword）的字符串。
+# 结尾引号使用前瞻不消耗，保证它仍可作为下一个字符串的开头（如 '<img src="/a.jpg">'）。
+# 旧版三条正则各自扫描全文、消耗结尾引号，单次扫描无法完全复现：这里的匹配是旧版的超集，
+# 一个引号同时结束一个字符串并开始下一个时可能多出候选（如 '/'imgimg"imgx'.jpg' 多出 imgx），
+# 多出的候选仍需通过 _is_valid_image_url 校验
+JS_IMAGE_PATTERN = re.compile(
+    r'["\'](?:(?P<ext>[^"\']*\.(?:jpg|jpeg|png|gif|bmp|webp|svg|ico))'
+    r'|(?P<keyword>[^"\']*(?:image|img)[^"\']*))(?=["\'])',
+    re.IGNORECASE)
+
+# 响应头中的charset
+CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# HTML头部meta标签声明的charset
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+def _is_known_encoding(encoding):
+    """检查编码名称是否有效"""
+    try:
+        codecs.lookup(encoding)
+        return True
+    except LookupError:
+        return False
+
+# 流式扫描时每次喂给解析器的字符数
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# 图片扩展名与关键词（用于判断URL是否为图片）
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif')
+IMAGE_KEYWORDS = ('image', 'img', 'photo', 'picture', 'avatar', 'icon', 'logo')
+
+# 候选项类型 -> 统计中的提取阶段名（对应 _extract_*_images 方法）
+CANDIDATE_STAGES = {'img': 'img', 'source': 'picture', 'link': 'link', 'style': 'css', 'script': 'js'}
+
+class _LRUCache:
+    """线程安全的有界LRU缓存，记录命中/未命中次数"""
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+class _ImageCandidateScanner:
+    """
+    lxml解析器回调目标：单次流式扫描HTML，按文档顺序收集图片候选项
+    
+    候选项类型：img（属性字典）、source（picture内的srcset）、link（a标签href）、
+    style（style标签内容或style属性）、script（script标签内容）
+    """
+    
+    def __init__(self):
+        self.candidates = []
+        self._picture_depth = 0
+        self._text_tag = None
+        self._text_parts = []
+    
+    def start(self, tag, attrib):
+        style = attrib.get('style')
+        if style:
+            self.candidates.append(('style', style))
+        
+        if tag == 'img':
+            self.candidates.append(('img', dict(attrib)))
+        elif tag == 'source':
+            srcset = attrib.get('srcset')
+            if srcset and self._picture_depth:
+                self.candidates.append(('source', srcset))
+        elif tag == 'a':
+            href = attrib.get('href')
+            if href:
+                self.candidates.append(('link', href))
+        elif tag == 'picture':
+            self._picture_depth += 1
+        elif tag in ('style', 'script'):
+            self._text_tag = tag
+            self._text_parts = []
+    
+    def end(self, tag):
+        if tag == 'picture' and self._picture_depth:
+            self._picture_depth -= 1
+        elif tag == self._text_tag:
+            text = ''.join(self._text_parts)
+            if text:
+                self.candidates.append((tag, text))
+            self._text_tag = None
+            self._text_parts = []
+    
+    def data(self, data):
+        if self._text_tag:
+            self._text_parts.append(data)
+    
+    def drain(self):
+        """取出并清空已收集的候选项"""
+        candidates = self.candidates
+        self.candidates = []
+        return candidates
+    
+    def close(self):
+        return self.candidates
+
 class ImageExtractor:
     """网页图片链接提取器"""
     
-    def __init__(self, timeout=10, headers=None):
+    def __init__(self, timeout=10, headers=None, cache_size=4096, cache_dir=None,
+                 max_retries=3, backoff_factor=0.5, breaker_threshold=5, breaker_timeout=60, stats=None):
         """
         初始化图片提取器
         
         Args:
             timeout (int): 请求超时时间（秒）
             headers (dict): 请求头信息
+            cache_size (int): URL解析缓存和校验结果缓存的最大条目数（0表示不缓存）
+            cache_dir (str): 网页响应缓存目录，设置后重复爬取时发送条件请求
+            max_retries (int): 连接失败或429/5xx时的最大重试次数
+            backoff_factor (float): 指数退避基数（秒）
+            breaker_threshold (int): 同一主机连续失败多少次后熔断
+            breaker_timeout (float): 熔断后多少秒允许试探请求
+            stats (CrawlStats): 性能统计对象，传入后记录每个网页的各阶段耗时（默认不统计）
         """
         self.timeout = timeout
+        self.stats = stats
+        self.http_cache = HttpCache(cache_dir) if cache_dir else None
+        # 预先构建的扩展名/关键词集合，避免每次校验重复创建
+        self.image_extensions = IMAGE_EXTENSIONS
+        self.image_keywords = frozenset(IMAGE_KEYWORDS)
+        # (base_url, 原始地址) -> 绝对URL
+        self.url_cache = _LRUCache(cache_size)
+        # URL -> 是否为有效图片URL
+        self.validity_cache = _LRUCache(cache_size)
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
@@ -35,7 +198,12 @@ class ImageExtractor:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
-        self.session = requests.Session()
+        self.session = ResilientSession(
+            max_retries=max_retries,
+            backoff_factor=backoff_factor,
+            failure_threshold=breaker_threshold,
+            reset_timeout=breaker_timeout,
+        )
         self.session.headers.update(self.headers)
     
     def get_page_content(self, url):
@@ -48,17 +216,107 @@ class ImageExtractor:
         Returns:
             str: 网页HTML内容
         """
+        content, encoding = self.fetch_page(url)
+        if content is None:
+            return None
+        if self.stats is None:
+            return self.decode_content(content, encoding)
+        
+        start = time.perf_counter()
+        html_content = self.decode_content(content, encoding)
+        self.stats.record(url, timings={'decode': time.perf_counter() - start})
+        return html_content
+    
+    def fetch_page(self, url):
+        """
+        获取网页原始字节和编码；配置了缓存目录时发送条件请求，304时复用缓存内容
+        
+        Args:
+            url (str): 目标网址
+            
+        Returns:
+            tuple: (bytes 网页内容, str 编码)，失败时返回 (None, None)
+        """
+        if self.stats is None:
+            content, encoding, _ = self._fetch_page(url)
+            return content, encoding
+        
+        start = time.perf_counter()
+        content, encoding, downloaded = self._fetch_page(url)
+        self.stats.record(url, timings={'fetch': time.perf_counter() - start}, counts={'bytes': downloaded})
+        return content, encoding
+    
+    def _fetch_page(self, url):
+        """
+        获取网页，返回 (内容, 编码, 实际下载的字节数)；304时下载字节数为0
+        """
+        entry = self.http_cache.get(url) if self.http_cache else None
+        request_headers = HttpCache.conditional_headers(entry) if entry else None
+        
         try:
             logger.info(f"正在获取网页内容: {url}")
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding
-            logger.info(f"网页编码: {response.encoding}")
+            response = self.session.get(url, timeout=self.timeout, headers=request_headers)
             logger.info(f"响应状态码: {response.status_code}")
-            return response.text
+            
+            if entry and response.status_code == 304:
+                logger.info(f"网页未修改，使用缓存内容: {url}")
+                return entry['body'], entry['encoding'], 0
+            
+            response.raise_for_status()
+            content = response.content
+            encoding = self._get_encoding(response, content, entry['encoding'] if entry else None)
+            logger.info(f"网页编码: {encoding}")
+            
+            if self.http_cache:
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+                if etag or last_modified:
+                    self.http_cache.put(url, content, etag, last_modified, encoding)
+            
+            return content, encoding, len(content)
         except requests.exceptions.RequestException as e:
             logger.error(f"获取网页内容失败: {e}")
-            return None
+            return None, None, 0
+    
+    def decode_content(self, content, encoding):
+        """
+        按编码解码网页内容
+        
+        Args:
+            content (bytes): 网页原始字节
+            encoding (str): 编码
+            
+        Returns:
+            str: 网页HTML内容
+        """
+        return content.decode(encoding or 'utf-8', errors='replace')
+    
+    def _get_encoding(self, response, content, cached_encoding=None):
+        """
+        确定网页编码：优先使用响应头中的charset，其次是缓存的编码和meta标签声明，
+        最后才对全文进行编码检测
+        
+        Args:
+            response (requests.Response): 响应对象
+            content (bytes): 网页原始字节
+            cached_encoding (str): 上次缓存的编码
+            
+        Returns:
+            str: 编码名称
+        """
+        match = CHARSET_PATTERN.search(response.headers.get('Content-Type', ''))
+        candidates = [match.group(1) if match else None, cached_encoding]
+        
+        match = META_CHARSET_PATTERN.search(content[:4096])
+        if match:
+            candidates.append(match.group(1).decode('ascii'))
+        
+        for encoding in candidates:
+            if encoding and _is_known_encoding(encoding):
+                return encoding
+        
+        # 兜底：对全文进行编码检测
+        return response.apparent_encoding or 'utf-8'
     
     def extract_image_urls(self, url, include_data_urls=False):
         """
@@ -75,61 +333,267 @@ class ImageExtractor:
         if not html_content:
             return []
         
-        soup = BeautifulSoup(html_content, 'html.parser')
-        image_urls = []
-        
-        # 查找所有img标签
-        img_tags = soup.find_all('img')
-        logger.info(f"找到 {len(img_tags)} 个img标签")
+        return self.extract_from_html(html_content, url, include_data_urls)
+    
+    def iter_image_urls(self, url, include_data_urls=False):
+        """
+        逐个产出网页中的图片链接（按文档中首次出现的顺序去重）
         
-        for i, img in enumerate(img_tags):
-            logger.debug(f"处理第 {i+1} 个img标签: {img}")
-            
-            # 获取所有可能的图片属性
-            image_attrs = ['src', 'data-src', 'data-original', 'data-lazy-src', 'data-srcset', 'data-original-src']
+        Args:
+            url (str): 目标网址
+            include_data_urls (bool): 是否包含data URL格式的图片
             
-            for attr in image_attrs:
-                value = img.get(attr)
-                if value:
-                    logger.debug(f"找到属性 {attr}: {value}")
-                    # 转换为绝对URL
-                    absolute_url = urljoin(url, value.strip())
-                    if self._is_valid_image_url(absolute_url, include_data_urls):
-                        image_urls.append(absolute_url)
-                        logger.debug(f"添加图片URL: {absolute_url}")
+        Yields:
+            str: 图片链接
+        """
+        html_content = self.get_page_content(url)
+        if not html_content:
+            return
+        
+        yield from self.iter_from_html(html_content, url, include_data_urls)
+    
+    def extract_from_html(self, html_content, url, include_data_urls=False):
+        """
+        从已获取的HTML内容中提取图片链接
+        
+        Args:
+            html_content (str): HTML内容
+            url (str): 网页地址（用于转换相对URL）
+            include_data_urls (bool): 是否包含data URL格式的图片
             
-            # 获取srcset属性（响应式图片）
-            srcset = img.get('srcset')
-            if srcset:
-                logger.debug(f"处理srcset: {srcset}")
-                urls = self._parse_srcset(srcset, url)
-                image_urls.extend(urls)
-        
-        # 查找CSS背景图片
-        css_images = self._extract_css_images(html_content, url)
-        image_urls.extend(css_images)
-        
-        # 查找picture标签中的source
-        picture_images = self._extract_picture_images(soup, url)
-        image_urls.extend(picture_images)
-        
-        # 查找链接中的图片
-        link_images = self._extract_link_images(soup, url)
-        image_urls.extend(link_images)
-        
-        # 查找JavaScript中的图片URL
-        js_images = self._extract_js_images(html_content, url)
-        image_urls.extend(js_images)
-        
-        # 去重并返回
-        unique_urls = list(set(image_urls))
+        Returns:
+            list: 图片链接列表（按文档中首次出现的顺序）
+        """
+        unique_urls = list(self.iter_from_html(html_content, url, include_data_urls))
         logger.info(f"总共提取到 {len(unique_urls)} 个唯一图片链接")
         
         return unique_urls
     
+    def iter_from_html(self, html_content, url, include_data_urls=False, links=None):
+        """
+        从已获取的HTML内容中逐个产出图片链接（按文档中首次出现的顺序去重）
+        
+        Args:
+            html_content (str): HTML内容
+            url (str): 网页地址（用于转换相对URL）
+            include_data_urls (bool): 是否包含data URL格式的图片
+            links (list): 传入列表时，同时收集页面中所有a标签的绝对链接
+            
+        Yields:
+            str: 图片链接
+        """
+        if self.stats is not None:
+            yield from self._iter_from_html_timed(html_content, url, include_data_urls, links)
+            return
+        
+        seen = set()
+        # 单次流式扫描收集候选项，CSS/JS正则只作用于style/script内容和style属性
+        for kind, value in self._iter_candidates(html_content):
+            if links is not None and kind == 'link':
+                links.append(self._resolve_url(url, value.strip()))
+            for image_url in self._extract_candidate(kind, value, url, include_data_urls):
+                if image_url not in seen:
+                    seen.add(image_url)
+                    yield image_url
+    
+    def _iter_from_html_timed(self, html_content, url, include_data_urls=False, links=None):
+        """
+        与 iter_from_html 相同，同时记录解析、各提取阶段和去重的耗时及数量
+        （调用方处理产出链接的时间不计入统计）
+        """
+        perf_counter = time.perf_counter
+        timings = dict.fromkeys(('parse', 'dedupe'), 0.0)
+        counts = {'unique_urls': 0}
+        seen = set()
+        candidates = self._iter_candidates(html_content)
+        try:
+            while True:
+                start = perf_counter()
+                candidate = next(candidates, None)
+                parsed = perf_counter()
+                timings['parse'] += parsed - start
+                if candidate is None:
+                    break
+                
+                kind, value = candidate
+                if links is not None and kind == 'link':
+                    links.append(self._resolve_url(url, value.strip()))
+                image_urls = self._extract_candidate(kind, value, url, include_data_urls)
+                extracted = perf_counter()
+                stage = CANDIDATE_STAGES.get(kind, kind)
+                timings['extract_' + stage] = timings.get('extract_' + stage, 0.0) + extracted - parsed
+                counts['candidates_' + stage] = counts.get('candidates_' + stage, 0) + 1
+                counts['urls_' + stage] = counts.get('urls_' + stage, 0) + len(image_urls)
+                
+                new_urls = []
+                for image_url in image_urls:
+                    if image_url not in seen:
+                        seen.add(image_url)
+                        new_urls.append(image_url)
+                counts['unique_urls'] += len(new_urls)
+                timings['dedupe'] += perf_counter() - extracted
+                
+                yield from new_urls
+        finally:
+            # 调用方提前停止迭代时也记录已完成部分的统计
+            self.stats.record(url, timings=timings, counts=counts)
+    
+    def extract_page(self, url, include_data_urls=False):
+        """
+        提取网页中的图片链接和页面链接（供整站爬取使用）
+        
+        Args:
+            url (str): 目标网址
+            include_data_urls (bool): 是否包含data URL格式的图片
+            
+        Returns:
+            tuple: (图片链接列表, 页面中a标签的绝对链接列表)
+        """
+        html_content = self.get_page_content(url)
+        if not html_content:
+            return [], []
+        
+        links = []
+        image_urls = list(self.iter_from_html(html_content, url, include_data_urls, links))
+        logger.info(f"总共提取到 {len(image_urls)} 个唯一图片链接, {len(links)} 个页面链接")
+        return image_urls, links
+    
+    def _extract_candidate(self, kind, value, base_url, include_data_urls=False):
+        """
+        根据候选项类型调用对应的提取方法
+        
+        Args:
+            kind (str): 候选项类型
+            value: 候选项内容
+            base_url (str): 基础URL
+            include_data_urls (bool): 是否包含data URL
+            
+        Returns:
+            list: 图片URL列表
+        """
+        if kind == 'img':
+            return self._extract_img_images(value, base_url, include_data_urls)
+        if kind == 'source':
+            return self._extract_picture_images(value, base_url)
+        if kind == 'link':
+            return self._extract_link_images(value, base_url)
+        if kind == 'style':
+            return self._extract_css_images(value, base_url)
+        if kind == 'script':
+            return self._extract_js_images(value, base_url)
+        return []
+    
+    def _scan_candidates(self, html_content):
+        """
+        单次流式扫描HTML，按文档顺序收集图片候选项
+        
+        Args:
+            html_content (str): HTML内容
+            
+        Returns:
+            list: 候选项列表，每项为 (类型, 值)
+        """
+        return list(self._iter_candidates(html_content))
+    
+    def _iter_candidates(self, html_content, chunk_size=SCAN_CHUNK_SIZE):
+        """
+        分块喂给解析器，每块解析完成后立即产出已发现的候选项
+        
+        Args:
+            html_content (str): HTML内容
+            chunk_size (int): 每次喂给解析器的字符数
+            
+        Yields:
+            tuple: (类型, 值)
+        """
+        if not html_content:
+            return
+        
+        scanner = _ImageCandidateScanner()
+        parser = etree.HTMLParser(target=scanner)
+        try:
+            for start in range(0, len(html_content), chunk_size):
+                parser.feed(html_content[start:start + chunk_size])
+                yield from scanner.drain()
+            parser.close()
+        except etree.LxmlError as e:
+            logger.warning(f"HTML解析不完整: {e}")
+        yield from scanner.drain()
+    
+    def _extract_img_images(self, attrs, base_url, include_data_urls=False):
+        """
+        从img标签属性中提取图片
+        
+        Args:
+            attrs (dict): img标签属性
+            base_url (str): 基础URL
+            include_data_urls (bool): 是否包含data URL
+            
+        Returns:
+            list: 图片URL列表
+        """
+        urls = []
+        # 获取所有可能的图片属性
+        for attr in IMG_URL_ATTRS:
+            value = attrs.get(attr)
+            if value:
+                logger.debug(f"找到属性 {attr}: {value}")
+                # 转换为绝对URL
+                absolute_url = self._resolve_url(base_url, value.strip())
+                if self._is_valid_image_url(absolute_url, include_data_urls):
+                    urls.append(absolute_url)
+                    logger.debug(f"添加图片URL: {absolute_url}")
+        
+        # 获取srcset属性（响应式图片）
+        srcset = attrs.get('srcset')
+        if srcset:
+            logger.debug(f"处理srcset: {srcset}")
+            urls.extend(self._parse_srcset(srcset, base_url))
+        
+        return urls
+    
+    def get_cache_stats(self):
+        """
+        获取缓存命中统计
+        
+        Returns:
+            dict: URL解析缓存和校验结果缓存的命中/未命中次数
+        """
+        return {
+            'url_cache': self.url_cache.stats(),
+            'validity_cache': self.validity_cache.stats(),
+        }
+    
+    def get_resilience_stats(self):
+        """
+        获取请求容错统计
+        
+        Returns:
+            dict: 重试次数、放弃次数、熔断次数和当前熔断的主机
+        """
+        return self.session.get_stats()
+    
+    def _resolve_url(self, base_url, raw_url):
+        """
+        将相对地址转换为绝对URL（带缓存）
+        
+        Args:
+            base_url (str): 基础URL
+            raw_url (str): 原始地址
+            
+        Returns:
+            str: 绝对URL
+        """
+        key = (base_url, raw_url)
+        absolute_url = self.url_cache.get(key)
+        if absolute_url is None:
+            absolute_url = urljoin(base_url, raw_url)
+            self.url_cache.put(key, absolute_url)
+        return absolute_url
+    
     def _is_valid_image_url(self, url, include_data_urls=False):
         """
-        检查是否为有效的图片URL
+        检查是否为有效的图片URL（带缓存）
         
         Args:
             url (str): 图片URL
@@ -141,28 +605,33 @@ class ImageExtractor:
         if not url:
             return False
         
-        # 检查data URL
+        # 检查data URL（内容可能很大，不放入缓存）
         if url.startswith('data:image/'):
             return include_data_urls
         
-        # 检查常见图片扩展名
-        image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif']
-        parsed_url = urlparse(url)
-        path = parsed_url.path.lower()
-        
-        # 检查文件扩展名
-        has_extension = any(path.endswith(ext) for ext in image_extensions)
-        
-        # 检查URL中是否包含图片相关关键词
-        image_keywords = ['image', 'img', 'photo', 'picture', 'avatar', 'icon', 'logo']
-        has_keyword = any(keyword in url.lower() for keyword in image_keywords)
+        valid = self.validity_cache.get(url)
+        if valid is None:
+            valid = self._check_image_url(url)
+            self.validity_cache.put(url, valid)
+        return valid
+    
+    def _check_image_url(self, url):
+        """
+        根据扩展名和关键词判断URL是否为图片
         
-        # 检查URL参数中是否包含图片相关参数
-        query_params = ['image', 'img', 'photo', 'picture', 'avatar', 'icon', 'logo']
-        has_param = any(param in parsed_url.query.lower() for param in query_params)
+        Args:
+            url (str): 图片URL
+            
+        Returns:
+            bool: 是否为图片URL
+        """
+        # 检查URL中是否包含图片相关关键词（查询参数是URL的一部分，一并覆盖）
+        lower_url = url.lower()
+        if any(keyword in lower_url for keyword in self.image_keywords):
+            return True
         
-        # 如果URL包含图片关键词或参数，也认为是有效的
-        return has_extension or has_keyword or has_param
+        # 检查文件扩展名
+        return urlparse(url).path.lower().endswith(self.image_extensions)
     
     def _parse_srcset(self, srcset, base_url):
         """
@@ -183,143 +652,190 @@ class ImageExtractor:
             if part:
                 # 提取URL部分（去除宽度描述符）
                 url_part = part.split()[0]
-                absolute_url = urljoin(base_url, url_part)
+                absolute_url = self._resolve_url(base_url, url_part)
                 if self._is_valid_image_url(absolute_url):
                     urls.append(absolute_url)
                     logger.debug(f"从srcset添加URL: {absolute_url}")
         return urls
     
-    def _extract_css_images(self, html_content, base_url):
+    def _extract_css_images(self, css_text, base_url):
         """
         从CSS中提取背景图片
         
         Args:
-            html_content (str): HTML内容
+            css_text (str): style标签内容或style属性值
             base_url (str): 基础URL
             
         Returns:
             list: 图片URL列表
         """
         urls = []
-        # 查找CSS中的背景图片
-        css_patterns = [
-            r'background(?:-image)?\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
-            r'background\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
-            r'content\s*:\s*url\(["\']?([^"\')\s]+)["\']?\)',
-        ]
-        
-        for pattern in css_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            for match in matches:
-                absolute_url = urljoin(base_url, match)
-                if self._is_valid_image_url(absolute_url):
-                    urls.append(absolute_url)
-                    logger.debug(f"从CSS添加URL: {absolute_url}")
+        # 单次扫描查找CSS中的背景图片，命名分组标明匹配的规则
+        for match in CSS_IMAGE_PATTERN.finditer(css_text):
+            rule = 'background' if match.group('background') else 'content'
+            absolute_url = self._resolve_url(base_url, match.group('url'))
+            if self._is_valid_image_url(absolute_url):
+                urls.append(absolute_url)
+                logger.debug(f"从CSS({rule})添加URL: {absolute_url}")
         
         return urls
     
-    def _extract_picture_images(self, soup, base_url):
+    def _extract_picture_images(self, srcset, base_url):
         """
-        从picture标签中提取图片
+        从picture标签内的source标签中提取图片
+        （picture内的img标签与普通img标签一起处理）
         
         Args:
-            soup (BeautifulSoup): BeautifulSoup对象
+            srcset (str): source标签的srcset属性值
             base_url (str): 基础URL
             
         Returns:
             list: 图片URL列表
         """
-        urls = []
-        picture_tags = soup.find_all('picture')
-        logger.info(f"找到 {len(picture_tags)} 个picture标签")
-        
-        for picture in picture_tags:
-            # 查找source标签
-            sources = picture.find_all('source')
-            for source in sources:
-                srcset = source.get('srcset')
-                if srcset:
-                    urls.extend(self._parse_srcset(srcset, base_url))
-            
-            # 查找img标签
-            img = picture.find('img')
-            if img:
-                src = img.get('src')
-                if src:
-                    absolute_url = urljoin(base_url, src.strip())
-                    if self._is_valid_image_url(absolute_url):
-                        urls.append(absolute_url)
-        
-        return urls
+        return self._parse_srcset(srcset, base_url)
     
-    def _extract_link_images(self, soup, base_url):
+    def _extract_link_images(self, href, base_url):
         """
         从链接中提取图片
         
         Args:
-            soup (BeautifulSoup): BeautifulSoup对象
+            href (str): a标签的href属性值
             base_url (str): 基础URL
             
         Returns:
             list: 图片URL列表
         """
         urls = []
-        # 查找可能指向图片的链接
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link.get('href')
-            if href and self._is_valid_image_url(href):
-                absolute_url = urljoin(base_url, href)
-                urls.append(absolute_url)
-                logger.debug(f"从链接添加URL: {absolute_url}")
+        # 检查链接是否指向图片
+        if href and self._is_valid_image_url(href):
+            absolute_url = self._resolve_url(base_url, href)
+            urls.append(absolute_url)
+            logger.debug(f"从链接添加URL: {absolute_url}")
         
         return urls
     
-    def _extract_js_images(self, html_content, base_url):
+    def _extract_js_images(self, script_text, base_url):
         """
         从JavaScript中提取图片URL
         
         Args:
-            html_content (str): HTML内容
+            script_text (str): script标签内容
             base_url (str): 基础URL
             
         Returns:
             list: 图片URL列表
         """
         urls = []
-        # 查找JavaScript中的图片URL
-        js_patterns = [
-            r'["\']([^"\']*\.(?:jpg|jpeg|png|gif|bmp|webp|svg|ico))["\']',
-            r'["\']([^"\']*image[^"\']*)["\']',
-            r'["\']([^"\']*img[^"\']*)["\']',
-        ]
-        
-        for pattern in js_patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            for match in matches:
-                absolute_url = urljoin(base_url, match)
-                if self._is_valid_image_url(absolute_url):
-                    urls.append(absolute_url)
-                    logger.debug(f"从JS添加URL: {absolute_url}")
+        # 单次扫描查找JavaScript字符串中的图片URL，lastgroup为匹配的规则（ext/keyword）
+        for match in JS_IMAGE_PATTERN.finditer(script_text):
+            rule = match.lastgroup
+            absolute_url = self._resolve_url(base_url, match.group(rule))
+            if self._is_valid_image_url(absolute_url):
+                urls.append(absolute_url)
+                logger.debug(f"从JS({rule})添加URL: {absolute_url}")
         
         return urls
     
-    def save_urls_to_file(self, urls, filename='image_urls.txt'):
+    def save_urls_to_file(self, urls, filename='image_urls.txt', append=False, flush_every=100):
         """
-        将图片链接保存到文件
+        将图片链接保存到文件（边产出边写入，urls 可以是生成器）
         
         Args:
-            urls (list): 图片链接列表
+            urls (iterable): 图片链接列表或生成器
             filename (str): 文件名
+            append (bool): 是否追加到已有文件
+            flush_every (int): 每写入多少条刷新一次文件
+            
+        Returns:
+            int: 写入的链接数量
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                for url in urls:
-                    f.write(url + '\n')
-            logger.info(f"图片链接已保存到文件: {filename}")
+            with UrlFileWriter(filename, append=append, flush_every=flush_every) as writer:
+                writer.write_many(urls)
+            logger.info(f"图片链接已保存到文件: {filename} (共 {writer.count} 条)")
+            return writer.count
         except Exception as e:
             logger.error(f"保存文件失败: {e}")
+            return 0
+
+class UrlFileWriter:
+    """图片链接文件流式写入器：追加写入、定期刷新，可在多页面爬取过程中持续输出"""
+    
+    def __init__(self, filename, append=True, flush_every=100, flush_interval=1.0, dedupe=True):
+        """
+        初始化写入器
+        
+        Args:
+            filename (str): 文件名
+            append (bool): 是否追加到已有文件
+            flush_every (int): 每写入多少条刷新一次
+            flush_interval (float): 距上次刷新超过多少秒时刷新
+            dedupe (bool): 是否跨页面去重
+        """
+        self.filename = filename
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._seen = set() if dedupe else None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._file = open(filename, 'a' if append else 'w', encoding='utf-8')
+    
+    def write(self, url):
+        """
+        写入一条链接
+        
+        Args:
+            url (str): 图片链接
+            
+        Returns:
+            bool: 是否写入（重复链接返回False）
+        """
+        if self._seen is not None:
+            if url in self._seen:
+                return False
+            self._seen.add(url)
+        
+        self._file.write(url + '\n')
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return True
+    
+    def write_many(self, urls):
+        """
+        写入多条链接
+        
+        Args:
+            urls (iterable): 图片链接列表或生成器
+            
+        Returns:
+            int: 实际写入的数量
+        """
+        written = 0
+        for url in urls:
+            if self.write(url):
+                written += 1
+        return written
+    
+    def flush(self):
+        """将缓冲内容写入磁盘"""
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+    
+    def close(self):
+        """关闭文件"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 def main():
     """主函数示例"""
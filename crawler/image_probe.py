@@ -0,0 +1,261 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 图片元数据探测 - 通过Range请求只读取文件头，获取格式和尺寸，过滤图标/像素追踪图
+Version: 1.0
+'''
+import re
+import struct
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from resilience import ResilientSession
+
+logger = logging.getLogger(__name__)
+
+# JPEG中携带图片尺寸的SOF标记
+JPEG_SOF_MARKERS = frozenset({0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF})
+
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+def parse_image_header(data):
+    """
+    解析图片文件头，获取格式和尺寸
+
+    Args:
+        data (bytes): 文件开头的若干字节
+
+    Returns:
+        tuple: (格式, 宽度, 高度)。无法识别格式时格式为None；
+               已识别格式但数据不足时宽高为None
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        if len(data) < 24:
+            return 'png', None, None
+        width, height = struct.unpack('>II', data[16:24])
+        return 'png', width, height
+
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        if len(data) < 10:
+            return 'gif', None, None
+        width, height = struct.unpack('<HH', data[6:10])
+        return 'gif', width, height
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return ('webp',) + _parse_webp(data)
+
+    if data[:2] == b'\xff\xd8':
+        return ('jpeg',) + _parse_jpeg(data)
+
+    if data[:2] == b'BM':
+        if len(data) < 26:
+            return 'bmp', None, None
+        width, height = struct.unpack('<ii', data[18:26])
+        return 'bmp', width, abs(height)
+
+    return None, None, None
+
+def _parse_webp(data):
+    """解析WebP的VP8/VP8L/VP8X块"""
+    if len(data) < 30:
+        return None, None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = struct.unpack('<I', data[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        width = int.from_bytes(data[24:27], 'little') + 1
+        height = int.from_bytes(data[27:30], 'little') + 1
+        return width, height
+    return None, None
+
+def _parse_jpeg(data):
+    """逐段扫描JPEG，直到找到SOF段"""
+    i = 2
+    length = len(data)
+    while i + 4 <= length:
+        if data[i] != 0xFF:
+            return None, None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # 填充字节
+            i += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            if i + 9 > length:
+                return None, None
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        segment_length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        i += 2 + segment_length
+    return None, None
+
+class ImageProbe:
+    """图片探测器：并发发送Range请求读取文件头，必要时扩大读取范围，失败时用HEAD获取大小"""
+
+    def __init__(self, session=None, workers=8, timeout=10, initial_bytes=1024, max_bytes=256 * 1024, headers=None):
+        """
+        初始化探测器
+
+        Args:
+            session (requests.Session): 复用的会话，默认新建带重试和熔断的会话
+            workers (int): 并发线程数
+            timeout (int): 请求超时时间（秒）
+            initial_bytes (int): 首次请求读取的字节数
+            max_bytes (int): 最多读取的字节数（JPEG的EXIF段可能较大）
+            headers (dict): 请求头信息
+        """
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.initial_bytes = initial_bytes
+        self.max_bytes = max_bytes
+
+        self.session = session or ResilientSession()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def probe(self, url):
+        """
+        探测单张图片的格式、尺寸和文件大小
+
+        Args:
+            url (str): 图片链接
+
+        Returns:
+            dict: url/format/width/height/content_length/bytes_read/error
+        """
+        result = {'url': url, 'format': None, 'width': None, 'height': None,
+                  'content_length': None, 'bytes_read': 0, 'error': None}
+        data = b''
+        want = self.initial_bytes
+        try:
+            while True:
+                chunk, total, complete = self._read_range(url, len(data), want)
+                data += chunk
+                if total is not None:
+                    result['content_length'] = total
+
+                fmt, width, height = parse_image_header(data)
+                if fmt is None or width is not None or complete or want >= self.max_bytes:
+                    break
+                # 已识别格式但数据不足，扩大读取范围
+                want = min(want * 4, self.max_bytes)
+        except requests.exceptions.RequestException as e:
+            result['error'] = str(e)
+            fmt, width, height = None, None, None
+
+        result.update(format=fmt, width=width, height=height, bytes_read=len(data))
+
+        if result['content_length'] is None:
+            result['content_length'] = self._head_content_length(url)
+        return result
+
+    def probe_all(self, urls):
+        """
+        并发探测多张图片
+
+        Args:
+            urls (iterable): 图片链接
+
+        Returns:
+            list: 探测结果列表（与输入顺序一致）
+        """
+        urls = list(dict.fromkeys(urls))
+        logger.info(f"开始探测 {len(urls)} 张图片...")
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.probe, urls))
+        known = sum(1 for r in results if r['width'] is not None)
+        logger.info(f"探测完成: {known}/{len(results)} 张获取到尺寸")
+        return results
+
+    @staticmethod
+    def filter_by_size(results, min_width=0, min_height=0, keep_unknown=True):
+        """
+        按最小尺寸过滤探测结果
+
+        Args:
+            results (list): probe_all 的返回值
+            min_width (int): 最小宽度
+            min_height (int): 最小高度
+            keep_unknown (bool): 是否保留未能获取尺寸的图片
+
+        Returns:
+            list: 满足条件的探测结果
+        """
+        kept = []
+        for r in results:
+            if r['width'] is None or r['height'] is None:
+                if keep_unknown:
+                    kept.append(r)
+            elif r['width'] >= min_width and r['height'] >= min_height:
+                kept.append(r)
+        return kept
+
+    def _read_range(self, url, start, end):
+        """
+        读取 [start, end) 范围内的字节
+
+        Returns:
+            tuple: (数据, 文件总大小或None, 是否已读到文件末尾)
+        """
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 206:
+                data = response.raw.read(end - start, decode_content=True)
+                match = CONTENT_RANGE_PATTERN.match(response.headers.get('Content-Range', ''))
+                total = int(match.group(1)) if match else None
+                complete = total is not None and start + len(data) >= total
+                return data, total, complete
+
+            # 服务器不支持Range：流式读取，只读需要的部分后关闭连接
+            total = response.headers.get('Content-Length')
+            total = int(total) if total and total.isdigit() else None
+            data = b''
+            for chunk in response.iter_content(chunk_size=8192):
+                data += chunk
+                if len(data) >= end:
+                    break
+            complete = len(data) < end
+            return data[start:end], total, complete
+
+    def _head_content_length(self, url):
+        """用HEAD请求获取文件大小"""
+        try:
+            response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+            value = response.headers.get('Content-Length')
+            return int(value) if value and value.isdigit() else None
+        except requests.exceptions.RequestException as e:
+            logger.debug(f"HEAD请求失败 {url}: {e}")
+            return None
+
+def main():
+    """主函数示例"""
+    url_file = input("请输入图片链接文件 (默认: image_urls.txt): ").strip() or 'image_urls.txt'
+    min_width = int(input("最小宽度 (默认: 200): ").strip() or 200)
+    min_height = int(input("最小高度 (默认: 200): ").strip() or 200)
+
+    with open(url_file, 'r', encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    probe = ImageProbe()
+    results = probe.probe_all(urls)
+    kept = probe.filter_by_size(results, min_width, min_height, keep_unknown=False)
+    print(f"共 {len(results)} 张图片，满足 {min_width}x{min_height} 的有 {len(kept)} 张")
+    for r in kept:
+        print(f"{r['width']}x{r['height']} {r['format']} {r['url']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 多进程解析爬取器 - 线程池负责抓取，进程池负责HTML解析，避免解析受GIL限制
+Version: 1.0
+'''
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from requests.adapters import HTTPAdapter
+
+from image_extractor import ImageExtractor
+
+logger = logging.getLogger(__name__)
+
+# 解析进程中使用的提取器（每个进程初始化一次）
+_worker_extractor = None
+
+def _init_parse_worker(cache_size):
+    """解析进程初始化：创建进程内复用的提取器"""
+    global _worker_extractor
+    logging.getLogger('image_extractor').setLevel(logging.WARNING)
+    _worker_extractor = ImageExtractor(cache_size=cache_size)
+
+def _warm_up_worker(delay):
+    """预热任务：短暂占用解析进程，使同时提交的预热任务分散到不同进程"""
+    time.sleep(delay)
+    return os.getpid()
+
+def _parse_page(url, content, encoding, include_data_urls):
+    """
+    在解析进程中解码并提取图片链接
+
+    Args:
+        url (str): 网页地址
+        content (bytes): 网页原始字节
+        encoding (str): 网页编码
+        include_data_urls (bool): 是否包含data URL格式的图片
+
+    Returns:
+        list: 图片链接列表
+    """
+    html_content = _worker_extractor.decode_content(content, encoding)
+    return list(_worker_extractor.iter_from_html(html_content, url, include_data_urls))
+
+class ParallelImageCrawler:
+    """抓取与解析分离的爬取器：I/O 在线程池中进行，CPU 密集的解析在进程池中进行"""
+
+    def __init__(self, extractor=None, fetch_workers=16, parse_workers=None, cache_size=4096):
+        """
+        初始化爬取器
+
+        Args:
+            extractor (ImageExtractor): 用于抓取网页的提取器，默认在第一次抓取时新建
+            fetch_workers (int): 抓取线程数
+            parse_workers (int): 解析进程数，默认等于CPU核数
+            cache_size (int): 解析进程中URL缓存的大小
+        """
+        self._extractor = extractor
+        self._extractor_ready = False
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.cache_size = cache_size
+
+    @property
+    def extractor(self):
+        """抓取用的提取器（只解析本地页面时不会创建网络会话）"""
+        if not self._extractor_ready:
+            self._extractor = self._extractor or ImageExtractor()
+            adapter = HTTPAdapter(pool_connections=self.fetch_workers, pool_maxsize=self.fetch_workers)
+            self._extractor.session.mount('http://', adapter)
+            self._extractor.session.mount('https://', adapter)
+            self._extractor_ready = True
+        return self._extractor
+
+    def create_parse_pool(self, warm_up=False):
+        """
+        创建解析进程池
+
+        Args:
+            warm_up (bool): 是否先启动全部解析进程并完成初始化（基准测试计时前使用）
+
+        Returns:
+            ProcessPoolExecutor: 解析进程池
+        """
+        parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers,
+                                         initializer=_init_parse_worker, initargs=(self.cache_size,))
+        if warm_up:
+            # 进程按需启动：同时提交与进程数相同的短任务，每个进程都会被启动并执行初始化
+            list(parse_pool.map(_warm_up_worker, [0.05] * self.parse_workers))
+        return parse_pool
+
+    def crawl(self, urls, include_data_urls=False):
+        """
+        并发抓取并用进程池解析，按完成顺序产出结果
+
+        Args:
+            urls (iterable): 网址可迭代对象
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Yields:
+            tuple: (page_url, image_urls)
+        """
+        url_iter = iter(urls)
+        # future -> ('fetch' | 'parse', url)
+        pending = {}
+        # 在启动抓取线程前创建提取器
+        extractor = self.extractor
+
+        with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetch_pool, \
+                self.create_parse_pool() as parse_pool:
+
+            def submit_fetch():
+                url = next(url_iter, None)
+                if url is not None:
+                    pending[fetch_pool.submit(extractor.fetch_page, url)] = ('fetch', url)
+
+            # 抓取队列保持适当富余，避免解析进程空闲
+            for _ in range(self.fetch_workers * 2):
+                submit_fetch()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, url = pending.pop(future)
+                    if stage == 'fetch':
+                        submit_fetch()
+                        content, encoding = future.result()
+                        if content is None:
+                            yield url, []
+                            continue
+                        parse_future = parse_pool.submit(_parse_page, url, content, encoding, include_data_urls)
+                        pending[parse_future] = ('parse', url)
+                    else:
+                        try:
+                            image_urls = future.result()
+                        except Exception as e:
+                            logger.error(f"解析网页失败 {url}: {e}")
+                            image_urls = []
+                        yield url, image_urls
+
+    def parse_pages(self, pages, include_data_urls=False, parse_pool=None):
+        """
+        用进程池解析已获取的网页（如本地保存的网页语料）
+
+        Args:
+            pages (iterable): (url, content_bytes, encoding) 可迭代对象
+            include_data_urls (bool): 是否包含data URL格式的图片
+            parse_pool (ProcessPoolExecutor): 复用 create_parse_pool 创建的进程池（由调用方关闭），默认临时创建
+
+        Yields:
+            tuple: (page_url, image_urls)，按输入顺序
+        """
+        if parse_pool is None:
+            with self.create_parse_pool() as parse_pool:
+                yield from self.parse_pages(pages, include_data_urls, parse_pool)
+            return
+
+        pages = list(pages)
+        results = parse_pool.map(_parse_page,
+                                 [url for url, _, _ in pages],
+                                 [content for _, content, _ in pages],
+                                 [encoding for _, _, encoding in pages],
+                                 [include_data_urls] * len(pages))
+        for (url, _, _), image_urls in zip(pages, results):
+            yield url, image_urls
+
+def main():
+    """主函数示例"""
+    print("请输入要爬取的网址，每行一个，输入空行结束:")
+    urls = []
+    while True:
+        url = input().strip()
+        if not url:
+            break
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        urls.append(url)
+
+    crawler = ParallelImageCrawler()
+    for page_url, image_urls in crawler.crawl(urls):
+        print(f"{page_url}: {len(image_urls)} 个图片链接")
+
+if __name__ == "__main__":
+    main()
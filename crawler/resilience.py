@@ -0,0 +1,201 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 爬虫会话容错层 - 重试、指数退避（带抖动）、Retry-After、按主机熔断
+Version: 1.0
+'''
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# 只对幂等请求重试
+RETRY_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """主机熔断期间拒绝请求"""
+
+class CircuitBreaker:
+    """单个主机的熔断器：连续失败达到阈值后打开，冷却时间后放行一次试探请求"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold (int): 连续失败多少次后熔断
+            reset_timeout (float): 熔断后多少秒允许试探请求
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """
+        检查是否允许请求
+
+        Returns:
+            bool: 关闭状态或冷却结束（半开）时返回True
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # 半开：放行一次试探请求，失败则重新计时
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        """
+        记录一次失败
+
+        Returns:
+            bool: 本次失败是否导致熔断器打开
+        """
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                newly_opened = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return newly_opened
+            return False
+
+class ResilientSession(requests.Session):
+    """带重试、退避和按主机熔断的 requests 会话"""
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0,
+                 failure_threshold=5, reset_timeout=60.0, retry_statuses=RETRY_STATUSES):
+        """
+        初始化会话
+
+        Args:
+            max_retries (int): 最大重试次数（0表示不重试）
+            backoff_factor (float): 退避基数，第n次重试等待 backoff_factor * 2**n 秒（带随机抖动）
+            max_backoff (float): 单次等待的最长时间（秒），同样限制Retry-After
+            failure_threshold (int): 同一主机连续失败多少次后熔断
+            reset_timeout (float): 熔断后多少秒允许试探请求
+            retry_statuses (set): 需要重试的HTTP状态码
+        """
+        super().__init__()
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+
+        self.stats = {'requests': 0, 'retries': 0, 'give_ups': 0, 'breaker_trips': 0, 'breaker_rejections': 0}
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        """发送请求，按配置重试并维护主机熔断状态"""
+        host = urlparse(url).netloc.lower()
+        breaker = self._get_breaker(host)
+        if not breaker.allow():
+            self._count('breaker_rejections')
+            raise CircuitOpenError(f"主机已熔断，暂停请求: {host}")
+
+        retries = self.max_retries if method.upper() in RETRY_METHODS else 0
+        attempt = 0
+        while True:
+            self._count('requests')
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= retries:
+                    self._give_up(breaker, host, url)
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"请求失败，{delay:.2f}秒后重试 ({attempt + 1}/{retries}) {url}: {e}")
+            else:
+                if response.status_code not in self.retry_statuses:
+                    breaker.record_success()
+                    return response
+                if attempt >= retries:
+                    self._give_up(breaker, host, url)
+                    return response
+                delay = self._retry_after(response)
+                if delay is None:
+                    delay = self._backoff(attempt)
+                logger.warning(f"响应状态码 {response.status_code}，{delay:.2f}秒后重试 ({attempt + 1}/{retries}) {url}")
+                response.close()
+
+            self._count('retries')
+            attempt += 1
+            time.sleep(delay)
+
+    def get_stats(self):
+        """
+        获取容错统计
+
+        Returns:
+            dict: 请求数、重试次数、放弃次数、熔断次数，以及当前处于熔断状态的主机
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['open_breakers'] = sorted(host for host, breaker in self._breakers.items() if breaker.is_open)
+        return stats
+
+    def _get_breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def _give_up(self, breaker, host, url):
+        """重试次数用完，记录失败"""
+        self._count('give_ups')
+        if breaker.record_failure():
+            self._count('breaker_trips')
+            logger.error(f"主机连续失败 {breaker.failures} 次，熔断 {self.reset_timeout} 秒: {host}")
+        logger.error(f"重试 {self.max_retries} 次后仍失败，放弃: {url}")
+
+    def _backoff(self, attempt):
+        """指数退避（全抖动）"""
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(0, delay)
+
+    def _retry_after(self, response):
+        """
+        解析Retry-After响应头（秒数或HTTP日期）
+
+        Returns:
+            float: 等待秒数，没有或无法解析时返回None
+        """
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(self.max_backoff, max(0.0, delay))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
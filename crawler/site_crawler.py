@@ -0,0 +1,375 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 整站图片爬取器 - URL队列去重、深度限制、按主机限速、robots.txt、断点续爬
+Version: 1.0
+'''
+import os
+import json
+import math
+import time
+import heapq
+import base64
+import hashlib
+import logging
+from collections import deque
+from urllib.parse import urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+from image_extractor import ImageExtractor, UrlFileWriter
+
+logger = logging.getLogger(__name__)
+
+# 不作为网页抓取的链接扩展名
+SKIP_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.ico', '.tiff', '.tif',
+    '.pdf', '.zip', '.rar', '.7z', '.gz', '.exe', '.apk', '.dmg',
+    '.mp3', '.mp4', '.avi', '.mov', '.css', '.js', '.xml', '.json',
+)
+
+def _url_hash(url):
+    """URL的64位哈希值"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big')
+
+class SeenSet:
+    """紧凑的已见URL集合，只保存64位哈希值"""
+
+    def __init__(self, hashes=None):
+        self._hashes = set(hashes or [])
+
+    def add(self, url):
+        self._hashes.add(_url_hash(url))
+
+    def __contains__(self, url):
+        return _url_hash(url) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def to_dict(self):
+        return {'type': 'set', 'hashes': list(self._hashes)}
+
+class BloomFilter:
+    """布隆过滤器，适用于超大规模爬取，内存固定但存在极小误判率"""
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001, bits=None, num_hashes=None, count=0):
+        """
+        初始化布隆过滤器
+
+        Args:
+            capacity (int): 预计URL数量
+            error_rate (float): 允许的误判率
+        """
+        if bits is None:
+            # m = -n*ln(p)/(ln2)^2, k = m/n*ln2
+            num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+            bits = bytearray((num_bits + 7) // 8)
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        self.bits = bits
+        self.num_bits = len(bits) * 8
+        self.num_hashes = num_hashes
+        self.count = count
+
+    def _positions(self, url):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:], 'big') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, url):
+        for pos in self._positions(url):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, url):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(url))
+
+    def __len__(self):
+        return self.count
+
+    def to_dict(self):
+        return {
+            'type': 'bloom',
+            'bits': base64.b64encode(bytes(self.bits)).decode('ascii'),
+            'num_hashes': self.num_hashes,
+            'count': self.count,
+        }
+
+def _load_seen(data):
+    """从持久化数据恢复已见URL集合"""
+    if data.get('type') == 'bloom':
+        return BloomFilter(bits=bytearray(base64.b64decode(data['bits'])),
+                           num_hashes=data['num_hashes'], count=data.get('count', 0))
+    return SeenSet(data.get('hashes'))
+
+class SiteCrawler:
+    """基于 ImageExtractor 的整站图片爬取器"""
+
+    def __init__(self, extractor=None, max_depth=2, max_pages=None, same_domain=True,
+                 per_host_delay=1.0, respect_robots=True, frontier_path=None,
+                 use_bloom=False, bloom_capacity=1_000_000, save_every=20):
+        """
+        初始化整站爬取器
+
+        Args:
+            extractor (ImageExtractor): 图片提取器，默认新建一个
+            max_depth (int): 最大链接深度（起始页面为0）
+            max_pages (int): 最多抓取的页面数（断点续爬时累计计算），None表示不限制
+            same_domain (bool): 是否只跟踪与起始页面同域名的链接
+            per_host_delay (float): 同一主机两次请求的最小间隔（秒）
+            respect_robots (bool): 是否遵守robots.txt（含Crawl-delay）
+            frontier_path (str): URL队列持久化文件，设置后可断点续爬
+            use_bloom (bool): 是否使用布隆过滤器记录已见URL
+            bloom_capacity (int): 布隆过滤器预计容量
+            save_every (int): 每抓取多少个页面保存一次队列
+        """
+        self.extractor = extractor or ImageExtractor()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.same_domain = same_domain
+        self.per_host_delay = per_host_delay
+        self.respect_robots = respect_robots
+        self.frontier_path = frontier_path
+        self.save_every = max(1, save_every)
+
+        self.seen = BloomFilter(bloom_capacity) if use_bloom else SeenSet()
+        self.pages_crawled = 0
+        self.allowed_hosts = set()
+
+        # 按主机分组的待抓取队列和调度堆 (可抓取时间, 主机)
+        self._host_queues = {}
+        self._schedule = []
+        self._next_allowed = {}
+        self._robots = {}
+
+    def crawl(self, seeds, include_data_urls=False):
+        """
+        从起始网址开始爬取整站，逐页产出结果
+
+        Args:
+            seeds (list): 起始网址列表
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Yields:
+            tuple: (page_url, image_urls)
+        """
+        if isinstance(seeds, str):
+            seeds = [seeds]
+        seeds = [self._normalize(url) for url in seeds]
+
+        self._load_frontier()
+        # 续爬时已见过的起始网址会被跳过，新的起始网址照常加入队列
+        for url in seeds:
+            self._enqueue(url, 0)
+        self.allowed_hosts.update(urlparse(url).netloc.lower() for url in seeds)
+
+        current = None
+        try:
+            while self._schedule:
+                if self.max_pages is not None and self.pages_crawled >= self.max_pages:
+                    break
+
+                current = self._next_url()
+                url, depth = current
+                if not self._allowed_by_robots(url):
+                    logger.info(f"robots.txt 禁止抓取: {url}")
+                    current = None
+                    continue
+
+                image_urls, links = self.extractor.extract_page(url, include_data_urls)
+                self.pages_crawled += 1
+                current = None
+
+                if depth < self.max_depth:
+                    for link in links:
+                        link = self._normalize(link)
+                        if self._should_follow(link):
+                            self._enqueue(link, depth + 1)
+
+                if self.pages_crawled % self.save_every == 0:
+                    self._save_frontier()
+
+                yield url, image_urls
+        finally:
+            # 中断时把正在处理的页面放回队列，续爬时重新抓取
+            if current is not None:
+                self._push(*current, front=True)
+            if self._schedule:
+                self._save_frontier()
+            else:
+                # 队列已空表示爬取完成，删除持久化文件，下次运行重新开始
+                self._remove_frontier()
+
+        logger.info(f"整站爬取结束: 抓取 {self.pages_crawled} 个页面，已见URL {len(self.seen)} 个")
+
+    def crawl_to_file(self, seeds, filename='image_urls.txt', include_data_urls=False):
+        """
+        爬取整站并边爬边把图片链接追加写入文件
+
+        Args:
+            seeds (list): 起始网址列表
+            filename (str): 输出文件名
+            include_data_urls (bool): 是否包含data URL格式的图片
+
+        Returns:
+            int: 写入的图片链接数量
+        """
+        with UrlFileWriter(filename, append=True) as writer:
+            for _, image_urls in self.crawl(seeds, include_data_urls):
+                writer.write_many(image_urls)
+        return writer.count
+
+    def _normalize(self, url):
+        """去掉URL中的锚点"""
+        return urldefrag(url.strip())[0]
+
+    def _should_follow(self, url):
+        """判断链接是否需要加入队列"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return False
+        if self.same_domain and parsed.netloc.lower() not in self.allowed_hosts:
+            return False
+        if parsed.path.lower().endswith(SKIP_EXTENSIONS):
+            return False
+        return url not in self.seen
+
+    def _enqueue(self, url, depth):
+        """将未见过的URL加入队列"""
+        if url in self.seen:
+            return
+        self.seen.add(url)
+        self._push(url, depth)
+
+    def _push(self, url, depth, front=False):
+        """把URL放入所属主机的队列，必要时把主机加入调度堆"""
+        host = urlparse(url).netloc.lower()
+        queue = self._host_queues.get(host)
+        if queue is None:
+            queue = self._host_queues[host] = deque()
+        if not queue:
+            heapq.heappush(self._schedule, (self._next_allowed.get(host, 0.0), host))
+        if front:
+            queue.appendleft((url, depth))
+        else:
+            queue.append((url, depth))
+
+    def _next_url(self):
+        """按主机限速取出下一个可抓取的URL，必要时等待"""
+        ready_at, host = heapq.heappop(self._schedule)
+        wait = ready_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        queue = self._host_queues[host]
+        url, depth = queue.popleft()
+        next_allowed = time.monotonic() + self._host_delay(host, url)
+        self._next_allowed[host] = next_allowed
+        if queue:
+            heapq.heappush(self._schedule, (next_allowed, host))
+        return url, depth
+
+    def _host_delay(self, host, url):
+        """主机请求间隔：取配置值与robots.txt中Crawl-delay的较大值"""
+        delay = self.per_host_delay
+        robots = self._get_robots(url) if self.respect_robots else None
+        if robots is not None:
+            crawl_delay = robots.crawl_delay(self.extractor.headers.get('User-Agent', '*'))
+            if crawl_delay:
+                delay = max(delay, float(crawl_delay))
+        return delay
+
+    def _allowed_by_robots(self, url):
+        """检查robots.txt是否允许抓取"""
+        if not self.respect_robots:
+            return True
+        robots = self._get_robots(url)
+        return robots is None or robots.can_fetch(self.extractor.headers.get('User-Agent', '*'), url)
+
+    def _get_robots(self, url):
+        """获取并缓存主机的robots.txt，获取失败时视为不限制"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        if host not in self._robots:
+            robots = None
+            robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+            try:
+                response = self.extractor.session.get(robots_url, timeout=self.extractor.timeout)
+                if response.status_code == 200:
+                    robots = RobotFileParser(robots_url)
+                    robots.parse(response.text.splitlines())
+            except Exception as e:
+                logger.warning(f"获取robots.txt失败 {robots_url}: {e}")
+            self._robots[host] = robots
+        return self._robots[host]
+
+    def _save_frontier(self):
+        """持久化URL队列和已见集合"""
+        if not self.frontier_path:
+            return
+        frontier = [[url, depth] for queue in self._host_queues.values() for url, depth in queue]
+        state = {
+            'frontier': frontier,
+            'seen': self.seen.to_dict(),
+            'pages_crawled': self.pages_crawled,
+            'allowed_hosts': sorted(self.allowed_hosts),
+        }
+        temp_path = self.frontier_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.frontier_path)
+            logger.debug(f"队列已保存: {len(frontier)} 个待抓取URL")
+        except OSError as e:
+            logger.error(f"保存队列失败: {e}")
+
+    def _remove_frontier(self):
+        """爬取完成后删除持久化文件"""
+        if not self.frontier_path or not os.path.exists(self.frontier_path):
+            return
+        try:
+            os.remove(self.frontier_path)
+            logger.debug(f"队列已清空，删除持久化文件: {self.frontier_path}")
+        except OSError as e:
+            logger.error(f"删除队列文件失败: {e}")
+
+    def _load_frontier(self):
+        """
+        从持久化文件恢复URL队列
+
+        Returns:
+            bool: 是否成功恢复
+        """
+        if not self.frontier_path or not os.path.exists(self.frontier_path):
+            return False
+        try:
+            with open(self.frontier_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"读取队列失败: {e}")
+            return False
+
+        self.seen = _load_seen(state.get('seen', {}))
+        self.pages_crawled = state.get('pages_crawled', 0)
+        self.allowed_hosts.update(state.get('allowed_hosts', []))
+        for url, depth in state.get('frontier', []):
+            self._push(url, depth)
+        logger.info(f"从断点恢复: 已抓取 {self.pages_crawled} 个页面，待抓取 {len(state.get('frontier', []))} 个URL")
+        return True
+
+def main():
+    """主函数示例"""
+    url = input("请输入起始网址: ").strip()
+    if not url:
+        print("网址不能为空！")
+        return
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    crawler = SiteCrawler(max_depth=2, per_host_delay=1.0, frontier_path='frontier.json')
+    count = crawler.crawl_to_file([url], 'site_image_urls.txt')
+    print(f"抓取 {crawler.pages_crawled} 个页面，保存 {count} 个图片链接到 site_image_urls.txt")
+
+if __name__ == "__main__":
+    main()
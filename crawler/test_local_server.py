@@ -0,0 +1,524 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 基于本地HTTP服务器的离线测试脚本（无需外网）
+Version: 1.0
+'''
+import os
+import gc
+import json
+import hashlib
+import struct
+import zlib
+import time
+import asyncio
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from image_extractor import ImageExtractor, UrlFileWriter
+from async_crawler import AsyncImageCrawler
+from image_downloader import ImageDownloader
+from site_crawler import SiteCrawler
+from parallel_crawler import ParallelImageCrawler
+from image_probe import ImageProbe, parse_image_header
+from crawl_stats import CrawlStats
+from benchmark_suite import percentile, run_suite, compare_with_baseline, BASELINE_FILE
+from bench_corpus import load_corpus, SMALL_CORPUS_DIR, SMALL_PAGE_STYLES
+
+# 本地测试页面
+TEST_PAGES = {
+    '/index.html': '''<html><head>
+<style>.banner { background-image: url("/static/banner.jpg"); }</style>
+</head><body>
+<img src="/static/logo.png" data-src="/static/lazy.jpg">
+<img srcset="/static/a-1x.jpg 1x, /static/a-2x.jpg 2x">
+<picture><source srcset="/static/hero.webp"><img src="/static/hero.jpg"></picture>
+<a href="/static/full.jpeg">大图</a>
+<script>var icon = "/static/icon.gif";</script>
+</body></html>''',
+    '/empty.html': '<html><body><p>没有图片</p></body></html>',
+}
+
+# 整站爬取测试页面：index -> a/b/private/外站，a -> c -> d
+SITE_PAGES = {
+    '/site/index.html': '<a href="/site/a.html">A</a><a href="b.html#top">B</a><a href="/site/private/x.html">X</a>'
+                        '<a href="https://other.example.com/">外站</a><a href="/static/full.jpeg">图</a><img src="/site/i0.png">',
+    '/site/a.html': '<a href="/site/c.html">C</a><a href="/site/index.html">首页</a><img src="/site/i1.png">',
+    '/site/b.html': '<img src="/site/i2.png">',
+    '/site/c.html': '<a href="/site/d.html">D</a><img src="/site/i3.png">',
+    '/site/d.html': '<img src="/site/i4.png">',
+    '/site/private/x.html': '<img src="/site/secret.png">',
+}
+ROBOTS_TXT = 'User-agent: *\nDisallow: /site/private/\n'
+
+# 只在meta标签中声明编码的GBK页面（响应头不带charset）
+GBK_PAGE = '<html><head><meta charset="gbk"></head><body><img src="/图片/风景.jpg" alt="中文"></body></html>'.encode('gbk')
+
+def make_png(width, height, padding=0):
+    """生成指定尺寸的PNG文件头（IHDR + 填充数据 + IEND）"""
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) + chunk(b'tEXt', b'x' * padding) + chunk(b'IEND', b'')
+
+def make_jpeg(width, height, exif_size=0, body_size=0):
+    """生成指定尺寸的JPEG文件头（APP1段 + SOF0段 + 填充数据）"""
+    app1 = b'\xff\xe1' + struct.pack('>H', exif_size + 2) + b'\x00' * exif_size
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, height, width, 3) + b'\x01\x22\x00\x02\x11\x01\x03\x11\x01'
+    return b'\xff\xd8' + app1 + sof0 + b'\x00' * body_size + b'\xff\xd9'
+
+def make_gif(width, height):
+    return b'GIF89a' + struct.pack('<HH', width, height) + b'\x00\x00\x00;'
+
+def make_webp(width, height):
+    """生成VP8X格式的WebP文件头"""
+    vp8x = b'VP8X' + struct.pack('<I', 10) + b'\x00' * 4 + (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little')
+    return b'RIFF' + struct.pack('<I', 4 + len(vp8x)) + b'WEBP' + vp8x
+
+# 本地测试图片
+TEST_IMAGES = {
+    '/static/logo.png': make_png(120, 40),
+    '/static/photo.png': make_png(1920, 1080, padding=200 * 1024),
+}
+
+# 图片探测测试文件（/plain/ 下的文件不支持Range请求）
+PROBE_IMAGES = {
+    '/probe/exif.jpg': make_jpeg(800, 600, exif_size=20000, body_size=100 * 1024),
+    '/probe/pixel.gif': make_gif(1, 1),
+    '/probe/hero.webp': make_webp(1280, 720),
+    '/probe/photo.png': TEST_IMAGES['/static/photo.png'],
+    '/probe/data.bin': b'\x00' * 5000,
+    '/plain/exif.jpg': make_jpeg(640, 480, exif_size=20000),
+}
+
+class _TestHandler(BaseHTTPRequestHandler):
+    """本地测试服务器请求处理器"""
+
+    def do_GET(self):
+        if self.path in TEST_IMAGES:
+            self._send(TEST_IMAGES[self.path], 'image/png')
+            return
+        if self.path in PROBE_IMAGES:
+            data = PROBE_IMAGES[self.path]
+            if self.path.startswith('/probe/') and self._send_range(data):
+                return
+            self._send(data, 'application/octet-stream')
+            return
+        if self.path == '/gbk.html':
+            self._send(GBK_PAGE, 'text/html')
+            return
+        if self.path.startswith('/slow.html'):
+            # 慢速页面：每次请求延迟后返回空页面
+            self.server.page_requests.append(self.path)
+            time.sleep(0.05)
+            self._send(TEST_PAGES['/empty.html'].encode('utf-8'), 'text/html; charset=utf-8')
+            return
+        if self.path == '/flaky.html':
+            # 前两次返回503，之后正常返回
+            self.server.flaky_requests += 1
+            if self.server.flaky_requests <= 2:
+                self.send_response(503)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self._send(TEST_PAGES['/index.html'].encode('utf-8'), 'text/html; charset=utf-8')
+            return
+        if self.path == '/down.html':
+            self.server.down_requests += 1
+            self.send_error(500)
+            return
+        if self.path == '/robots.txt':
+            self._send(ROBOTS_TXT.encode('utf-8'), 'text/plain')
+            return
+        self.server.page_requests.append(self.path)
+        body = TEST_PAGES.get(self.path) or SITE_PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode('utf-8')
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._send(data, 'text/html; charset=utf-8', {'ETag': etag})
+
+    def do_HEAD(self):
+        data = TEST_IMAGES.get(self.path) or PROBE_IMAGES.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+
+    def _send_range(self, data):
+        """处理 Range: bytes=start-end 请求，返回是否已发送206响应"""
+        value = self.headers.get('Range', '')
+        if not value.startswith('bytes='):
+            return False
+        start, _, end = value[6:].partition('-')
+        start = int(start)
+        end = min(int(end) if end else len(data) - 1, len(data) - 1)
+        body = data[start:end + 1]
+        self.server.range_requests += 1
+        self.send_response(206)
+        self.send_header('Content-Range', f"bytes {start}-{start + len(body) - 1}/{len(data)}")
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return True
+
+    def _send(self, data, content_type, extra_headers=None):
+        self.server.full_responses += 1
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_test_server(handler=_TestHandler):
+    """
+    在后台线程中启动本地HTTP服务器
+
+    Returns:
+        tuple: (server, base_url)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.full_responses = 0
+    server.page_requests = []
+    server.flaky_requests = 0
+    server.down_requests = 0
+    server.range_requests = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_async_crawl_matches_sync():
+    """异步爬取结果应与同步提取结果一致"""
+    server, base_url = start_test_server()
+    try:
+        urls = [f"{base_url}{path}" for path in TEST_PAGES] + [f"{base_url}/missing.html"]
+        extractor = ImageExtractor()
+        expected = {url: sorted(extractor.extract_image_urls(url)) for url in urls}
+
+        crawler = AsyncImageCrawler(max_concurrency=4, per_host_limit=2)
+        results = asyncio.run(crawler.crawl_all(urls))
+
+        assert set(results) == set(urls)
+        for url in urls:
+            assert sorted(results[url]) == expected[url], url
+        assert f"{base_url}/static/banner.jpg" in results[f"{base_url}/index.html"]
+        assert results[f"{base_url}/missing.html"] == []
+    finally:
+        server.shutdown()
+
+def test_async_crawl_stops_early():
+    """提前停止迭代时取消已创建的抓取任务，网址按需读取，不再请求剩余网址"""
+    server, base_url = start_test_server()
+    try:
+        pulled = []
+
+        def urls():
+            for i in range(500):
+                pulled.append(i)
+                yield f"{base_url}/slow.html?page={i}"
+
+        errors = []
+
+        async def take_first():
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context['message']))
+            crawler = AsyncImageCrawler(max_concurrency=2, per_host_limit=2)
+            stream = crawler.crawl(urls())
+            async for _ in stream:
+                break
+            await stream.aclose()
+            requested = len(server.page_requests)
+            # 事件循环继续运行：被取消的任务不应再发出请求（最多完成已在线程中执行的请求）
+            await asyncio.sleep(0.5)
+            gc.collect()
+            return requested, len(server.page_requests)
+
+        requested, finished = asyncio.run(take_first())
+        assert len(pulled) <= 2 * 4 + 4
+        assert finished <= requested + 2
+        # 任务被取消而不是在已关闭的线程池上失败（否则会出现 Task exception was never retrieved）
+        assert errors == []
+    finally:
+        server.shutdown()
+
+def test_parallel_crawl_matches_sync():
+    """进程池解析的结果与同步提取结果一致"""
+    server, base_url = start_test_server()
+    try:
+        urls = [f"{base_url}{path}" for path in TEST_PAGES] + [f"{base_url}/missing.html"]
+        extractor = ImageExtractor()
+        expected = {url: extractor.extract_image_urls(url) for url in urls}
+
+        crawler = ParallelImageCrawler(fetch_workers=2, parse_workers=2)
+        assert dict(crawler.crawl(urls)) == expected
+    finally:
+        server.shutdown()
+
+def test_parallel_parse_pages_with_warm_pool():
+    """只解析本地页面时不创建抓取用的网络会话；预热后的进程池可复用，结果与临时进程池一致"""
+    pages = [(f"https://www.example.com/p{i}.html", TEST_PAGES['/index.html'].encode('utf-8'), 'utf-8')
+             for i in range(4)]
+    crawler = ParallelImageCrawler(parse_workers=2)
+    expected = list(crawler.parse_pages(pages))
+    with crawler.create_parse_pool(warm_up=True) as parse_pool:
+        assert list(crawler.parse_pages(pages, parse_pool=parse_pool)) == expected
+        # 调用方传入的进程池不会被关闭
+        assert list(crawler.parse_pages(pages[:1], parse_pool=parse_pool)) == expected[:1]
+    assert crawler._extractor is None
+    assert 'https://www.example.com/static/banner.jpg' in expected[0][1]
+
+    extractor = ImageExtractor()
+    assert ParallelImageCrawler(extractor, parse_workers=1).extractor is extractor
+
+def test_iter_image_urls_document_order():
+    """生成器按文档首次出现顺序产出去重后的链接，并可流式写入文件"""
+    server, base_url = start_test_server()
+    try:
+        extractor = ImageExtractor()
+        urls = list(extractor.iter_image_urls(f"{base_url}/index.html"))
+        assert urls == [f"{base_url}/static/{name}" for name in (
+            'banner.jpg', 'logo.png', 'lazy.jpg', 'a-1x.jpg', 'a-2x.jpg',
+            'hero.webp', 'hero.jpg', 'full.jpeg', 'icon.gif')]
+        assert sorted(urls) == sorted(extractor.extract_image_urls(f"{base_url}/index.html"))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'urls.txt')
+            with UrlFileWriter(filename, append=False, flush_every=2) as writer:
+                # 同一页面写两次，跨页面去重
+                for page in ('/index.html', '/index.html', '/empty.html'):
+                    writer.write_many(extractor.iter_image_urls(f"{base_url}{page}"))
+                    with open(filename, encoding='utf-8') as f:
+                        assert len(f.read().splitlines()) >= writer.count - 1
+            with open(filename, encoding='utf-8') as f:
+                assert f.read().splitlines() == urls
+    finally:
+        server.shutdown()
+
+def test_downloader_downloads_and_skips_existing():
+    """下载器分块写盘，重复运行时跳过已存在文件"""
+    server, base_url = start_test_server()
+    try:
+        urls = [f"{base_url}{path}" for path in TEST_IMAGES] + [f"{base_url}/static/missing.png"]
+        downloader = ImageDownloader(workers=3, chunk_size=4096)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            stats = downloader.download(urls + urls[:1], tmp_dir)
+            assert (stats['total'], stats['success'], stats['failed'], stats['skipped']) == (3, 2, 1, 0)
+            assert stats['bytes'] == sum(len(data) for data in TEST_IMAGES.values())
+            assert stats['bytes_per_sec'] > 0 and stats['files_per_sec'] > 0
+            for path, data in TEST_IMAGES.items():
+                with open(downloader.get_output_path(f"{base_url}{path}", tmp_dir), 'rb') as f:
+                    assert f.read() == data
+            assert not [name for name in os.listdir(tmp_dir) if name.endswith('.part')]
+
+            url_file = os.path.join(tmp_dir, 'urls.txt')
+            ImageExtractor().save_urls_to_file(urls, url_file)
+            stats = downloader.download_from_file(url_file, tmp_dir)
+            assert (stats['success'], stats['failed'], stats['skipped']) == (0, 1, 2)
+    finally:
+        server.shutdown()
+
+def test_conditional_get_cache():
+    """配置缓存目录后，重复爬取发送条件请求并在304时复用缓存内容"""
+    server, base_url = start_test_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            extractor = ImageExtractor(cache_dir=tmp_dir)
+            first = extractor.extract_image_urls(f"{base_url}/index.html")
+            assert server.full_responses == 1
+
+            recrawl = ImageExtractor(cache_dir=tmp_dir)
+            assert recrawl.extract_image_urls(f"{base_url}/index.html") == first
+            assert server.full_responses == 1
+
+            # 编码取自meta标签
+            assert recrawl.extract_image_urls(f"{base_url}/gbk.html") == [f"{base_url}/图片/风景.jpg"]
+    finally:
+        server.shutdown()
+
+def test_site_crawler_depth_robots_and_resume():
+    """整站爬取：同域名、深度限制、robots.txt，以及中断后从持久化队列续爬"""
+    server, base_url = start_test_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            frontier_path = os.path.join(tmp_dir, 'frontier.json')
+            seed = f"{base_url}/site/index.html"
+
+            first = SiteCrawler(max_depth=2, max_pages=2, per_host_delay=0, frontier_path=frontier_path)
+            pages = dict(first.crawl([seed]))
+            assert list(pages) == [seed, f"{base_url}/site/a.html"]
+            assert pages[seed] == [f"{base_url}/static/full.jpeg", f"{base_url}/site/i0.png"]
+
+            resumed = SiteCrawler(max_depth=2, per_host_delay=0, frontier_path=frontier_path, use_bloom=True)
+            pages.update(resumed.crawl([seed]))
+            # d.html 深度为3，超出限制；private 被robots.txt禁止；外站链接不跟踪
+            assert sorted(pages) == sorted(f"{base_url}/site/{name}" for name in ('index.html', 'a.html', 'b.html', 'c.html'))
+            assert sorted(server.page_requests) == sorted(f"/site/{name}" for name in ('index.html', 'a.html', 'b.html', 'c.html'))
+            assert resumed.pages_crawled == 4
+
+            # 爬取完成后删除持久化文件，同一路径再次爬取会从头开始
+            assert not os.path.exists(frontier_path)
+            server.page_requests.clear()
+            again = SiteCrawler(max_depth=0, per_host_delay=0, frontier_path=frontier_path)
+            assert [url for url, _ in again.crawl([seed])] == [seed]
+            assert server.page_requests == ['/site/index.html']
+
+            # 中断后续爬时传入新的起始网址：已见过的跳过，新的加入队列
+            stopped = SiteCrawler(max_depth=0, max_pages=0, per_host_delay=0, frontier_path=frontier_path)
+            assert list(stopped.crawl([seed])) == []
+            assert os.path.exists(frontier_path)
+            extra = f"{base_url}/site/b.html"
+            resumed = SiteCrawler(max_depth=0, per_host_delay=0, frontier_path=frontier_path)
+            assert [url for url, _ in resumed.crawl([seed, extra])] == [seed, extra]
+    finally:
+        server.shutdown()
+
+def test_retry_and_circuit_breaker():
+    """503时按Retry-After重试；持续失败的主机被熔断，不再发送请求"""
+    server, base_url = start_test_server()
+    try:
+        extractor = ImageExtractor(max_retries=3, backoff_factor=0.01, breaker_threshold=2, breaker_timeout=60)
+        assert f"{base_url}/static/logo.png" in extractor.extract_image_urls(f"{base_url}/flaky.html")
+        assert server.flaky_requests == 3
+
+        for _ in range(3):
+            assert extractor.extract_image_urls(f"{base_url}/down.html") == []
+        # 前两次各请求 1+3 次后放弃并触发熔断，第三次被直接拒绝
+        assert server.down_requests == 8
+
+        stats = extractor.get_resilience_stats()
+        assert stats['retries'] == 2 + 6
+        assert stats['give_ups'] == 2
+        assert stats['breaker_trips'] == 1
+        assert stats['breaker_rejections'] == 1
+        assert stats['open_breakers'] == [base_url.split('://')[1]]
+    finally:
+        server.shutdown()
+
+def test_image_probe_reads_headers_only():
+    """Range请求只读取文件头即可获得尺寸；EXIF较大时扩大范围；不支持Range时提前断开"""
+    for data, expected in ((TEST_IMAGES['/static/logo.png'], ('png', 120, 40)),
+                           (PROBE_IMAGES['/probe/pixel.gif'], ('gif', 1, 1)),
+                           (PROBE_IMAGES['/probe/hero.webp'], ('webp', 1280, 720)),
+                           (PROBE_IMAGES['/probe/exif.jpg'], ('jpeg', 800, 600))):
+        assert parse_image_header(data) == expected
+    assert parse_image_header(PROBE_IMAGES['/probe/exif.jpg'][:1024]) == ('jpeg', None, None)
+
+    server, base_url = start_test_server()
+    try:
+        probe = ImageProbe(workers=3, initial_bytes=1024)
+        urls = [f"{base_url}{path}" for path in PROBE_IMAGES] + [f"{base_url}/probe/missing.png"]
+        results = {r['url']: r for r in probe.probe_all(urls)}
+
+        photo = results[f"{base_url}/probe/photo.png"]
+        assert (photo['format'], photo['width'], photo['height']) == ('png', 1920, 1080)
+        assert photo['content_length'] == len(PROBE_IMAGES['/probe/photo.png'])
+        assert photo['bytes_read'] == 1024
+
+        exif = results[f"{base_url}/probe/exif.jpg"]
+        assert (exif['format'], exif['width'], exif['height']) == ('jpeg', 800, 600)
+        # 1024 -> 4096 -> 16384 -> 65536 字节，跨过20KB的EXIF段
+        assert exif['bytes_read'] == 65536
+
+        plain = results[f"{base_url}/plain/exif.jpg"]
+        assert (plain['width'], plain['height']) == (640, 480)
+
+        unknown = results[f"{base_url}/probe/data.bin"]
+        assert unknown['format'] is None and unknown['content_length'] == 5000
+        assert results[f"{base_url}/probe/missing.png"]['error']
+
+        kept = probe.filter_by_size(results.values(), min_width=100, min_height=100, keep_unknown=False)
+        assert sorted(r['url'] for r in kept) == sorted(f"{base_url}{path}" for path in (
+            '/probe/exif.jpg', '/probe/hero.webp', '/probe/photo.png', '/plain/exif.jpg'))
+    finally:
+        server.shutdown()
+
+def test_crawl_stats_records_phases():
+    """启用统计后结果不变，并记录各阶段耗时、候选项数量和下载字节数"""
+    server, base_url = start_test_server()
+    try:
+        url = f"{base_url}/index.html"
+        stats = CrawlStats()
+        extractor = ImageExtractor(stats=stats)
+        assert extractor.extract_image_urls(url) == ImageExtractor().extract_image_urls(url)
+
+        summary = stats.summary()
+        assert summary['pages'] == 1
+        assert list(summary['timings'])[:3] == ['fetch', 'decode', 'parse']
+        assert {'extract_img', 'extract_picture', 'extract_link', 'extract_css', 'extract_js', 'dedupe'} <= set(summary['timings'])
+        counts = summary['counts']
+        assert counts['bytes'] == len(TEST_PAGES['/index.html'].encode('utf-8'))
+        assert (counts['candidates_img'], counts['candidates_picture'], counts['candidates_css']) == (3, 1, 1)
+        assert counts['urls_img'] == 5 and counts['unique_urls'] == 9
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'stats.jsonl')
+            assert stats.write_json_lines(filename) == 1
+            with open(filename, encoding='utf-8') as f:
+                assert json.loads(f.readline())['url'] == url
+
+        text = stats.to_prometheus()
+        assert 'image_extractor_pages_total 1' in text
+        assert 'image_extractor_phase_seconds_total{phase="fetch"}' in text
+        assert 'image_extractor_candidates_total{stage="img"} 3' in text
+    finally:
+        server.shutdown()
+
+def test_percentile_nearest_rank():
+    """基准测试的分位数使用最近秩法（第 ceil(p/100*n) 个）"""
+    values = [6, 1, 5, 2, 4, 3]
+    assert percentile(values, 50) == 3
+    assert percentile(values, 95) == 6
+    assert percentile(values, 0) == 1
+    assert percentile(values, 100) == 6
+    assert percentile(list(range(1, 11)), 50) == 5
+    assert percentile(list(range(1, 11)), 90) == 9
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([7], 50) == 7
+
+def test_small_corpus_and_reference_baseline():
+    """纳入版本控制的小语料与生成器输出一致；提取到的URL数量与参考基线一致"""
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        assert load_corpus(corpus_dir, SMALL_PAGE_STYLES) == load_corpus(SMALL_CORPUS_DIR, SMALL_PAGE_STYLES)
+
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    results = run_suite(repeat=1)
+    assert (results['mode'], results['corpus']) == (baseline['mode'], baseline['corpus']) == ('fetcher', 'small')
+    assert set(results['pages']) == set(baseline['pages'])
+    # 容差足够大时只剩与机器无关的URL数量对比
+    assert compare_with_baseline(results, baseline, tolerance=1e9) == []
+
+    changed = json.loads(json.dumps(baseline))
+    changed['pages']['srcset']['urls'] += 1
+    assert compare_with_baseline(results, changed, tolerance=1e9) == [
+        f"srcset urls: {changed['pages']['srcset']['urls']} -> {results['pages']['srcset']['urls']}"]
+
+if __name__ == "__main__":
+    test_async_crawl_matches_sync()
+    test_async_crawl_stops_early()
+    test_parallel_crawl_matches_sync()
+    test_parallel_parse_pages_with_warm_pool()
+    test_iter_image_urls_document_order()
+    test_downloader_downloads_and_skips_existing()
+    test_conditional_get_cache()
+    test_site_crawler_depth_robots_and_resume()
+    test_retry_and_circuit_breaker()
+    test_image_probe_reads_headers_only()
+    test_crawl_stats_records_phases()
+    test_percentile_nearest_rank()
+    test_small_corpus_and_reference_baseline()
+    print("✅ 所有离线测试通过")
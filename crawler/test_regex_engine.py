@@ -0,0 +1,143 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: CSS/JS图片正则引擎回归测试 - 合并后的预编译正则与旧版多条正则结果一致
+Version: 1.0
+'''
+import re
+import random
+import logging
+import tempfile
+from urllib.parse import urljoin
+
+from image_extractor import ImageExtractor, CSS_IMAGE_PATTERN, JS_IMAGE_PATTERN
+from benchmark_extractor import LEGACY_CSS_PATTERNS, LEGACY_JS_PATTERNS
+from bench_corpus import load_corpus
+
+BASE_URL = 'https://www.example.com/shop/list.html'
+
+# CSS回归语料
+CSS_CORPUS = [
+    '.a { background: url(/img/a.jpg) no-repeat; }',
+    '.b { background-image: url("/img/b.png"); }',
+    ".c { BACKGROUND-IMAGE : url('https://cdn.example.com/c.webp') }",
+    '.d:before { content: url(/icons/d.svg); }',
+    '.e { background:url(/sprite.gif) 0 0; } .f { background-image:url(/img/f.jpeg) }',
+    '.g { background: #fff url( /img/g.jpg ); }',
+    '.h { background-color: red; border-image: url(/img/border.png); }',
+    '.i { background: url(data:image/png;base64,iVBORw0KGgo=); }',
+    '.j { background-image: url(/api/image?id=3&size=large); }',
+    'color: red; background-image: url(/photo/k.jpg); content: url(/logo/k.png)',
+    '.l { background: url(/no-ext/file); }',
+]
+
+# JavaScript回归语料
+JS_CORPUS = [
+    'var a = "/img/a.jpg", b = \'/img/b.PNG\';',
+    'var cfg = {"thumb": "/static/thumb.gif", "name": "商品", "cover": "https://cdn.example.com/image/1/cover"};',
+    'el.src = "/assets/logo.svg"; el.alt = "logo image";',
+    'var s = "plain text"; var t = "another string";',
+    'loadImage("/upload/photo-1.webp"); loadImage(\'/upload/photo-2.bmp\');',
+    'var tpl = \'<img src="/tpl/inner.jpg">\';',
+    'var icons = ["/ico/favicon.ico", "/ico/apple-touch.png", "/ico/readme.txt"];',
+    'var api = "/api/getImg?id=42"; var page = "/detail/42.html";',
+    'document.write("<div class=\\"imgbox\\"></div>");',
+    'var u = "https://img.example.com/a/b/c.jpeg?x=1"; var v = "https://img.example.com/a/b/d.jpg";',
+    '/* comment with "quoted.png" */ var w = "IMAGE_BASE";',
+    '',
+]
+
+def legacy_matches(text, patterns):
+    """旧版实现：多条正则分别对全文执行 findall，返回原始匹配集合"""
+    matches = set()
+    for pattern in patterns:
+        matches.update(re.findall(pattern, text, re.IGNORECASE))
+    return matches
+
+def engine_matches(text, pattern):
+    """新版实现：合并正则单次扫描，返回原始匹配集合"""
+    matches = set()
+    for match in pattern.finditer(text):
+        group = 'url' if pattern is CSS_IMAGE_PATTERN else match.lastgroup
+        matches.add(match.group(group))
+    return matches
+
+def _corpus_texts(kind):
+    """基准语料页面中的 style/script 内容（语料生成到临时目录，不写入源码目录）"""
+    extractor = ImageExtractor()
+    texts = []
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = load_corpus(corpus_dir)
+    for html in corpus.values():
+        texts.extend(value for k, value in extractor._scan_candidates(html) if k == kind)
+    return texts
+
+def test_css_engine_matches_legacy():
+    """CSS合并正则与旧版三条正则的匹配集合一致"""
+    for text in CSS_CORPUS + _corpus_texts('style'):
+        assert engine_matches(text, CSS_IMAGE_PATTERN) == legacy_matches(text, LEGACY_CSS_PATTERNS), text
+
+def test_js_engine_matches_legacy():
+    """JS合并正则与旧版三条正则的匹配集合一致"""
+    for text in JS_CORPUS + _corpus_texts('script'):
+        assert engine_matches(text, JS_IMAGE_PATTERN) == legacy_matches(text, LEGACY_JS_PATTERNS), text
+
+def test_js_engine_is_superset_of_legacy():
+    """随机引号/关键词组合：合并正则不会漏掉旧版的任何匹配（允许多出）"""
+    rng = random.Random(0)
+    tokens = ['"', "'", 'img', 'image', 'x', '.jpg', '.png', '/', ' ', 'a']
+    for _ in range(20000):
+        text = ''.join(rng.choice(tokens) for _ in range(rng.randint(1, 10)))
+        assert legacy_matches(text, LEGACY_JS_PATTERNS) <= engine_matches(text, JS_IMAGE_PATTERN), text
+
+def test_js_engine_known_differences():
+    """结尾引号不消耗带来的差异：固定下来，行为变化时需要同时更新注释"""
+    # 同一个引号结束 imgimg 并开始 imgx'，旧版消耗了该引号所以没有 imgx
+    text = '/\'imgimg"imgx\'.jpg.png'
+    assert legacy_matches(text, LEGACY_JS_PATTERNS) == {'imgimg'}
+    assert engine_matches(text, JS_IMAGE_PATTERN) == {'imgimg', 'imgx'}
+    text = '"aimg.jpg\'.png"'
+    assert legacy_matches(text, LEGACY_JS_PATTERNS) == {'aimg.jpg'}
+    assert engine_matches(text, JS_IMAGE_PATTERN) == {'aimg.jpg', '.png'}
+    # 模板字符串中的图片地址：消耗结尾引号会漏掉 /tpl/inner.jpg，前瞻保留了它
+    text = 'var tpl = \'<img src="/tpl/inner.jpg">\';'
+    assert engine_matches(text, JS_IMAGE_PATTERN) == legacy_matches(text, LEGACY_JS_PATTERNS) \
+        == {'<img src=', '/tpl/inner.jpg'}
+
+def test_rule_names():
+    """命名分组标明匹配的规则"""
+    match = JS_IMAGE_PATTERN.search('x = "/a/b.jpg"')
+    assert match.lastgroup == 'ext'
+    match = JS_IMAGE_PATTERN.search('x = "/api/getImage?id=1"')
+    assert match.lastgroup == 'keyword'
+    match = CSS_IMAGE_PATTERN.search('.x { content: url(/a.png) }')
+    assert match.group('content') and match.group('url') == '/a.png'
+
+def test_extracted_url_sets():
+    """经过URL转换和校验后的最终结果一致"""
+    extractor = ImageExtractor()
+    for text in CSS_CORPUS:
+        expected = set(_legacy_urls(extractor, text, LEGACY_CSS_PATTERNS))
+        assert set(extractor._extract_css_images(text, BASE_URL)) == expected, text
+    for text in JS_CORPUS:
+        expected = set(_legacy_urls(extractor, text, LEGACY_JS_PATTERNS))
+        assert set(extractor._extract_js_images(text, BASE_URL)) == expected, text
+
+def _legacy_urls(extractor, text, patterns):
+    """旧版实现的最终URL列表"""
+    urls = []
+    for match in legacy_matches(text, patterns):
+        absolute_url = urljoin(BASE_URL, match)
+        if extractor._is_valid_image_url(absolute_url):
+            urls.append(absolute_url)
+    return urls
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    test_css_engine_matches_legacy()
+    test_js_engine_matches_legacy()
+    test_js_engine_is_superset_of_legacy()
+    test_js_engine_known_differences()
+    test_rule_names()
+    test_extracted_url_sets()
+    print("✅ 正则引擎回归测试通过")
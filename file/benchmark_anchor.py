@@ -0,0 +1,105 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 锚点策略基准测试 - 测量内容显著性锚点相对默认锚点增加的耗时，超出预算时返回非零退出码
+Version: 1.0
+'''
+import os
+import sys
+import time
+import logging
+import tempfile
+from typing import List, Dict
+
+from PIL import Image
+
+from image_cropper import ImageCropper
+from crop_anchor import get_anchor
+from benchmark_decode import generate_image
+
+# 测试图片：(名称, 宽, 高, 扩展名)
+BENCH_IMAGES = [
+    ('4K', 3840, 2160, '.jpg'),
+    ('8K', 7680, 4320, '.jpg'),
+    ('4K', 3840, 2160, '.png'),
+]
+# 显著性计算允许的耗时（相对默认锚点裁剪耗时的比例）
+OVERHEAD_BUDGET = 0.10
+
+def _crop_ms(anchor: str, image_path: str, output_path: str, repeat: int) -> float:
+    """多次裁剪取最短耗时；每次新建裁剪器，不命中显著性缓存"""
+    runs = []
+    for _ in range(repeat):
+        cropper = ImageCropper(fit=True, anchor=anchor)
+        start = time.perf_counter()
+        cropper.crop_image(image_path, output_path)
+        runs.append(time.perf_counter() - start)
+    return min(runs) * 1000
+
+def _locate_ms(anchor: str, image_path: str, repeat: int) -> float:
+    """单独测量显著性计算耗时：与裁剪路径一样使用已缩小解码的图片，每次使用新策略实例（不命中缓存）"""
+    cropper = ImageCropper(fit=True)
+    runs = []
+    for _ in range(repeat):
+        with Image.open(image_path) as img:
+            width, height = img.size
+            scale = cropper._fit_scale(width, height)
+            if img.format == 'JPEG':
+                img.draft(img.mode, (round(width * scale), round(height * scale)))
+            img.load()
+            cropper.anchor = get_anchor(anchor)
+            start = time.perf_counter()
+            cropper.locate_focus(image_path, width, height, img)
+            runs.append(time.perf_counter() - start)
+    return min(runs) * 1000
+
+def run_benchmark(anchors: tuple = ('entropy', 'edges'), repeat: int = 5) -> List[Dict]:
+    """
+    对比默认锚点与显著性锚点的单张裁剪耗时，并单独测量显著性计算耗时
+
+    Args:
+        anchors (tuple): 要测量的锚点策略
+        repeat (int): 每种情况重复次数
+
+    Returns:
+        List[Dict]: 每张图片、每种策略的结果字典
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, width, height, ext in BENCH_IMAGES:
+            image_path = os.path.join(tmp_dir, f"{label}{ext}")
+            generate_image(os.path.join(tmp_dir, 'source.jpg'), width, height)
+            with Image.open(os.path.join(tmp_dir, 'source.jpg')) as img:
+                img.save(image_path)
+            output_path = os.path.join(tmp_dir, 'output.jpg')
+
+            base_ms = _crop_ms('top', image_path, output_path, repeat)
+            for anchor in anchors:
+                locate_ms = _locate_ms(anchor, image_path, repeat)
+                results.append({
+                    'image': f"{label} {ext[1:].upper()}",
+                    'anchor': anchor,
+                    'base_ms': base_ms,
+                    'anchor_ms': _crop_ms(anchor, image_path, output_path, repeat),
+                    'locate_ms': locate_ms,
+                    'overhead': locate_ms / base_ms,
+                })
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('image_cropper').setLevel(logging.WARNING)
+
+    print(f"=== 锚点策略基准测试（fit=True，裁剪为1080x1920，预算 {OVERHEAD_BUDGET:.0%}）===")
+    print(f"{'图片':<10}{'策略':<10}{'默认裁剪ms':>12}{'显著性裁剪ms':>14}{'显著性计算ms':>14}{'占比':>8}")
+    over_budget = False
+    for r in run_benchmark():
+        print(f"{r['image']:<10}{r['anchor']:<10}{r['base_ms']:>12.1f}{r['anchor_ms']:>14.1f}"
+              f"{r['locate_ms']:>14.1f}{r['overhead']:>8.1%}")
+        over_budget = over_budget or r['overhead'] > OVERHEAD_BUDGET
+    if over_budget:
+        print("超出耗时预算！")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
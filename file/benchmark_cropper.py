@@ -0,0 +1,98 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 批量裁剪基准测试 - 在生成的图片集上对比 1 个与 N 个进程的吞吐量
+Version: 1.0
+'''
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+from typing import List, Dict
+
+from PIL import Image
+
+from image_cropper import ImageCropper
+
+def generate_images(directory: str, count: int = 24, width: int = 2880, height: int = 1920) -> List[str]:
+    """
+    生成测试图片（渐变 + 噪点，接近真实照片的压缩率）
+
+    Args:
+        directory (str): 输出目录
+        count (int): 图片数量
+        width (int): 图片宽度
+        height (int): 图片高度
+
+    Returns:
+        List[str]: 图片文件路径列表
+    """
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    gradient = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    base = Image.merge('RGB', (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT)))
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"bench_{i:03d}.jpg")
+        if not os.path.exists(path):
+            base.rotate(i * 7, fillcolor=(i * 10 % 255, 80, 160)).save(path, quality=90)
+        paths.append(path)
+    return paths
+
+def run_benchmark(max_workers: int = None, count: int = 24) -> List[Dict]:
+    """
+    测量不同进程数下的批量裁剪吞吐量
+
+    Args:
+        max_workers (int): 最大进程数，默认等于CPU核数
+        count (int): 测试图片数量
+
+    Returns:
+        List[Dict]: 每个进程数的结果字典
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, max_workers})
+    cropper = ImageCropper(target_width=1080, target_height=1920)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        generate_images(source, count)
+
+        for workers in worker_counts:
+            output = os.path.join(tmp_dir, f"output_{workers}")
+            start = time.perf_counter()
+            stats = cropper.batch_crop_images(source, output, workers=workers)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'workers': workers,
+                'images': stats['success'],
+                'seconds': elapsed,
+                'images_per_sec': stats['success'] / elapsed,
+            })
+            shutil.rmtree(output)
+
+    base = results[0]['images_per_sec']
+    for r in results:
+        r['scaling'] = r['images_per_sec'] / base
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('image_cropper').setLevel(logging.WARNING)
+
+    print("=== 批量裁剪基准测试 ===")
+    # 可通过命令行参数指定进程数: python benchmark_cropper.py 8
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(f"CPU核数: {os.cpu_count()}")
+    print(f"{'进程数':>6}{'图片数':>8}{'耗时s':>10}{'张/秒':>10}{'加速比':>8}")
+    for r in run_benchmark(max_workers):
+        print(f"{r['workers']:>6}{r['images']:>8}{r['seconds']:>10.2f}{r['images_per_sec']:>10.2f}{r['scaling']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
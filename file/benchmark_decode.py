@@ -0,0 +1,108 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 缩小解码基准测试 - 对比完整解码与JPEG缩小解码路径在4K及以上图片上的耗时和峰值内存
+Version: 1.0
+'''
+import os
+import time
+import resource
+import logging
+import tempfile
+import multiprocessing
+from typing import List, Dict
+
+from PIL import Image
+
+from image_cropper import ImageCropper
+
+# 测试图片尺寸
+IMAGE_SIZES = {
+    '4K': (3840, 2160),
+    '6K': (6000, 4000),
+    '8K': (7680, 4320),
+}
+
+def generate_image(path: str, width: int, height: int) -> None:
+    """生成渐变 + 噪点的JPEG测试图片"""
+    gradient = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    Image.merge('RGB', (gradient, noise, gradient.transpose(Image.FLIP_LEFT_RIGHT))).save(path, quality=90)
+
+def _legacy_crop(cropper: ImageCropper, image_path: str, output_path: str) -> None:
+    """原实现：完整解码、整图转换和缩放后再裁剪"""
+    with Image.open(image_path) as img:
+        if img.mode != 'RGB':
+            img = img.convert('RGB')
+        scale = cropper._fit_scale(*img.size)
+        size = (max(cropper.target_width, round(img.size[0] * scale)),
+                max(cropper.target_height, round(img.size[1] * scale)))
+        img = img.resize(size, Image.LANCZOS)
+        img.crop(cropper.calculate_crop_box(*size)).save(output_path, quality=95, optimize=True)
+
+def _measure(mode: str, image_path: str, output_path: str) -> Dict:
+    """
+    在独立进程中运行一次裁剪，返回耗时和峰值内存增量
+
+    Args:
+        mode (str): legacy 或 fast
+        image_path (str): 输入图片路径
+        output_path (str): 输出图片路径
+
+    Returns:
+        Dict: seconds / peak_mb
+    """
+    logging.getLogger('image_cropper').setLevel(logging.WARNING)
+    cropper = ImageCropper(fit=True)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'legacy':
+        _legacy_crop(cropper, image_path, output_path)
+    else:
+        cropper.crop_image(image_path, output_path)
+    seconds = time.perf_counter() - start
+    # Linux下 ru_maxrss 单位为KB
+    peak_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+    return {'seconds': seconds, 'peak_mb': peak_mb}
+
+def run_benchmark(repeat: int = 3) -> List[Dict]:
+    """
+    在不同尺寸的图片上对比两种路径
+
+    Args:
+        repeat (int): 每种情况重复次数（取最短耗时和最小内存）
+
+    Returns:
+        List[Dict]: 每个尺寸的结果字典
+    """
+    # 每次测量使用全新进程，峰值内存互不影响
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, (width, height) in IMAGE_SIZES.items():
+            image_path = os.path.join(tmp_dir, f"{label}.jpg")
+            # 子进程的 ru_maxrss 初始值继承自父进程，因此图片也在子进程中生成，保持父进程内存较小
+            with context.Pool(1) as pool:
+                pool.apply(generate_image, (image_path, width, height))
+            result = {'size': label, 'width': width, 'height': height}
+            for mode in ('legacy', 'fast'):
+                runs = []
+                for i in range(repeat):
+                    with context.Pool(1) as pool:
+                        runs.append(pool.apply(_measure, (mode, image_path, os.path.join(tmp_dir, f"{mode}_{i}.jpg"))))
+                result[f"{mode}_ms"] = min(r['seconds'] for r in runs) * 1000
+                result[f"{mode}_mb"] = min(r['peak_mb'] for r in runs)
+            result['speedup'] = result['legacy_ms'] / result['fast_ms']
+            results.append(result)
+    return results
+
+def main():
+    """主函数"""
+    print("=== 缩小解码基准测试（fit=True，裁剪为1080x1920）===")
+    print(f"{'尺寸':<6}{'原图':>12}{'旧版ms':>10}{'新版ms':>10}{'加速比':>8}{'旧版MB':>10}{'新版MB':>10}")
+    for r in run_benchmark():
+        print(f"{r['size']:<6}{r['width']:>6}x{r['height']:<5}{r['legacy_ms']:>10.1f}{r['fast_ms']:>10.1f}"
+              f"{r['speedup']:>8.1f}{r['legacy_mb']:>10.1f}{r['fast_mb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 多尺寸裁剪基准测试 - 对比每个规格单独运行 ImageCropper 与一次解码输出全部规格的流水线
+Version: 1.0
+'''
+import os
+import time
+import logging
+import tempfile
+from typing import List, Dict
+
+from image_cropper import ImageCropper
+from renditions import RenditionPipeline, DEFAULT_RENDITIONS
+from benchmark_cropper import generate_images
+
+def run_benchmark(count: int = 8, width: int = 3840, height: int = 2160) -> List[Dict]:
+    """
+    分别测量 1~N 个规格时两种方式的耗时
+
+    Args:
+        count (int): 测试图片数量
+        width (int): 测试图片宽度
+        height (int): 测试图片高度
+
+    Returns:
+        List[Dict]: 每个规格数的结果字典
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        generate_images(source, count, width, height)
+
+        for n in range(1, len(DEFAULT_RENDITIONS) + 1):
+            renditions = DEFAULT_RENDITIONS[:n]
+
+            # 每个规格单独运行一次 ImageCropper（每次都重新解码）
+            start = time.perf_counter()
+            for r in renditions:
+                cropper = ImageCropper(target_width=r['width'], target_height=r['height'], fit=True)
+                for path in cropper.get_image_files(source):
+                    cropper.crop_image(path, os.path.join(tmp_dir, 'separate', r['name'], os.path.basename(path)))
+            separate = time.perf_counter() - start
+
+            start = time.perf_counter()
+            RenditionPipeline(renditions).batch_render(source, os.path.join(tmp_dir, 'pipeline'))
+            pipeline = time.perf_counter() - start
+
+            results.append({
+                'renditions': n,
+                'separate_ms': separate / count * 1000,
+                'pipeline_ms': pipeline / count * 1000,
+                'speedup': separate / pipeline,
+            })
+    return results
+
+def main():
+    """主函数"""
+    for name in ('image_cropper', 'renditions'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    print("=== 多尺寸裁剪基准测试（3840x2160 JPEG）===")
+    print(f"{'规格数':>6}{'单独运行ms/张':>16}{'流水线ms/张':>14}{'加速比':>8}")
+    for r in run_benchmark():
+        print(f"{r['renditions']:>6}{r['separate_ms']:>16.1f}{r['pipeline_ms']:>14.1f}{r['speedup']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 裁剪锚点策略 - 决定裁剪框在图片中的位置（顶部/居中/内容显著性/旁路文件指定焦点）
+Version: 1.0
+'''
+import os
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 焦点：裁剪框中心在图片中的相对位置 (x, y)，取值 0~1
+Focus = Tuple[float, float]
+
+# 计算显著性时使用的灰度缩略图长边像素数
+SALIENCY_SIZE = 128
+# 显著性高出默认位置该比例时才移动裁剪框（内容平坦的图片保持默认位置）
+SALIENCY_MARGIN = 0.05
+# 焦点旁路文件：photo.jpg -> photo.focus.json，内容如 {"x": 0.3, "y": 0.6}
+FOCUS_SUFFIX = '.focus.json'
+
+def place_crop_box(image_width: int, image_height: int, crop_width: int, crop_height: int,
+                   focus: Focus) -> Tuple[int, int, int, int]:
+    """
+    以焦点为中心放置裁剪框，超出图片边界时贴边
+
+    Args:
+        image_width (int): 图片宽度
+        image_height (int): 图片高度
+        crop_width (int): 裁剪宽度
+        crop_height (int): 裁剪高度
+        focus (Focus): 焦点相对位置
+
+    Returns:
+        Tuple[int, int, int, int]: 裁剪框 (left, top, right, bottom)
+    """
+    left = int(image_width * focus[0]) - crop_width // 2
+    top = int(image_height * focus[1]) - crop_height // 2
+    left = max(0, min(left, image_width - crop_width))
+    top = max(0, min(top, image_height - crop_height))
+    return (left, top, left + crop_width, top + crop_height)
+
+def load_gray_thumbnail(image_path: str, img: Optional[Image.Image] = None,
+                        size: int = SALIENCY_SIZE) -> np.ndarray:
+    """
+    生成长边为 size 的灰度缩略图
+
+    Args:
+        image_path (str): 图片路径（未传入 img 时重新打开，JPEG只解码亮度通道并在DCT域缩小）
+        img (Optional[Image.Image]): 已打开的图片，传入时直接使用以避免重复解码
+        size (int): 缩略图长边像素数
+
+    Returns:
+        np.ndarray: float32 灰度数组
+    """
+    if img is None:
+        with Image.open(image_path) as source:
+            source.draft('L', (size, size))
+            return _gray_thumbnail(source, size)
+    return _gray_thumbnail(img, size)
+
+def _gray_thumbnail(img: Image.Image, size: int) -> np.ndarray:
+    if img.mode not in ('L', 'LA', 'RGB', 'RGBA'):
+        img = img.convert('RGB')
+    # 先整数倍缩小再转灰度，避免对整幅大图做颜色转换
+    factor = max(1, max(img.size) // (size * 2))
+    small = img.reduce(factor) if factor > 1 else img
+    small = small.convert('L')
+    small.thumbnail((size, size), Image.BILINEAR)
+    return np.asarray(small, dtype=np.float32)
+
+def edge_energy(gray: np.ndarray) -> np.ndarray:
+    """
+    边缘能量：水平和垂直方向相邻像素差的绝对值之和
+
+    Args:
+        gray (np.ndarray): 灰度数组
+
+    Returns:
+        np.ndarray: 与输入同尺寸的显著性图
+    """
+    energy = np.zeros_like(gray)
+    energy[:, :-1] += np.abs(np.diff(gray, axis=1))
+    energy[:-1, :] += np.abs(np.diff(gray, axis=0))
+    return energy
+
+def local_entropy(gray: np.ndarray, block: int = 8, bins: int = 16) -> np.ndarray:
+    """
+    局部熵：按 block x block 分块统计灰度直方图的信息熵
+
+    Args:
+        gray (np.ndarray): 灰度数组
+        block (int): 分块边长
+        bins (int): 直方图级数
+
+    Returns:
+        np.ndarray: 与输入同尺寸的显著性图（块内各像素取该块的熵）
+    """
+    height, width = gray.shape
+    rows, cols = height // block, width // block
+    if rows == 0 or cols == 0:
+        return np.zeros_like(gray)
+
+    levels = (gray[:rows * block, :cols * block] * (bins / 256.0)).astype(np.intp)
+    blocks = levels.reshape(rows, block, cols, block).transpose(0, 2, 1, 3).reshape(-1, block * block)
+    # 每个块的直方图用一次 bincount 完成
+    offsets = np.arange(blocks.shape[0])[:, None] * bins
+    counts = np.bincount((blocks + offsets).ravel(), minlength=blocks.shape[0] * bins)
+    p = counts.reshape(-1, bins) / float(block * block)
+    entropy = -(p * np.log2(np.where(p > 0, p, 1.0))).sum(axis=1).reshape(rows, cols)
+
+    saliency = np.repeat(np.repeat(entropy, block, axis=0), block, axis=1).astype(np.float32)
+    return np.pad(saliency, ((0, height - rows * block), (0, width - cols * block)), mode='edge')
+
+def best_focus(saliency: np.ndarray, crop_fraction: Tuple[float, float], default: Focus,
+               margin: float = SALIENCY_MARGIN) -> Focus:
+    """
+    在显著性图上滑动裁剪框，返回显著性之和最大的位置（积分图，一次求出所有位置）
+
+    Args:
+        saliency (np.ndarray): 显著性图
+        crop_fraction (Tuple[float, float]): 裁剪框占图片宽高的比例
+        default (Focus): 默认焦点，最优位置没有明显更好时返回
+        margin (float): 最优位置需比默认位置高出的比例
+
+    Returns:
+        Focus: 焦点相对位置
+    """
+    height, width = saliency.shape
+    crop_width = min(width, max(1, round(width * crop_fraction[0])))
+    crop_height = min(height, max(1, round(height * crop_fraction[1])))
+
+    integral = np.zeros((height + 1, width + 1), dtype=np.float64)
+    integral[1:, 1:] = saliency.cumsum(axis=0).cumsum(axis=1)
+    rows, cols = height - crop_height + 1, width - crop_width + 1
+    sums = (integral[crop_height:, crop_width:] - integral[:rows, crop_width:]
+            - integral[crop_height:, :cols] + integral[:rows, :cols])
+
+    left, top, _, _ = place_crop_box(width, height, crop_width, crop_height, default)
+    y, x = np.unravel_index(np.argmax(sums), sums.shape)
+    if sums[y, x] <= sums[top, left] * (1 + margin):
+        return default
+    return (float(x + crop_width / 2) / width, float(y + crop_height / 2) / height)
+
+def read_focus_sidecar(image_path: str) -> Optional[Focus]:
+    """
+    读取图片旁的焦点文件（photo.jpg -> photo.focus.json）
+
+    Args:
+        image_path (str): 图片路径
+
+    Returns:
+        Optional[Focus]: 焦点相对位置，文件不存在或格式错误时返回None
+    """
+    sidecar = os.path.splitext(image_path)[0] + FOCUS_SUFFIX
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return (min(1.0, max(0.0, float(data['x']))), min(1.0, max(0.0, float(data['y']))))
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"焦点文件格式错误 {sidecar}: {e}")
+        return None
+
+class CropAnchor:
+    """锚点策略基类：返回裁剪框中心的相对位置，子类重写 locate 实现自定义策略"""
+
+    name = 'top'
+    # 默认焦点：水平居中、顶部对齐
+    focus: Focus = (0.5, 0.0)
+
+    def locate(self, image_path: str, crop_fraction: Tuple[float, float],
+               img: Optional[Image.Image] = None) -> Focus:
+        """
+        计算焦点
+
+        Args:
+            image_path (str): 图片路径
+            crop_fraction (Tuple[float, float]): 裁剪框占图片宽高的比例
+            img (Optional[Image.Image]): 已打开的图片（可直接解码使用时才传入）
+
+        Returns:
+            Focus: 焦点相对位置
+        """
+        return self.focus
+
+class TopAnchor(CropAnchor):
+    """水平居中、从顶部开始裁剪"""
+
+    name = 'top'
+    focus = (0.5, 0.0)
+
+class CenterAnchor(CropAnchor):
+    """水平、垂直均居中"""
+
+    name = 'center'
+    focus = (0.5, 0.5)
+
+class SaliencyAnchor(CropAnchor, ABC):
+    """内容显著性策略基类：在灰度缩略图上计算显著性，选择显著性之和最大的裁剪位置（子类必须实现 saliency）"""
+
+    def __init__(self, cache_size: int = 32):
+        """
+        Args:
+            cache_size (int): 缓存的显著性图数量（同一图片的多个规格复用）
+        """
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    @abstractmethod
+    def saliency(self, gray: np.ndarray) -> np.ndarray:
+        """
+        计算显著性图
+
+        Args:
+            gray (np.ndarray): 灰度缩略图（float32）
+
+        Returns:
+            np.ndarray: 与输入同尺寸的显著性图，值越大越应保留在裁剪框内
+        """
+
+    def locate(self, image_path: str, crop_fraction: Tuple[float, float],
+               img: Optional[Image.Image] = None) -> Focus:
+        try:
+            return best_focus(self._saliency_map(image_path, img), crop_fraction, self.focus)
+        except Exception as e:
+            logger.warning(f"计算显著性失败，使用默认位置 {image_path}: {e}")
+            return self.focus
+
+    def _saliency_map(self, image_path: str, img: Optional[Image.Image]) -> np.ndarray:
+        stat = os.stat(image_path)
+        key = (image_path, stat.st_mtime_ns, stat.st_size)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        saliency = self.saliency(load_gray_thumbnail(image_path, img))
+        self._cache[key] = saliency
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return saliency
+
+class EntropyAnchor(SaliencyAnchor):
+    """局部熵：纹理和细节丰富的区域优先"""
+
+    name = 'entropy'
+
+    def saliency(self, gray: np.ndarray) -> np.ndarray:
+        return local_entropy(gray)
+
+class EdgeAnchor(SaliencyAnchor):
+    """边缘能量：轮廓清晰的主体优先"""
+
+    name = 'edges'
+
+    def saliency(self, gray: np.ndarray) -> np.ndarray:
+        return edge_energy(gray)
+
+class FocalPointAnchor(CropAnchor):
+    """使用旁路文件中指定的焦点，没有焦点文件时使用备用策略"""
+
+    name = 'focal'
+
+    def __init__(self, fallback: Union[str, CropAnchor] = 'top'):
+        """
+        Args:
+            fallback (Union[str, CropAnchor]): 没有焦点文件时使用的策略
+        """
+        self.fallback = get_anchor(fallback)
+
+    def locate(self, image_path: str, crop_fraction: Tuple[float, float],
+               img: Optional[Image.Image] = None) -> Focus:
+        focus = read_focus_sidecar(image_path)
+        if focus is None:
+            return self.fallback.locate(image_path, crop_fraction, img)
+        return focus
+
+# 策略名称 -> 策略类（可注册自定义策略）
+ANCHOR_STRATEGIES = {
+    'top': TopAnchor,
+    'center': CenterAnchor,
+    'entropy': EntropyAnchor,
+    'edges': EdgeAnchor,
+    'focal': FocalPointAnchor,
+}
+
+def get_anchor(anchor: Union[str, CropAnchor]) -> CropAnchor:
+    """
+    获取锚点策略实例
+
+    Args:
+        anchor (Union[str, CropAnchor]): 策略名称或策略实例
+
+    Returns:
+        CropAnchor: 策略实例
+    """
+    if isinstance(anchor, CropAnchor):
+        return anchor
+    if anchor not in ANCHOR_STRATEGIES:
+        raise ValueError(f"不支持的锚点策略: {anchor}，可选: {', '.join(ANCHOR_STRATEGIES)}")
+    return ANCHOR_STRATEGIES[anchor]()
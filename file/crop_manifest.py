@@ -0,0 +1,178 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 裁剪清单 - 以JSON Lines记录每张图片的裁剪结果，用于增量裁剪和中断后续跑
+Version: 1.0
+'''
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 清单文件名（保存在输出目录中）
+MANIFEST_FILE = 'crop_manifest.jsonl'
+
+def file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    计算文件内容哈希
+
+    Args:
+        file_path (str): 文件路径
+        chunk_size (int): 每次读取的字节数
+
+    Returns:
+        str: blake2b 哈希（十六进制）
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def source_state(file_path: str) -> dict:
+    """
+    读取源文件当前的大小、修改时间和内容哈希（裁剪进程中在裁剪前调用，与裁剪一起并行）
+
+    Args:
+        file_path (str): 文件路径
+
+    Returns:
+        dict: {'size': 字节数, 'mtime_ns': 修改时间, 'hash': 内容哈希}
+    """
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash(file_path)}
+
+class CropManifest:
+    """裁剪清单：每完成一张图片追加一行并立即刷新，进程被杀后已完成的图片不会重复处理"""
+
+    def __init__(self, manifest_path: str):
+        """
+        打开（或创建）清单文件
+
+        Args:
+            manifest_path (str): 清单文件路径
+        """
+        self.manifest_path = manifest_path
+        # 源文件路径 -> 最新记录（后写入的行覆盖先写入的）
+        self.entries: Dict[str, dict] = {}
+        self._lines = 0
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 进程被杀时最后一行可能不完整
+                        continue
+                    if not isinstance(entry, dict) or not isinstance(entry.get('source'), str):
+                        logger.warning(f"忽略无效的清单记录: {line.strip()[:100]}")
+                        continue
+                    self.entries[entry['source']] = entry
+                    self._lines += 1
+            logger.info(f"加载裁剪清单: {len(self.entries)} 条记录")
+
+        self._file = open(manifest_path, 'a', encoding='utf-8')
+
+    def is_current(self, source: str, target: list, options: dict) -> bool:
+        """
+        检查源文件是否已按相同参数裁剪且未发生变化
+
+        先比较文件大小和修改时间；修改时间变化但大小相同时再比较内容哈希，
+        内容未变则刷新记录中的修改时间。
+
+        Args:
+            source (str): 源文件路径
+            target (list): 目标尺寸 [宽, 高]
+            options (dict): 影响输出的裁剪参数
+
+        Returns:
+            bool: 是否无需重新处理
+        """
+        entry = self.entries.get(source)
+        if not entry or entry.get('target') != target or entry.get('options') != options:
+            return False
+        output = entry.get('output')
+        if not isinstance(output, str) or not os.path.exists(output):
+            return False
+
+        # 源文件无法访问或记录缺少字段时视为需要重新处理（由裁剪步骤报告错误）
+        try:
+            stat = os.stat(source)
+            if entry.get('size') != stat.st_size:
+                return False
+            if entry.get('mtime_ns') == stat.st_mtime_ns:
+                return True
+            if file_hash(source) != entry.get('hash'):
+                return False
+        except OSError as e:
+            logger.debug(f"读取源文件失败 {source}: {e}")
+            return False
+        self.record(dict(entry, mtime_ns=stat.st_mtime_ns))
+        return True
+
+    def record(self, entry: dict) -> None:
+        """
+        追加一条记录并立即写入磁盘
+
+        Args:
+            entry (dict): 记录（source/size/mtime_ns/hash/crop_box/scale/mode/target/options/output）
+        """
+        self.entries[entry['source']] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+        self._lines += 1
+
+    def close(self) -> None:
+        """关闭清单；重复记录较多时重写为每个源文件一行"""
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._lines > len(self.entries):
+            temp_path = self.manifest_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            os.replace(temp_path, self.manifest_path)
+            self._lines = len(self.entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def build_entry(source: str, output: str, crop_box: tuple, scale: float, mode: str,
+                target: list, options: dict, state: Optional[dict] = None) -> dict:
+    """
+    生成一条清单记录
+
+    Args:
+        source (str): 源文件路径
+        output (str): 输出文件路径
+        crop_box (tuple): 裁剪框
+        scale (float): 缩放比例
+        mode (str): 实际使用的裁剪方式 lossless/reencode
+        target (list): 目标尺寸 [宽, 高]
+        options (dict): 裁剪参数
+        state (Optional[dict]): 裁剪前读取的 source_state，默认现场读取
+
+    Returns:
+        dict: 清单记录
+    """
+    state = state or source_state(source)
+    return {
+        'source': source,
+        'size': state['size'],
+        'mtime_ns': state['mtime_ns'],
+        'hash': state['hash'],
+        'crop_box': list(crop_box),
+        'scale': scale,
+        'mode': mode,
+        'target': target,
+        'options': options,
+        'output': output,
+    }
@@ -8,8 +8,14 @@ import os
 import glob
 from PIL import Image
 import logging
-from typing import List, Tuple
+from typing import List, Tuple, Optional, Dict, Union
+import json
 import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from crop_manifest import CropManifest, MANIFEST_FILE, build_entry, source_state
+from crop_anchor import CropAnchor, Focus, get_anchor, place_crop_box
 
 source_dir = 'E:/图片/自然风光-高度1920'
 output_dir = 'E:/图片/自然风光-1080x1920'
@@ -18,19 +24,74 @@ output_dir = 'E:/图片/自然风光-1080x1920'
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 尺寸预扫描缓存文件（保存在输出目录中）
+DIMENSION_CACHE_FILE = '.dimension_cache.json'
+
+def read_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """
+    只读取文件头获取图片尺寸（不解码像素）
+    
+    Args:
+        image_path (str): 图片路径
+        
+    Returns:
+        Optional[Tuple[int, int]]: (宽, 高)，文件损坏或无法识别时返回None
+    """
+    try:
+        with Image.open(image_path) as img:
+            return img.size
+    except Exception as e:
+        logger.debug(f"读取图片尺寸失败 {image_path}: {e}")
+        return None
+
+def _valid_size_entry(entry) -> bool:
+    """尺寸缓存记录格式是否正确：{'key': [修改时间, 文件大小], 'size': [宽, 高] 或 None}"""
+    def int_pair(value):
+        return (isinstance(value, list) and len(value) == 2
+                and all(isinstance(v, int) and not isinstance(v, bool) for v in value))
+    return (isinstance(entry, dict) and int_pair(entry.get('key')) and 'size' in entry
+            and (entry['size'] is None or int_pair(entry['size'])))
+
+# 裁剪进程中使用的裁剪器（每个进程初始化一次）
+_worker_cropper = None
+
+def _init_crop_worker(cropper: 'ImageCropper') -> None:
+    """裁剪进程初始化：保存进程内复用的裁剪器"""
+    global _worker_cropper
+    _worker_cropper = cropper
+
+def _crop_worker(image_path: str, output_path: str) -> Optional[Tuple[Tuple[int, int, int, int], str, dict]]:
+    """在裁剪进程中裁剪单张图片并计算源文件哈希，任何异常都视为失败"""
+    try:
+        return _worker_cropper._crop_with_state(image_path, output_path)
+    except Exception as e:
+        logger.error(f"处理图片失败 {image_path}: {e}")
+        return None
+
 class ImageCropper:
     """图片裁剪器"""
     
-    def __init__(self, target_width: int = 1080, target_height: int = 1920):
+    def __init__(self, target_width: int = 1080, target_height: int = 1920, fit: bool = False,
+                 lossless: bool = False, anchor: Union[str, CropAnchor] = 'top'):
         """
         初始化图片裁剪器
         
         Args:
             target_width (int): 目标宽度
             target_height (int): 目标高度
+            fit (bool): 是否先将大图等比缩小到刚好覆盖目标尺寸再裁剪（默认直接裁剪原图）
+            lossless (bool): JPEG是否使用jpegtran在DCT块级别无损裁剪（不解码、不重新编码）
+            anchor (Union[str, CropAnchor]): 裁剪框位置策略 top/center/entropy/edges/focal，或自定义策略实例
         """
         self.target_width = target_width
         self.target_height = target_height
+        self.fit = fit
+        self.lossless = lossless
+        self.anchor = get_anchor(anchor)
+        # 未安装jpegtran时无损模式自动回退为普通裁剪
+        self.jpegtran = shutil.which('jpegtran') if lossless else None
+        if lossless and not self.jpegtran:
+            logger.warning("未找到jpegtran，无损裁剪不可用，将使用普通裁剪")
         
         # 支持的图片格式
         self.image_extensions = {
@@ -93,40 +154,25 @@ class ImageCropper:
         # 检查是否为支持的图片格式
         return ext in self.image_extensions
     
-    def calculate_crop_box(self, image_width: int, image_height: int) -> Tuple[int, int, int, int]:
+    def calculate_crop_box(self, image_width: int, image_height: int,
+                           focus: Optional[Focus] = None) -> Tuple[int, int, int, int]:
         """
         计算裁剪框的位置
         
         Args:
             image_width (int): 原图宽度
             image_height (int): 原图高度
+            focus (Optional[Focus]): 裁剪框中心的相对位置，默认水平居中、顶部对齐
             
         Returns:
             Tuple[int, int, int, int]: 裁剪框坐标 (left, top, right, bottom)
         """
-        # 计算水平方向的中心位置
-        center_x = image_width // 2
-        
-        # 计算裁剪框的左右边界
-        left = center_x - (self.target_width // 2)
-        right = center_x + (self.target_width // 2)
-        
-        # 如果裁剪框超出图片边界，进行调整
-        if left < 0:
-            left = 0
-            right = self.target_width
-        elif right > image_width:
-            right = image_width
-            left = image_width - self.target_width
-        
-        # 垂直方向从顶部开始裁剪
-        top = 0
-        bottom = self.target_height
+        # 以焦点为中心放置裁剪框，超出图片边界时贴边（与多尺寸裁剪使用同一规则）
+        left, top, right, bottom = place_crop_box(image_width, image_height, self.target_width,
+                                                  self.target_height, focus or CropAnchor.focus)
         
         # 如果图片高度不够，调整裁剪高度
-        if bottom > image_height:
-            bottom = image_height
-            top = max(0, image_height - self.target_height)
+        bottom = min(bottom, image_height)
         
         return (left, top, right, bottom)
     
@@ -141,13 +187,23 @@ class ImageCropper:
         Returns:
             bool: 是否成功
         """
+        return self._crop_image(image_path, output_path) is not None
+    
+    def _crop_image(self, image_path: str, output_path: str) -> Optional[Tuple[Tuple[int, int, int, int], str]]:
+        """
+        裁剪单张图片，返回实际使用的裁剪框和裁剪方式（供裁剪清单记录）
+        
+        Args:
+            image_path (str): 输入图片路径
+            output_path (str): 输出图片路径
+            
+        Returns:
+            Optional[Tuple[Tuple[int, int, int, int], str]]: (裁剪框, 裁剪方式 lossless/reencode)，
+                fit模式下裁剪框为缩小后的坐标；失败时返回None
+        """
         try:
-            # 打开图片
+            # 打开图片（此时只读取了文件头，像素数据在裁剪时才解码）
             with Image.open(image_path) as img:
-                # 转换为RGB模式（处理RGBA等其他模式）
-                if img.mode != 'RGB':
-                    img = img.convert('RGB')
-                
                 # 获取图片尺寸
                 width, height = img.size
                 logger.debug(f"原图尺寸: {width}x{height}")
@@ -156,18 +212,34 @@ class ImageCropper:
                 if height < self.target_height:
                     logger.warning(f"图片高度不足: {image_path} (高度: {height}, 需要: {self.target_height})")
                     # 可以选择跳过或调整目标高度
-                    return False
+                    return None
                 
                 if width < self.target_width:
                     logger.warning(f"图片宽度不足: {image_path} (宽度: {width}, 需要: {self.target_width})")
-                    return False
+                    return None
                 
-                # 计算裁剪框
-                crop_box = self.calculate_crop_box(width, height)
-                logger.debug(f"裁剪框: {crop_box}")
+                scale = self._fit_scale(width, height)
+                if scale >= 1:
+                    crop_box = self._crop_lossless(img, image_path, output_path)
+                    if crop_box:
+                        logger.info(f"成功无损裁剪: {os.path.basename(image_path)} -> {os.path.basename(output_path)}")
+                        return crop_box, 'lossless'
                 
-                # 裁剪图片
-                cropped_img = img.crop(crop_box)
+                if scale < 1:
+                    # 缩小后裁剪：JPEG在解码阶段直接缩小
+                    cropped_img, crop_box = self._crop_downscaled(img, scale, image_path)
+                else:
+                    # 计算裁剪框（内容显著性锚点与裁剪共用同一次解码）
+                    focus = self.locate_focus(image_path, width, height, img)
+                    crop_box = self.calculate_crop_box(width, height, focus)
+                    logger.debug(f"裁剪框: {crop_box}")
+                    
+                    # 裁剪图片
+                    cropped_img = img.crop(crop_box)
+                
+                # 转换为RGB模式（处理RGBA等其他模式），只转换裁剪后的区域
+                if cropped_img.mode != 'RGB':
+                    cropped_img = cropped_img.convert('RGB')
                 
                 # 确保输出目录存在
                 output_dir = os.path.dirname(output_path)
@@ -178,19 +250,183 @@ class ImageCropper:
                 cropped_img.save(output_path, quality=95, optimize=True)
                 logger.info(f"成功裁剪: {os.path.basename(image_path)} -> {os.path.basename(output_path)}")
                 
-                return True
+                return crop_box, 'reencode'
                 
         except Exception as e:
             logger.error(f"裁剪图片失败 {image_path}: {e}")
-            return False
+            return None
+    
+    def _crop_with_state(self, image_path: str,
+                         output_path: str) -> Optional[Tuple[Tuple[int, int, int, int], str, dict]]:
+        """
+        裁剪单张图片，并在裁剪前读取源文件的大小、修改时间和内容哈希（并行模式下在裁剪进程中计算）
+        
+        Args:
+            image_path (str): 输入图片路径
+            output_path (str): 输出图片路径
+            
+        Returns:
+            Optional[Tuple[Tuple[int, int, int, int], str, dict]]: (裁剪框, 裁剪方式, 源文件状态)，失败时返回None
+        """
+        try:
+            state = source_state(image_path)
+        except OSError as e:
+            logger.error(f"读取图片失败 {image_path}: {e}")
+            return None
+        result = self._crop_image(image_path, output_path)
+        if result is None:
+            return None
+        return result + (state,)
+    
+    def calculate_lossless_crop_box(self, img: Image.Image,
+                                    focus: Optional[Focus] = None) -> Optional[Tuple[int, int, int, int]]:
+        """
+        计算与JPEG的MCU网格对齐的裁剪框（左上角必须落在MCU边界上）
+        
+        Args:
+            img (Image.Image): 已打开的JPEG图片
+            focus (Optional[Focus]): 裁剪框中心的相对位置
+            
+        Returns:
+            Optional[Tuple[int, int, int, int]]: 对齐后的裁剪框，无法对齐时返回None
+        """
+        width, height = img.size
+        left, top, right, bottom = self.calculate_crop_box(width, height, focus)
+        
+        # MCU尺寸 = 8 * 最大采样因子（4:2:0 为 16x16，4:4:4 为 8x8）
+        layers = getattr(img, 'layer', None) or [('', 1, 1, 0)]
+        mcu_width = 8 * max(layer[1] for layer in layers)
+        mcu_height = 8 * max(layer[2] for layer in layers)
+        
+        # 左上角向最近的MCU边界移动，移动后裁剪框仍需在图片内
+        aligned_left = round(left / mcu_width) * mcu_width
+        if aligned_left + self.target_width > width:
+            aligned_left -= mcu_width
+        aligned_top = round(top / mcu_height) * mcu_height
+        if aligned_top + (bottom - top) > height:
+            aligned_top -= mcu_height
+        if aligned_left < 0 or aligned_top < 0:
+            return None
+        
+        return (aligned_left, aligned_top, aligned_left + (right - left), aligned_top + (bottom - top))
+    
+    def _crop_lossless(self, img: Image.Image, image_path: str,
+                       output_path: str) -> Optional[Tuple[int, int, int, int]]:
+        """
+        用jpegtran在DCT块级别裁剪JPEG，不解码像素也不重新编码
+        
+        Args:
+            img (Image.Image): 已打开（尚未解码）的图片
+            image_path (str): 输入图片路径
+            output_path (str): 输出图片路径
+            
+        Returns:
+            Optional[Tuple[int, int, int, int]]: 对齐后的裁剪框，None 表示需要回退为普通裁剪
+        """
+        if not self.jpegtran or img.format != 'JPEG':
+            return None
+        if os.path.splitext(output_path)[1].lower() not in ('.jpg', '.jpeg'):
+            return None
+        
+        # 不解码像素，内容显著性锚点只能另行读取缩小的亮度图
+        crop_box = self.calculate_lossless_crop_box(img, self.locate_focus(image_path, *img.size))
+        if crop_box is None:
+            return None
+        left, top, right, bottom = crop_box
+        logger.debug(f"无损裁剪框: {crop_box}")
+        
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        command = [self.jpegtran, '-copy', 'all', '-crop', f"{right - left}x{bottom - top}+{left}+{top}",
+                   '-outfile', output_path, image_path]
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=60)
+            return crop_box
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"无损裁剪失败，回退为普通裁剪 {image_path}: {e}")
+            return None
     
-    def batch_crop_images(self, source_directory: str, output_directory: str) -> dict:
+    def _fit_scale(self, image_width: int, image_height: int) -> float:
+        """
+        计算fit模式下的缩放比例
+        
+        Args:
+            image_width (int): 原图宽度
+            image_height (int): 原图高度
+            
+        Returns:
+            float: 缩放比例（小于1时需要缩小，非fit模式总是返回1）
+        """
+        if not self.fit:
+            return 1.0
+        return min(1.0, max(self.target_width / image_width, self.target_height / image_height))
+    
+    def locate_focus(self, image_path: str, image_width: int, image_height: int,
+                     img: Optional[Image.Image] = None) -> Focus:
+        """
+        用锚点策略计算裁剪框中心的相对位置
+        
+        Args:
+            image_path (str): 图片路径
+            image_width (int): 原图宽度
+            image_height (int): 原图高度
+            img (Optional[Image.Image]): 已打开且可以直接解码的图片（避免重复解码）
+            
+        Returns:
+            Focus: 焦点相对位置
+        """
+        # 裁剪框占（fit模式下缩小后）图片宽高的比例
+        scale = self._fit_scale(image_width, image_height)
+        scaled_width = max(self.target_width, round(image_width * scale))
+        scaled_height = max(self.target_height, round(image_height * scale))
+        crop_fraction = (min(1.0, self.target_width / scaled_width), min(1.0, self.target_height / scaled_height))
+        return self.anchor.locate(image_path, crop_fraction, img)
+    
+    def _crop_downscaled(self, img: Image.Image, scale: float,
+                         image_path: str) -> Tuple[Image.Image, Tuple[int, int, int, int]]:
+        """
+        将图片按比例缩小后裁剪，只对裁剪框对应的原图区域重采样
+        
+        Args:
+            img (Image.Image): 已打开（尚未解码）的图片
+            scale (float): 缩放比例
+            image_path (str): 输入图片路径（供锚点策略使用）
+            
+        Returns:
+            Tuple[Image.Image, Tuple[int, int, int, int]]: 裁剪后的图片，缩小后坐标系下的裁剪框
+        """
+        width, height = img.size
+        scaled_width = max(self.target_width, round(width * scale))
+        scaled_height = max(self.target_height, round(height * scale))
+        
+        if img.format == 'JPEG':
+            # JPEG按1/2、1/4、1/8在DCT域缩小解码，解码尺寸不小于缩放后的尺寸
+            img.draft(img.mode, (scaled_width, scaled_height))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        
+        # 内容显著性锚点直接使用缩小解码后的图片，不重复解码
+        focus = self.locate_focus(image_path, width, height, img)
+        left, top, right, bottom = self.calculate_crop_box(scaled_width, scaled_height, focus)
+        logger.debug(f"缩放尺寸: {scaled_width}x{scaled_height}, 裁剪框: {(left, top, right, bottom)}")
+        
+        # 原图（或缩小解码后的图片）坐标系下的裁剪区域
+        ratio_x = img.size[0] / scaled_width
+        ratio_y = img.size[1] / scaled_height
+        box = (left * ratio_x, top * ratio_y, right * ratio_x, bottom * ratio_y)
+        cropped = img.resize((right - left, bottom - top), Image.LANCZOS, box=box, reducing_gap=3.0)
+        return cropped, (left, top, right, bottom)
+    
+    def batch_crop_images(self, source_directory: str, output_directory: str, workers: int = 1) -> dict:
         """
         批量裁剪图片
         
         Args:
             source_directory (str): 源目录路径
             output_directory (str): 输出目录路径
+            workers (int): 并行进程数（1表示在当前进程中逐张处理）
             
         Returns:
             dict: 处理结果统计
@@ -215,6 +451,54 @@ class ImageCropper:
             'skipped': 0
         }
         
+        # 预扫描文件头，尺寸不足的图片跳过，无法读取的图片记为失败，均不再解码
+        sizes = self.prescan_images(image_files, os.path.join(output_directory, DIMENSION_CACHE_FILE))
+        croppable = []
+        for image_path in image_files:
+            size = sizes.get(image_path)
+            if size is None:
+                logger.error(f"无法读取图片: {image_path}")
+                stats['failed'] += 1
+            elif size[0] < self.target_width or size[1] < self.target_height:
+                logger.info(f"图片尺寸不足，跳过: {os.path.basename(image_path)} ({size[0]}x{size[1]})")
+                stats['skipped'] += 1
+            else:
+                croppable.append(image_path)
+        
+        # 清单中已按相同参数裁剪且源文件未变化的图片直接跳过
+        stats['unchanged'] = 0
+        with CropManifest(os.path.join(output_directory, MANIFEST_FILE)) as manifest:
+            image_files = []
+            for image_path in croppable:
+                if manifest.is_current(image_path, self._manifest_target(), self._manifest_options()):
+                    stats['skipped'] += 1
+                    stats['unchanged'] += 1
+                else:
+                    image_files.append(image_path)
+            if stats['unchanged']:
+                logger.info(f"{stats['unchanged']} 张图片已裁剪且未变化，跳过")
+            
+            if workers > 1:
+                logger.info(f"开始批量裁剪 {len(image_files)} 张图片（{workers} 个进程）...")
+                self._parallel_crop(image_files, output_directory, workers, stats, sizes, manifest)
+            else:
+                self._serial_crop(image_files, output_directory, stats, sizes, manifest)
+        
+        self._log_stats(stats)
+        return stats
+    
+    def _serial_crop(self, image_files: List[str], output_directory: str, stats: dict,
+                     sizes: Dict[str, Tuple[int, int]], manifest: CropManifest) -> None:
+        """
+        在当前进程中逐张裁剪图片
+        
+        Args:
+            image_files (List[str]): 图片文件路径列表
+            output_directory (str): 输出目录路径
+            stats (dict): 处理结果统计（原地更新）
+            sizes (Dict[str, Tuple[int, int]]): 预扫描得到的图片尺寸
+            manifest (CropManifest): 裁剪清单
+        """
         logger.info(f"开始批量裁剪 {len(image_files)} 张图片...")
         
         for i, image_path in enumerate(image_files, 1):
@@ -230,23 +514,139 @@ class ImageCropper:
                 logger.info(f"处理第 {i}/{len(image_files)} 张图片: {filename}")
                 
                 # 裁剪图片
-                if self.crop_image(image_path, output_path):
+                result = self._crop_with_state(image_path, output_path)
+                if result:
                     stats['success'] += 1
+                    self._record_manifest(manifest, image_path, output_path, sizes[image_path], result)
                 else:
                     stats['failed'] += 1
                     
             except Exception as e:
                 logger.error(f"处理图片失败 {image_path}: {e}")
                 stats['failed'] += 1
+    
+    def _manifest_target(self) -> list:
+        return [self.target_width, self.target_height]
+    
+    def _manifest_options(self) -> dict:
+        """影响输出结果的裁剪参数（参数变化后需要重新裁剪）"""
+        # 未找到jpegtran时无损模式不可用，按普通裁剪记录
+        options = {'fit': self.fit, 'lossless': bool(self.jpegtran)}
+        # 默认锚点不写入，已有清单保持有效
+        if self.anchor.name != 'top':
+            options['anchor'] = self.anchor.name
+        return options
+    
+    def _record_manifest(self, manifest: CropManifest, image_path: str, output_path: str,
+                         size: Tuple[int, int], result: Tuple[Tuple[int, int, int, int], str, dict]) -> None:
+        """裁剪成功后写入清单记录（裁剪框、裁剪方式和源文件哈希均来自裁剪步骤，不重新计算）"""
+        crop_box, mode, state = result
+        scale = self._fit_scale(*size)
+        try:
+            manifest.record(build_entry(image_path, output_path, crop_box, scale, mode,
+                                        self._manifest_target(), self._manifest_options(), state))
+        except OSError as e:
+            logger.warning(f"写入裁剪清单失败 {image_path}: {e}")
+    
+    def prescan_images(self, image_files: List[str], cache_path: Optional[str] = None,
+                       workers: int = 8) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        并行读取所有图片的文件头尺寸，按 路径+修改时间+文件大小 缓存
         
-        # 输出统计结果
+        Args:
+            image_files (List[str]): 图片文件路径列表
+            cache_path (Optional[str]): 缓存文件路径（JSON），为None时不缓存
+            workers (int): 读取文件头的线程数
+            
+        Returns:
+            Dict[str, Optional[Tuple[int, int]]]: 路径 -> (宽, 高)，无法读取的图片为None
+        """
+        cache = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"尺寸缓存损坏，重新扫描: {e}")
+            if not isinstance(cache, dict):
+                logger.warning("尺寸缓存格式错误，重新扫描")
+                cache = {}
+        
+        sizes = {}
+        keys = {}
+        pending = []
+        for image_path in image_files:
+            try:
+                stat = os.stat(image_path)
+            except OSError:
+                sizes[image_path] = None
+                continue
+            keys[image_path] = [stat.st_mtime_ns, stat.st_size]
+            entry = cache.get(image_path)
+            # 格式不符的记录（缺少字段、类型错误）与过期记录一样重新读取
+            if _valid_size_entry(entry) and entry['key'] == keys[image_path]:
+                sizes[image_path] = tuple(entry['size']) if entry['size'] else None
+            else:
+                pending.append(image_path)
+        
+        if pending:
+            logger.info(f"预扫描 {len(pending)} 张图片的尺寸（{len(image_files) - len(pending)} 张命中缓存）...")
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                for image_path, size in zip(pending, executor.map(read_image_size, pending)):
+                    sizes[image_path] = size
+        
+        if cache_path and pending:
+            cache.update({path: {'key': keys[path], 'size': sizes[path]} for path in pending})
+            temp_path = cache_path + '.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(cache, f, ensure_ascii=False)
+                os.replace(temp_path, cache_path)
+            except OSError as e:
+                logger.warning(f"保存尺寸缓存失败: {e}")
+        
+        return sizes
+    
+    def _parallel_crop(self, image_files: List[str], output_directory: str, workers: int, stats: dict,
+                       sizes: Dict[str, Tuple[int, int]], manifest: CropManifest) -> None:
+        """
+        用进程池裁剪图片，按输入顺序汇总结果和输出进度
+        
+        Args:
+            image_files (List[str]): 图片文件路径列表
+            output_directory (str): 输出目录路径
+            workers (int): 进程数
+            stats (dict): 处理结果统计（原地更新）
+            sizes (Dict[str, Tuple[int, int]]): 预扫描得到的图片尺寸
+            manifest (CropManifest): 裁剪清单
+        """
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_crop_worker, initargs=(self,)) as executor:
+            futures = [
+                executor.submit(_crop_worker, image_path,
+                                os.path.join(output_directory, os.path.basename(image_path)))
+                for image_path in image_files
+            ]
+            for i, (image_path, future) in enumerate(zip(image_files, futures), 1):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 进程异常退出等情况只影响对应的图片
+                    logger.error(f"处理图片失败 {image_path}: {e}")
+                    result = None
+                
+                stats['success' if result else 'failed'] += 1
+                if result:
+                    output_path = os.path.join(output_directory, os.path.basename(image_path))
+                    self._record_manifest(manifest, image_path, output_path, sizes[image_path], result)
+                logger.info(f"已完成 {i}/{len(image_files)} 张图片: {os.path.basename(image_path)}")
+    
+    def _log_stats(self, stats: dict) -> None:
+        """输出统计结果"""
         logger.info(f"批量裁剪完成:")
         logger.info(f"  总计: {stats['total']}")
         logger.info(f"  成功: {stats['success']}")
         logger.info(f"  失败: {stats['failed']}")
         logger.info(f"  跳过: {stats['skipped']}")
-        
-        return stats
     
     def preview_crop(self, image_path: str, preview_path: str = None) -> bool:
         """
@@ -265,7 +665,7 @@ class ImageCropper:
                     img = img.convert('RGB')
                 
                 width, height = img.size
-                crop_box = self.calculate_crop_box(width, height)
+                crop_box = self.calculate_crop_box(width, height, self.locate_focus(image_path, width, height, img))
                 
                 # 创建预览图（在原图上绘制裁剪框）
                 preview_img = img.copy()
@@ -0,0 +1,312 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 多尺寸裁剪流水线 - 每张图片只解码一次，按多个规格（手机/桌面/缩略图等）输出裁剪结果
+Version: 1.0
+'''
+import os
+import logging
+from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+from image_cropper import ImageCropper
+from crop_anchor import Focus, get_anchor, place_crop_box
+
+logger = logging.getLogger(__name__)
+
+# 常用规格示例
+DEFAULT_RENDITIONS = [
+    {'name': 'phone', 'width': 1080, 'height': 1920},
+    {'name': 'desktop', 'width': 1920, 'height': 1080, 'anchor': 'center'},
+    {'name': 'thumb', 'width': 270, 'height': 480, 'format': 'JPEG', 'quality': 85},
+]
+
+# 生成规格时使用的中间图至少是规格所需尺寸的倍数（1.0 与JPEG draft缩小解码的取舍一致）
+REDUCING_GAP = 1.0
+
+# 各输出格式的文件扩展名
+FORMAT_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp'}
+
+def normalize_rendition(spec: Dict) -> Dict:
+    """
+    补全规格的默认值
+
+    Args:
+        spec (Dict): 规格，至少包含 name/width/height，
+                     可选 anchor（锚点策略名称或实例，默认top）、format（默认JPEG）、quality（默认95）
+
+    Returns:
+        Dict: 补全后的规格
+    """
+    rendition = {'anchor': 'top', 'format': 'JPEG', 'quality': 95}
+    rendition.update(spec)
+    rendition['format'] = rendition['format'].upper()
+    if rendition['format'] not in FORMAT_EXTENSIONS:
+        raise ValueError(f"不支持的输出格式: {rendition['format']}")
+    get_anchor(rendition['anchor'])
+    return rendition
+
+# 渲染进程中使用的流水线（每个进程初始化一次）
+_worker_pipeline = None
+
+def _init_render_worker(pipeline: 'RenditionPipeline') -> None:
+    """渲染进程初始化：保存进程内复用的流水线"""
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+def _render_worker(image_path: str, output_directory: str) -> Dict[str, str]:
+    """在渲染进程中处理单张图片，任何异常都视为全部规格失败"""
+    try:
+        return _worker_pipeline.render(image_path, output_directory)
+    except Exception as e:
+        logger.error(f"处理图片失败 {image_path}: {e}")
+        return {r['name']: 'failed' for r in _worker_pipeline.renditions}
+
+class RenditionPipeline:
+    """多尺寸裁剪流水线：一次解码，逐级减半的中间图由所有规格共用"""
+
+    def __init__(self, renditions: List[Dict] = None):
+        """
+        初始化流水线
+
+        Args:
+            renditions (List[Dict]): 规格列表，默认 DEFAULT_RENDITIONS
+        """
+        self.renditions = [normalize_rendition(spec) for spec in (renditions or DEFAULT_RENDITIONS)]
+        names = [r['name'] for r in self.renditions]
+        if len(set(names)) != len(names):
+            raise ValueError(f"规格名称重复: {names}")
+        # 同名策略共用一个实例，同一图片的显著性图只计算一次
+        anchors = {}
+        self._anchors = {}
+        for r in self.renditions:
+            key = r['anchor'] if isinstance(r['anchor'], str) else id(r['anchor'])
+            self._anchors[r['name']] = anchors.setdefault(key, get_anchor(r['anchor']))
+        # 复用 ImageCropper 的文件扫描逻辑
+        self._cropper = ImageCropper()
+
+    def get_output_path(self, image_path: str, output_directory: str, rendition: Dict) -> str:
+        """
+        输出路径：输出目录/规格名/原文件名（扩展名按输出格式）
+
+        Args:
+            image_path (str): 输入图片路径
+            output_directory (str): 输出目录路径
+            rendition (Dict): 规格
+
+        Returns:
+            str: 输出文件路径
+        """
+        name = os.path.splitext(os.path.basename(image_path))[0]
+        return os.path.join(output_directory, rendition['name'], name + FORMAT_EXTENSIONS[rendition['format']])
+
+    def find_output_collisions(self, image_files: List[str]) -> List[List[str]]:
+        """
+        找出输出路径相同的图片：输出文件名只保留原文件名（不含扩展名），a.jpg 与 a.png 会互相覆盖
+
+        Args:
+            image_files (List[str]): 图片文件路径列表
+
+        Returns:
+            List[List[str]]: 每组输出路径相同的图片（按大小写不敏感比较，兼容Windows/macOS）
+        """
+        groups = {}
+        for image_path in image_files:
+            name = os.path.splitext(os.path.basename(image_path))[0]
+            groups.setdefault(os.path.normcase(name).lower(), []).append(image_path)
+        return [paths for paths in groups.values() if len(paths) > 1]
+
+    def calculate_crop_box(self, image_width: int, image_height: int, rendition: Dict,
+                           focus: Optional[Focus] = None) -> Tuple[int, int, int, int]:
+        """
+        在已缩放到覆盖规格尺寸的图片上计算裁剪框
+
+        Args:
+            image_width (int): 图片宽度
+            image_height (int): 图片高度
+            rendition (Dict): 规格
+            focus (Optional[Focus]): 裁剪框中心的相对位置，默认使用规格锚点策略的默认位置
+
+        Returns:
+            Tuple[int, int, int, int]: 裁剪框 (left, top, right, bottom)
+        """
+        focus = focus or self._anchors[rendition['name']].focus
+        return place_crop_box(image_width, image_height, rendition['width'], rendition['height'], focus)
+
+    def render(self, image_path: str, output_directory: str) -> Dict[str, str]:
+        """
+        解码一次图片，输出所有规格
+
+        Args:
+            image_path (str): 输入图片路径
+            output_directory (str): 输出目录路径
+
+        Returns:
+            Dict[str, str]: 规格名 -> success/failed/skipped（原图小于规格尺寸时跳过）
+        """
+        results = {}
+        with Image.open(image_path) as img:
+            width, height = img.size
+
+            # 每个规格需要的缩放比例（只缩小不放大）
+            scales = {}
+            for r in self.renditions:
+                if width < r['width'] or height < r['height']:
+                    logger.warning(f"图片尺寸不足，跳过规格 {r['name']}: {image_path} ({width}x{height})")
+                    results[r['name']] = 'skipped'
+                else:
+                    scales[r['name']] = min(1.0, max(r['width'] / width, r['height'] / height))
+            if not scales:
+                return results
+
+            # JPEG按所有规格中最大的缩放比例缩小解码，只解码一次
+            if img.format == 'JPEG':
+                largest = max(scales.values())
+                img.draft(img.mode, (round(width * largest), round(height * largest)))
+            base = img if img.mode in ('RGB', 'RGBA', 'L') else img.convert('RGB')
+            base.load()
+
+            # 逐级减半的中间图 [(图片, 相对原图的缩放比例)]，所有规格共用
+            levels = [(base, base.size[0] / width)]
+            for r in sorted(self.renditions, key=lambda r: -scales.get(r['name'], 0)):
+                if r['name'] not in scales:
+                    continue
+                try:
+                    cropped = self._render_one(image_path, levels, scales[r['name']], width, height, r)
+                    self._save(cropped, self.get_output_path(image_path, output_directory, r), r)
+                    results[r['name']] = 'success'
+                except Exception as e:
+                    logger.error(f"生成规格 {r['name']} 失败 {image_path}: {e}")
+                    results[r['name']] = 'failed'
+
+        logger.info(f"处理完成: {os.path.basename(image_path)} -> {results}")
+        return results
+
+    def _render_one(self, image_path: str, levels: List[Tuple[Image.Image, float]], scale: float,
+                    width: int, height: int, rendition: Dict) -> Image.Image:
+        """
+        从最小的可用中间图中只对裁剪区域重采样，生成一个规格
+
+        Args:
+            image_path (str): 输入图片路径
+            levels (List[Tuple[Image.Image, float]]): 已生成的中间图（按需原地追加）
+            scale (float): 相对原图的缩放比例
+            width (int): 原图宽度
+            height (int): 原图高度
+            rendition (Dict): 规格
+
+        Returns:
+            Image.Image: 规格尺寸的图片
+        """
+        # 缩放到刚好覆盖规格尺寸后的整幅尺寸
+        scaled_width = max(rendition['width'], round(width * scale))
+        scaled_height = max(rendition['height'], round(height * scale))
+
+        # 中间图至少保留 REDUCING_GAP 倍的尺寸；规格按比例从大到小处理，中间图只会继续减半
+        while levels[-1][1] / 2 >= scale * REDUCING_GAP:
+            level, _ = levels[-1]
+            reduced = level.reduce(2)
+            levels.append((reduced, reduced.size[0] / width))
+        level, _ = levels[-1]
+
+        # 显著性直接在已解码的中间图上计算，不重新打开文件
+        crop_fraction = (rendition['width'] / scaled_width, rendition['height'] / scaled_height)
+        focus = self._anchors[rendition['name']].locate(image_path, crop_fraction, level)
+        left, top, right, bottom = self.calculate_crop_box(scaled_width, scaled_height, rendition, focus)
+
+        ratio_x = level.size[0] / scaled_width
+        ratio_y = level.size[1] / scaled_height
+        box = (left * ratio_x, top * ratio_y, right * ratio_x, bottom * ratio_y)
+        if level.size == (scaled_width, scaled_height):
+            return level.crop((left, top, right, bottom))
+        return level.resize((right - left, bottom - top), Image.LANCZOS, box=box)
+
+    def _save(self, image: Image.Image, output_path: str, rendition: Dict) -> None:
+        """按规格的格式和质量保存图片"""
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+        if rendition['format'] == 'JPEG' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(output_path, rendition['format'], quality=rendition['quality'])
+
+    def batch_render(self, source_directory: str, output_directory: str, workers: int = 1) -> dict:
+        """
+        批量生成所有规格
+
+        Args:
+            source_directory (str): 源目录路径
+            output_directory (str): 输出目录路径
+            workers (int): 并行进程数（1表示在当前进程中逐张处理）
+
+        Returns:
+            dict: 处理结果统计（按图片计）：没有失败的规格且至少生成一个规格为 success；
+                  图片小于所有规格时为 skipped（只读取文件头，不解码），小于部分规格时仍为 success；
+                  输出文件名冲突的图片不生成，计为 failed；renditions 为生成的文件数
+        """
+        image_files = self._cropper.get_image_files(source_directory)
+        stats = {'total': len(image_files), 'success': 0, 'failed': 0, 'skipped': 0, 'renditions': 0}
+        if not image_files:
+            logger.warning("未找到任何图片文件")
+            return stats
+
+        # 同名不同扩展名的图片输出路径相同，不生成，避免静默覆盖
+        colliding = set()
+        for paths in self.find_output_collisions(image_files):
+            logger.error(f"输出文件名冲突，跳过并计为失败（请重命名）: {', '.join(paths)}")
+            colliding.update(paths)
+        stats['failed'] += len(colliding)
+        image_files = [path for path in image_files if path not in colliding]
+
+        logger.info(f"开始生成 {len(image_files)} 张图片的 {len(self.renditions)} 个规格...")
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker,
+                                     initargs=(self,)) as executor:
+                futures = [executor.submit(_render_worker, path, output_directory) for path in image_files]
+                for image_path, future in zip(image_files, futures):
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        logger.error(f"处理图片失败 {image_path}: {e}")
+                        results = {'': 'failed'}
+                    self._count(stats, results)
+        else:
+            for image_path in image_files:
+                try:
+                    results = self.render(image_path, output_directory)
+                except Exception as e:
+                    logger.error(f"处理图片失败 {image_path}: {e}")
+                    results = {'': 'failed'}
+                self._count(stats, results)
+
+        logger.info(f"批量生成完成: {stats}")
+        return stats
+
+    def _count(self, stats: dict, results: Dict[str, str]) -> None:
+        values = set(results.values())
+        stats['renditions'] += sum(1 for value in results.values() if value == 'success')
+        if 'failed' in values:
+            stats['failed'] += 1
+        elif 'success' in values:
+            stats['success'] += 1
+        else:
+            stats['skipped'] += 1
+
+def main():
+    """主函数"""
+    print("=== 多尺寸裁剪 ===")
+    source_directory = input("请输入源目录: ").strip()
+    output_directory = input("请输入输出目录: ").strip()
+    if not source_directory or not output_directory:
+        print("目录路径不能为空！")
+        return
+
+    pipeline = RenditionPipeline()
+    stats = pipeline.batch_render(source_directory, output_directory, workers=os.cpu_count() or 1)
+    print(f"\n处理完成: 共 {stats['total']} 张，成功 {stats['success']}，失败 {stats['failed']}，"
+          f"跳过 {stats['skipped']}，生成 {stats['renditions']} 个文件")
+
+if __name__ == "__main__":
+    main()
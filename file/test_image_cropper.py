@@ -0,0 +1,317 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 图片裁剪器的离线测试脚本（在临时目录中生成图片，无需外部文件）
+Version: 1.0
+'''
+import os
+import sys
+import json
+import logging
+import tempfile
+
+import pytest
+
+from PIL import Image
+
+from image_cropper import ImageCropper, DIMENSION_CACHE_FILE
+from crop_manifest import MANIFEST_FILE, CropManifest, file_hash
+from renditions import RenditionPipeline
+from crop_anchor import SaliencyAnchor, EdgeAnchor, get_anchor
+
+# 测试使用的小尺寸目标，保持测试速度
+TARGET_WIDTH = 108
+TARGET_HEIGHT = 192
+
+def make_image(path: str, width: int = 300, height: int = 400, color: tuple = (200, 120, 40)) -> str:
+    """生成纯色测试图片"""
+    Image.new('RGB', (width, height), color).save(path)
+    return path
+
+def make_jpeg(path: str, width: int = 301, height: int = 403, subsampling: int = 2) -> str:
+    """生成指定色度采样的JPEG（subsampling: 0=4:4:4, 1=4:2:2, 2=4:2:0）"""
+    Image.new('RGB', (width, height), (90, 140, 200)).save(path, 'JPEG', subsampling=subsampling)
+    return path
+
+def make_fake_jpegtran(directory: str, exit_code: int = 0) -> str:
+    """生成假的jpegtran：把命令行参数写入 args.json，成功时把输入文件复制为输出文件"""
+    path = os.path.join(directory, f"jpegtran_{exit_code}")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"""#!{sys.executable}
+import sys, json, shutil
+with open({os.path.join(directory, 'args.json')!r}, 'w') as f:
+    json.dump(sys.argv[1:], f)
+if {exit_code}:
+    sys.exit({exit_code})
+shutil.copyfile(sys.argv[-1], sys.argv[sys.argv.index('-outfile') + 1])
+""")
+    os.chmod(path, 0o755)
+    return path
+
+def _manifest_lines(output_dir: str) -> list:
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_manifest_resume_and_rerun():
+    """重复运行跳过未变化的图片，只重新裁剪内容变化和之前失败的图片，关闭时压缩清单"""
+    cropper = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        output = os.path.join(tmp_dir, 'output')
+        os.makedirs(source)
+        paths = [make_image(os.path.join(source, f"img_{i}.png"), color=(i * 60, 80, 160)) for i in range(3)]
+        broken = os.path.join(source, 'broken.jpg')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['total'], stats['success'], stats['failed'], stats['skipped']) == (4, 3, 1, 0)
+        assert len(_manifest_lines(output)) == 3
+
+        # 未变化：全部跳过，失败的图片仍然重试（仍然失败）
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['success'], stats['failed'], stats['skipped'], stats['unchanged']) == (0, 1, 3, 3)
+
+        # 只修改时间、内容不变：比较哈希后仍然跳过
+        os.utime(paths[0], ns=(os.stat(paths[0]).st_atime_ns, os.stat(paths[0]).st_mtime_ns + 10 ** 9))
+        # 内容变化：重新裁剪；修复失败的图片：这次裁剪成功
+        make_image(paths[1], color=(10, 250, 10))
+        os.utime(paths[1], ns=(os.stat(paths[1]).st_atime_ns, os.stat(paths[1]).st_mtime_ns + 2 * 10 ** 9))
+        make_image(broken, color=(1, 2, 3))
+
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['success'], stats['failed'], stats['skipped'], stats['unchanged']) == (2, 0, 2, 2)
+        with Image.open(os.path.join(output, 'img_1.png')) as img:
+            assert img.size == (TARGET_WIDTH, TARGET_HEIGHT)
+            assert img.getpixel((0, 0)) == (10, 250, 10)
+
+        # 关闭时重写为每个源文件一行
+        entries = _manifest_lines(output)
+        assert len(entries) == len({entry['source'] for entry in entries}) == 4
+
+        # 输出文件被删除：重新裁剪
+        os.remove(os.path.join(output, 'img_2.png'))
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['success'], stats['skipped']) == (1, 3)
+
+        # 裁剪参数变化：全部重新裁剪
+        stats = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT, fit=True).batch_crop_images(source, output)
+        assert (stats['success'], stats['skipped']) == (4, 0)
+
+def test_manifest_entries_from_workers_and_bad_lines():
+    """并行裁剪的记录带有裁剪进程计算的哈希和实际裁剪方式；损坏的记录被忽略，源文件无法访问时重新处理"""
+    cropper = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT, lossless=True)
+    cropper.jpegtran = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        output = os.path.join(tmp_dir, 'output')
+        os.makedirs(source)
+        paths = [make_image(os.path.join(source, f"img_{i}.png"), color=(i * 60, 80, 160)) for i in range(3)]
+
+        stats = cropper.batch_crop_images(source, output, workers=2)
+        assert (stats['success'], stats['failed']) == (3, 0)
+        entries = {entry['source']: entry for entry in _manifest_lines(output)}
+        for path in paths:
+            assert entries[path]['hash'] == file_hash(path)
+            assert entries[path]['size'] == os.stat(path).st_size
+            # 未找到jpegtran：按普通裁剪执行和记录
+            assert entries[path]['mode'] == 'reencode'
+            assert entries[path]['options']['lossless'] is False
+
+        manifest_path = os.path.join(output, MANIFEST_FILE)
+        with open(manifest_path, 'a', encoding='utf-8') as f:
+            f.write('[1, 2]\n{"target": [1, 1]}\n{"source": 5}\n{"source": "x", "target"\n')
+        with CropManifest(manifest_path) as manifest:
+            assert set(manifest.entries) == set(paths)
+            target = [TARGET_WIDTH, TARGET_HEIGHT]
+            options = cropper._manifest_options()
+            assert manifest.is_current(paths[0], target, options)
+            os.remove(paths[0])
+            assert not manifest.is_current(paths[0], target, options)
+            # 记录缺少字段时同样视为需要重新处理
+            manifest.entries[paths[1]].pop('size')
+            assert not manifest.is_current(paths[1], target, options)
+
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['total'], stats['success'], stats['skipped']) == (2, 0, 2)
+
+def test_lossless_crop_box_mcu_alignment():
+    """无损裁剪框的左上角对齐到MCU网格（4:2:0 为16x16，4:2:2 为16x8，4:4:4 为8x8），尺寸不变且不超出图片"""
+    cropper = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for subsampling, mcu in ((2, (16, 16)), (1, (16, 8)), (0, (8, 8))):
+            for width, height in ((301, 403), (TARGET_WIDTH + 9, TARGET_HEIGHT + 5)):
+                path = make_jpeg(os.path.join(tmp_dir, f"s{subsampling}_{width}.jpg"), width, height, subsampling)
+                with Image.open(path) as img:
+                    for focus in ((0.5, 0.0), (0.5, 0.5), (0.99, 0.99), (0.0, 0.0)):
+                        box = cropper.calculate_lossless_crop_box(img, focus)
+                        plain = cropper.calculate_crop_box(width, height, focus)
+                        left, top, right, bottom = box
+                        assert left % mcu[0] == 0 and top % mcu[1] == 0, (subsampling, focus, box)
+                        assert (right - left, bottom - top) == (TARGET_WIDTH, TARGET_HEIGHT)
+                        assert left >= 0 and top >= 0 and right <= width and bottom <= height
+                        assert abs(left - plain[0]) < mcu[0] and abs(top - plain[1]) < mcu[1]
+
+@pytest.mark.skipif(os.name != 'posix', reason='假的jpegtran脚本依赖 #! 解释器行')
+def test_lossless_jpegtran_command_and_fallback():
+    """jpegtran命令行参数正确；jpegtran不存在、执行失败、非JPEG或需要缩放时回退为重新编码"""
+    cropper = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT, lossless=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = make_jpeg(os.path.join(tmp_dir, 'source.jpg'))
+        output = os.path.join(tmp_dir, 'out', 'source.jpg')
+        args_path = os.path.join(tmp_dir, 'args.json')
+
+        def run(jpegtran, output_path=output):
+            if os.path.exists(args_path):
+                os.remove(args_path)
+            cropper.jpegtran = jpegtran
+            result = cropper._crop_image(source, output_path)
+            called = None
+            if os.path.exists(args_path):
+                with open(args_path, 'r') as f:
+                    called = json.load(f)
+            return result, called
+
+        with Image.open(source) as img:
+            expected_box = cropper.calculate_lossless_crop_box(img, cropper.locate_focus(source, *img.size))
+        left, top, right, bottom = expected_box
+
+        (box, mode), called = run(make_fake_jpegtran(tmp_dir))
+        assert (box, mode) == (expected_box, 'lossless')
+        assert called == ['-copy', 'all', '-crop', f"{right - left}x{bottom - top}+{left}+{top}",
+                          '-outfile', output, source]
+        assert os.path.exists(output)
+
+        # jpegtran 返回非0：回退为普通裁剪，输出为目标尺寸
+        (box, mode), called = run(make_fake_jpegtran(tmp_dir, exit_code=1))
+        assert mode == 'reencode' and called is not None
+        assert box == cropper.calculate_crop_box(301, 403, cropper.locate_focus(source, 301, 403))
+        with Image.open(output) as img:
+            assert img.size == (TARGET_WIDTH, TARGET_HEIGHT)
+
+        # jpegtran 不存在（OSError）
+        (_, mode), called = run(os.path.join(tmp_dir, 'missing_jpegtran'))
+        assert mode == 'reencode' and called is None
+
+        # 输出不是JPEG：不调用jpegtran
+        (_, mode), called = run(make_fake_jpegtran(tmp_dir), os.path.join(tmp_dir, 'out', 'source.png'))
+        assert mode == 'reencode' and called is None
+
+        # fit模式需要缩放：不调用jpegtran
+        cropper.fit = True
+        (_, mode), called = run(make_fake_jpegtran(tmp_dir))
+        assert mode == 'reencode' and called is None
+
+def test_renditions_output_collisions_and_skipped():
+    """同名不同扩展名的图片不生成并计为失败；小于所有规格的图片计为跳过，小于部分规格仍为成功"""
+    pipeline = RenditionPipeline([{'name': 'small', 'width': 54, 'height': 96},
+                                  {'name': 'large', 'width': TARGET_WIDTH, 'height': TARGET_HEIGHT}])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        output = os.path.join(tmp_dir, 'output')
+        os.makedirs(source)
+        make_image(os.path.join(source, 'a.jpg'), color=(255, 0, 0))
+        make_image(os.path.join(source, 'A.png'), color=(0, 0, 255))
+        make_image(os.path.join(source, 'b.png'))
+        make_image(os.path.join(source, 'medium.png'), 60, 100)
+        make_image(os.path.join(source, 'tiny.png'), 20, 20)
+
+        assert pipeline.find_output_collisions(pipeline._cropper.get_image_files(source)) == [
+            [os.path.join(source, 'A.png'), os.path.join(source, 'a.jpg')]]
+        stats = pipeline.batch_render(source, output)
+        assert (stats['total'], stats['success'], stats['failed'], stats['skipped'], stats['renditions']) == (5, 2, 2, 1, 3)
+        assert sorted(os.listdir(os.path.join(output, 'small'))) == ['b.jpg', 'medium.jpg']
+        assert os.listdir(os.path.join(output, 'large')) == ['b.jpg']
+
+def test_saliency_anchor_requires_saliency():
+    """未实现 saliency 的显著性策略在创建时就报错，而不是在批量裁剪中途失败"""
+    class IncompleteAnchor(SaliencyAnchor):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        IncompleteAnchor()
+    with pytest.raises(TypeError):
+        SaliencyAnchor()
+    assert isinstance(get_anchor('edges'), EdgeAnchor)
+
+def test_prescan_skips_undersized_and_invalidates_cache():
+    """尺寸不足的图片计入 skipped；尺寸缓存按修改时间和文件大小失效"""
+    cropper = ImageCropper(target_width=TARGET_WIDTH, target_height=TARGET_HEIGHT)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        output = os.path.join(tmp_dir, 'output')
+        os.makedirs(source)
+        large = make_image(os.path.join(source, 'large.png'))
+        small = make_image(os.path.join(source, 'small.png'), 50, 50)
+
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['total'], stats['success'], stats['failed'], stats['skipped']) == (2, 1, 0, 1)
+        assert not os.path.exists(os.path.join(output, 'small.png'))
+
+        cache_path = os.path.join(output, DIMENSION_CACHE_FILE)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        assert cache[small]['size'] == [50, 50] and cache[large]['size'] == [300, 400]
+        assert cache[small]['key'] == [os.stat(small).st_mtime_ns, os.stat(small).st_size]
+
+        # 路径、修改时间、大小都未变化时直接使用缓存，不读取文件头
+        cache[small]['size'] = cache[large]['size'] = [999, 999]
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        assert cropper.prescan_images([small, large], cache_path) == {small: (999, 999), large: (999, 999)}
+
+        # 替换为足够大的图片（修改时间和大小都变化）：重新读取尺寸并裁剪
+        make_image(small, 200, 300)
+        os.utime(small, ns=(os.stat(small).st_atime_ns, os.stat(small).st_mtime_ns + 10 ** 9))
+        stats = cropper.batch_crop_images(source, output)
+        assert (stats['success'], stats['skipped'], stats['unchanged']) == (1, 1, 1)
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            assert json.load(f)[small]['size'] == [200, 300]
+
+        # 只修改时间变化也会重新读取（不再使用缓存中的假尺寸）
+        os.utime(large, ns=(os.stat(large).st_atime_ns, os.stat(large).st_mtime_ns + 10 ** 9))
+        assert cropper.prescan_images([large], cache_path)[large] == (300, 400)
+
+        # 缓存损坏时重新扫描
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            f.write('{broken')
+        assert cropper.prescan_images([large, small], cache_path) == {large: (300, 400), small: (200, 300)}
+
+        # JSON有效但格式不符：整体不是对象时全部重新扫描，单条记录格式错误时只重新读取该图片
+        for content in ([1, 2], 'text', None):
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump(content, f)
+            assert cropper.prescan_images([large, small], cache_path) == {large: (300, 400), small: (200, 300)}
+        key = [os.stat(large).st_mtime_ns, os.stat(large).st_size]
+        for entry in ({'size': [1, 1]}, {'key': key}, {'key': key, 'size': 'big'}, {'key': key, 'size': [1]},
+                      {'key': str(key), 'size': [1, 1]}, {'key': key, 'size': [True, 1]}, [key, [1, 1]], 7):
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                json.dump({large: entry, small: {'key': [os.stat(small).st_mtime_ns, os.stat(small).st_size],
+                                                 'size': [999, 999]}}, f)
+            assert cropper.prescan_images([large, small], cache_path) == {large: (300, 400), small: (999, 999)}
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                assert json.load(f)[large] == {'key': key, 'size': [300, 400]}
+
+def test_crop_box_matches_renditions():
+    """单尺寸裁剪与多尺寸裁剪使用同一个裁剪框规则，奇数宽度也得到精确的目标尺寸"""
+    for width, height in ((107, 191), (108, 192), (1, 1)):
+        cropper = ImageCropper(target_width=width, target_height=height)
+        pipeline = RenditionPipeline([{'name': 'r', 'width': width, 'height': height}])
+        for image_size in ((300, 400), (width, height), (1000, 250)):
+            for focus in ((0.5, 0.0), (0.0, 1.0), (0.99, 0.37)):
+                box = cropper.calculate_crop_box(*image_size, focus)
+                assert box[2] - box[0] == width and box[0] >= 0 and box[2] <= image_size[0]
+                if image_size[1] >= height:
+                    assert box == pipeline.calculate_crop_box(*image_size, pipeline.renditions[0], focus)
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    test_manifest_resume_and_rerun()
+    test_manifest_entries_from_workers_and_bad_lines()
+    test_lossless_crop_box_mcu_alignment()
+    test_lossless_jpegtran_command_and_fallback()
+    test_renditions_output_collisions_and_skipped()
+    test_saliency_anchor_requires_saliency()
+    test_prescan_skips_undersized_and_invalidates_cache()
+    test_crop_box_matches_renditions()
+    print("✅ 所有裁剪器测试通过")
@@ -0,0 +1,118 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: clone方法基准测试 - 对比原逐块扫描与金字塔模板匹配的耗时和克隆效果
+Version: 1.0
+'''
+import time
+import logging
+from typing import List, Tuple, Dict, Optional
+
+import cv2
+import numpy as np
+
+from watermark_remover import WatermarkRemover
+
+# 测试图片：(名称, 宽, 高, 水印区域 (x, y, width, height))
+BENCH_IMAGES = [
+    ('1080p', 1920, 1080, (1500, 850, 300, 150)),
+    ('4K', 3840, 2160, (3000, 1800, 600, 250)),
+    ('6000x4000', 6000, 4000, (100, 100, 800, 400)),
+]
+# 原实现只在该尺寸上运行（更大的图片需要数分钟）
+LEGACY_IMAGES = ('1080p',)
+
+def legacy_find_best_match(image: np.ndarray, x: int, y: int, w: int, h: int) -> Optional[Tuple[int, int]]:
+    """原实现的 _find_best_match：步长10逐块比较颜色差异"""
+    height, width = image.shape[:2]
+    best_score = float('inf')
+    best_match = None
+    step = 10
+    for i in range(0, height - h, step):
+        for j in range(0, width - w, step):
+            if (y <= i < y+h and x <= j < x+w):
+                continue
+            region1 = image[y:y+h, x:x+w]
+            region2 = image[i:i+h, j:j+w]
+            if region1.shape == region2.shape:
+                diff = np.mean(np.abs(region1.astype(float) - region2.astype(float)))
+                if diff < best_score:
+                    best_score = diff
+                    best_match = (j, i)
+    return best_match
+
+def generate_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """生成重复纹理 + 水平渐变的BGR测试图片（存在可克隆的相似区域）"""
+    rng = np.random.default_rng(seed)
+    tile = cv2.GaussianBlur(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8), (5, 5), 0)
+    texture = np.tile(tile, (height // 64 + 1, width // 64 + 1, 1))[:height, :width]
+    gradient = np.linspace(0, 40, width, dtype=np.float32)[None, :, None]
+    return np.clip(texture + gradient, 0, 255).astype(np.uint8)
+
+def add_watermark(image: np.ndarray, rect: Tuple[int, int, int, int]) -> np.ndarray:
+    """在矩形区域叠加半透明浅色水印"""
+    x, y, w, h = rect
+    marked = image.copy()
+    marked[y:y+h, x:x+w] = (marked[y:y+h, x:x+w] * 0.4 + 150).astype(np.uint8)
+    return marked
+
+def _evaluate(match: Optional[Tuple[int, int]], clean: np.ndarray, marked: np.ndarray,
+              rect: Tuple[int, int, int, int]) -> Dict:
+    """克隆后水印区域与原图的平均绝对误差，以及源区域是否与水印重叠"""
+    x, y, w, h = rect
+    if match is None:
+        return {'mae': None, 'overlap': None}
+    src_x, src_y = match
+    cloned = marked[src_y:src_y+h, src_x:src_x+w].astype(np.int16)
+    return {
+        'mae': float(np.abs(cloned - clean[y:y+h, x:x+w]).mean()),
+        'overlap': not (src_x + w <= x or src_x >= x + w or src_y + h <= y or src_y >= y + h),
+    }
+
+def _timed(func) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+def run_benchmark(repeat: int = 3) -> List[Dict]:
+    """
+    在不同尺寸的图片上测量 clone 方法寻找源区域的耗时和效果
+
+    Args:
+        repeat (int): 新实现的重复次数（取最短耗时）
+
+    Returns:
+        List[Dict]: 每张图片、每种实现的结果字典
+    """
+    remover = WatermarkRemover()
+    results = []
+    for label, width, height, rect in BENCH_IMAGES:
+        clean = generate_image(width, height)
+        marked = add_watermark(clean, rect)
+        x, y, w, h = rect
+
+        if label in LEGACY_IMAGES:
+            match, ms = _timed(lambda: legacy_find_best_match(marked, x, y, w, h))
+            results.append({'image': label, 'impl': '原实现', 'ms': ms, 'match': match,
+                            **_evaluate(match, clean, marked, rect)})
+
+        runs = [_timed(lambda: remover._find_best_match(marked, x, y, w, h)) for _ in range(repeat)]
+        match, ms = min(runs, key=lambda run: run[1])
+        results.append({'image': label, 'impl': '模板匹配', 'ms': ms, 'match': match,
+                        **_evaluate(match, clean, marked, rect)})
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('watermark_remover').setLevel(logging.WARNING)
+
+    print("=== clone方法基准测试（寻找源区域）===")
+    print(f"{'图片':<12}{'实现':<10}{'耗时ms':>10}{'源区域':>16}{'误差':>8}{'与水印重叠':>10}")
+    for r in run_benchmark():
+        mae = '-' if r['mae'] is None else f"{r['mae']:.2f}"
+        overlap = '-' if r['overlap'] is None else ('是' if r['overlap'] else '否')
+        print(f"{r['image']:<12}{r['impl']:<10}{r['ms']:>10.1f}{str(r['match']):>16}{mae:>8}{overlap:>10}")
+    print("（误差为克隆区域与无水印原图的平均绝对差）")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: fill方法基准测试 - 验证向量化的外围平均色与原逐像素实现输出一致，并对比耗时
+Version: 1.0
+'''
+import time
+import logging
+from typing import List, Tuple, Dict
+
+import numpy as np
+
+from watermark_remover import WatermarkRemover
+
+# 示例配置中的水印区域 (x, y, width, height)
+EXAMPLE_RECT = (784, 1498, 846, 1536)
+
+# 用于校验输出一致的矩形：示例区域、贴边、部分超出图片、完全在图片外
+# （与实际调用一致，先经过 _clamp_rectangles 限制在图片范围内）
+CHECK_RECTS = [
+    EXAMPLE_RECT,
+    (0, 0, 120, 80),
+    (1650, 3000, 200, 200),
+    (-20, 100, 60, 40),
+    (5000, 5000, 10, 10),
+]
+
+def legacy_ring_mean(image: np.ndarray, x: int, y: int, w: int, h: int):
+    """原实现：逐像素收集矩形外围5像素内的像素后求平均"""
+    surrounding_pixels = []
+    for i in range(max(0, y-5), min(image.shape[0], y+h+5)):
+        for j in range(max(0, x-5), min(image.shape[1], x+w+5)):
+            if not (y <= i < y+h and x <= j < x+w):
+                surrounding_pixels.append(image[i, j])
+    if surrounding_pixels:
+        return np.mean(surrounding_pixels, axis=0)
+    return None
+
+def legacy_fill(image: np.ndarray, rectangles: List[Tuple[int, int, int, int]]) -> np.ndarray:
+    """原实现的 _fill_watermark"""
+    result = image.copy()
+    for x, y, w, h in rectangles:
+        if w > 0 and h > 0:
+            avg_color = legacy_ring_mean(image, x, y, w, h)
+            if avg_color is not None:
+                result[y:y+h, x:x+w] = avg_color.astype(np.uint8)
+    return result
+
+def generate_image(width: int = 1700, height: int = 3100, seed: int = 0) -> np.ndarray:
+    """生成渐变 + 噪点的BGR测试图片"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 200, width, dtype=np.float32)[None, :, None]
+    noise = rng.integers(0, 56, (height, width, 3), dtype=np.uint8)
+    return (gradient + noise).astype(np.uint8)
+
+def _best_ms(func, repeat: int) -> float:
+    """多次运行取最短耗时（毫秒）"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return min(runs) * 1000
+
+def run_benchmark(repeat: int = 5) -> Dict:
+    """
+    校验输出一致，并测量示例区域上外围采样和整个 _fill_watermark 的耗时
+
+    Args:
+        repeat (int): 新实现的重复次数（取最短耗时）
+
+    Returns:
+        Dict: identical / 原实现与向量化的 ring_ms、fill_ms 及加速比
+    """
+    remover = WatermarkRemover()
+    image = generate_image()
+    rectangles = remover._clamp_rectangles(CHECK_RECTS, image.shape[1], image.shape[0])
+
+    identical = all(
+        np.array_equal(legacy_fill(img, [rect]), remover._fill_watermark(img, None, [rect]))
+        for img in (image, image[:, :, 0].copy())
+        for rect in rectangles
+    )
+
+    results = {
+        'identical': identical,
+        'legacy_ring_ms': _best_ms(lambda: legacy_ring_mean(image, *EXAMPLE_RECT), 1),
+        'vectorized_ring_ms': _best_ms(lambda: remover._ring_mean(image, *EXAMPLE_RECT), repeat),
+        'legacy_fill_ms': _best_ms(lambda: legacy_fill(image, [EXAMPLE_RECT]), 1),
+        'vectorized_fill_ms': _best_ms(lambda: remover._fill_watermark(image, None, [EXAMPLE_RECT]), repeat),
+    }
+    results['ring_speedup'] = results['legacy_ring_ms'] / results['vectorized_ring_ms']
+    results['fill_speedup'] = results['legacy_fill_ms'] / results['vectorized_fill_ms']
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('watermark_remover').setLevel(logging.WARNING)
+
+    print(f"=== fill方法基准测试（1700x3100，水印区域 {EXAMPLE_RECT}）===")
+    r = run_benchmark()
+    print(f"输出一致: {'是' if r['identical'] else '否'}")
+    print(f"{'':<16}{'原实现ms':>10}{'向量化ms':>10}{'加速比':>8}")
+    print(f"{'外围采样':<16}{r['legacy_ring_ms']:>10.1f}{r['vectorized_ring_ms']:>10.2f}{r['ring_speedup']:>8.0f}")
+    print(f"{'_fill_watermark':<16}{r['legacy_fill_ms']:>10.1f}{r['vectorized_fill_ms']:>10.2f}{r['fill_speedup']:>8.0f}")
+    print("（_fill_watermark 含整图复制和矩形填充，两种实现相同）")
+
+if __name__ == "__main__":
+    main()
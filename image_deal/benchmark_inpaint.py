@@ -0,0 +1,92 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: inpaint方法基准测试 - 对比整图修复与只修复水印附近区域的耗时，并校验输出一致
+Version: 1.0
+'''
+import time
+import logging
+from typing import List, Tuple, Dict
+
+import cv2
+import numpy as np
+
+from watermark_remover import WatermarkRemover, INPAINT_RADIUS
+from benchmark_clone import generate_image
+
+# 测试图片：(名称, 宽, 高)，水印为右下角的Logo和左上角的一行小字
+BENCH_SIZES = [
+    ('1080p', 1920, 1080),
+    ('4K', 3840, 2160),
+    ('6000x4000', 6000, 4000),
+]
+
+def watermark_rectangles(width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """右下角Logo（两个相邻矩形）+ 左上角文字"""
+    return [
+        (width - 380, height - 160, 340, 120),
+        (width - 520, height - 120, 130, 60),
+        (40, 40, 260, 50),
+    ]
+
+def legacy_inpaint(image: np.ndarray, rectangles: List[Tuple[int, int, int, int]]) -> np.ndarray:
+    """原实现：创建整图掩码，对整张图片调用 cv2.inpaint（返回新图片）"""
+    height, width = image.shape[:2]
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for x, y, w, h in rectangles:
+        mask[y:y+h, x:x+w] = 255
+    return cv2.inpaint(image, mask, INPAINT_RADIUS, cv2.INPAINT_TELEA)
+
+def _best_ms(func, repeat: int) -> float:
+    """多次运行取最短耗时（毫秒）"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return min(runs) * 1000
+
+def run_benchmark(repeat: int = 3) -> List[Dict]:
+    """
+    在不同尺寸的图片上对比两种修复方式
+
+    Args:
+        repeat (int): 每种方式的重复次数（取最短耗时）
+
+    Returns:
+        List[Dict]: 每张图片的 identical / legacy_ms / roi_ms / speedup
+    """
+    remover = WatermarkRemover()
+    results = []
+    for label, width, height in BENCH_SIZES:
+        image = generate_image(width, height)
+        rectangles = remover._clamp_rectangles(watermark_rectangles(width, height), width, height)
+
+        expected = legacy_inpaint(image, rectangles)
+        # ROI修复原地修改输入，每次使用副本（复制不计入耗时）
+        copies = [image.copy() for _ in range(repeat + 1)]
+        identical = np.array_equal(remover._inpaint_watermark(copies.pop(), rectangles), expected)
+
+        legacy_ms = _best_ms(lambda: legacy_inpaint(image, rectangles), repeat)
+        roi_ms = _best_ms(lambda: remover._inpaint_watermark(copies.pop(), rectangles), repeat)
+        results.append({
+            'image': label,
+            'identical': identical,
+            'legacy_ms': legacy_ms,
+            'roi_ms': roi_ms,
+            'speedup': legacy_ms / roi_ms,
+        })
+    return results
+
+def main():
+    """主函数"""
+    logging.getLogger('watermark_remover').setLevel(logging.WARNING)
+
+    print("=== inpaint方法基准测试（右下角Logo + 左上角文字）===")
+    print(f"{'图片':<12}{'输出一致':>8}{'整图ms':>10}{'ROI ms':>10}{'加速比':>8}")
+    for r in run_benchmark():
+        print(f"{r['image']:<12}{'是' if r['identical'] else '否':>8}{r['legacy_ms']:>10.1f}"
+              f"{r['roi_ms']:>10.1f}{r['speedup']:>8.1f}")
+
+if __name__ == "__main__":
+    main()
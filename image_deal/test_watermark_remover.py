@@ -0,0 +1,121 @@
+'''
+Author: LinYiHan
+Date: 2025-01-16
+Description: 水印去除器的离线测试脚本（在临时目录中生成带水印的图片）
+Version: 1.0
+'''
+import os
+import logging
+import tempfile
+
+import cv2
+import numpy as np
+
+from watermark_remover import WatermarkRemover, GEOMETRY_CACHE_SIZE
+
+WATERMARK_CONFIG = {
+    'rectangles': [(300, 200, 80, 40), (10, 10, 60, 20)],
+    'method': 'inpaint',
+}
+
+def generate_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """生成带纹理和渐变的BGR测试图片（测试自带，不依赖基准测试脚本）"""
+    rng = np.random.default_rng(seed)
+    tile = cv2.GaussianBlur(rng.integers(0, 255, (32, 32, 3), dtype=np.uint8), (5, 5), 0)
+    texture = np.tile(tile, (height // 32 + 1, width // 32 + 1, 1))[:height, :width]
+    gradient = np.linspace(0, 40, width, dtype=np.float32)[None, :, None]
+    return np.clip(texture + gradient, 0, 255).astype(np.uint8)
+
+def add_watermark(image: np.ndarray, rect: tuple) -> np.ndarray:
+    """在矩形区域叠加半透明浅色水印"""
+    x, y, w, h = rect
+    marked = image.copy()
+    marked[y:y+h, x:x+w] = (marked[y:y+h, x:x+w] * 0.4 + 150).astype(np.uint8)
+    return marked
+
+def make_images(directory: str, count: int, width: int = 400, height: int = 300) -> list:
+    """生成带水印的测试图片"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        image = generate_image(width, height, seed=i)
+        for rect in WATERMARK_CONFIG['rectangles']:
+            image = add_watermark(image, rect)
+        path = os.path.join(directory, f"img_{i}.png")
+        cv2.imwrite(path, image)
+        paths.append(path)
+    return paths
+
+def test_batch_stats_serial_and_parallel():
+    """串行与并行的统计结果一致、输出逐像素一致，失败的图片只计入 failed"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        paths = make_images(source, 4)
+        broken = os.path.join(source, 'broken.jpg')
+        with open(broken, 'wb') as f:
+            f.write(b'not an image')
+
+        results = {}
+        for workers in (1, 2):
+            output = os.path.join(tmp_dir, f"output_{workers}")
+            stats = WatermarkRemover().batch_remove_watermarks(source, output, WATERMARK_CONFIG, workers=workers)
+            assert (stats['total'], stats['success'], stats['failed']) == (5, 4, 1)
+            assert set(stats['timings']) == set(paths) | {broken}
+            assert all(seconds >= 0 for seconds in stats['timings'].values())
+            results[workers] = [cv2.imread(os.path.join(output, f"img_{i}_no_watermark.png")) for i in range(4)]
+        assert all(np.array_equal(a, b) for a, b in zip(results[1], results[2]))
+
+        empty = os.path.join(tmp_dir, 'empty')
+        os.makedirs(empty)
+        stats = WatermarkRemover().batch_remove_watermarks(empty, os.path.join(tmp_dir, 'output_empty'), WATERMARK_CONFIG)
+        assert (stats['total'], stats['success'], stats['failed'], stats['timings']) == (0, 0, 0, {})
+
+def test_geometry_cache_hit_rate():
+    """同尺寸同配置的图片复用掩码缓存；并行时命中率按进程统计"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, 'source')
+        make_images(source, 4)
+        with open(os.path.join(source, 'broken.jpg'), 'wb') as f:
+            f.write(b'not an image')
+
+        # 串行：只有第一张未命中；读取失败的图片不计入
+        stats = WatermarkRemover().batch_remove_watermarks(source, os.path.join(tmp_dir, 'serial'), WATERMARK_CONFIG)
+        assert (stats['cache_hits'], stats['cache_misses'], stats['cache_hit_rate']) == (3, 1, 0.75)
+
+        # 并行：每个进程有自己的缓存，每个处理过图片的进程第一次都未命中
+        stats = WatermarkRemover().batch_remove_watermarks(source, os.path.join(tmp_dir, 'parallel'),
+                                                           WATERMARK_CONFIG, workers=2)
+        assert stats['cache_hits'] + stats['cache_misses'] == 4
+        assert 1 <= stats['cache_misses'] <= 2
+        assert stats['cache_hit_rate'] == stats['cache_hits'] / 4
+
+        # 另一种尺寸：新增一次未命中
+        make_images(os.path.join(source, 'other'), 1, 320, 240)
+        os.replace(os.path.join(source, 'other', 'img_0.png'), os.path.join(source, 'img_9.png'))
+        stats = WatermarkRemover().batch_remove_watermarks(source, os.path.join(tmp_dir, 'mixed'), WATERMARK_CONFIG)
+        assert (stats['cache_hits'], stats['cache_misses']) == (3, 2)
+
+def test_geometry_cache_lru():
+    """缓存按 (宽, 高, 矩形) 区分，超出容量时淘汰最久未使用的；缓存的掩码只读"""
+    remover = WatermarkRemover()
+    rectangles = [(10, 10, 20, 20)]
+    first = remover._watermark_geometry(100, 100, rectangles)
+    # 列表与元组形式的矩形是同一个键
+    assert remover._watermark_geometry(100, 100, [[10, 10, 20, 20]]) is first
+    assert (remover.cache_hits, remover.cache_misses) == (1, 1)
+
+    for width in range(101, 101 + GEOMETRY_CACHE_SIZE):
+        remover._watermark_geometry(width, 100, rectangles)
+    assert len(remover._geometry_cache) == GEOMETRY_CACHE_SIZE
+    assert remover._watermark_geometry(100, 100, rectangles) is not first
+
+    mask = remover._geometry_mask(first, 100, 100)
+    assert remover._geometry_mask(first, 100, 100) is mask
+    assert not mask.flags.writeable and mask[10:30, 10:30].all() and mask.sum() == 400 * 255
+
+if __name__ == "__main__":
+    logging.disable(logging.CRITICAL)
+    test_batch_stats_serial_and_parallel()
+    test_geometry_cache_hit_rate()
+    test_geometry_cache_lru()
+    print("✅ 所有水印去除测试通过")
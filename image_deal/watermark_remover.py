@@ -5,22 +5,76 @@ Description: 图片水印去除工具 - 支持多个矩形范围
 Version: 1.0
 '''
 import os
+import time
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw
 import logging
 from typing import List, Tuple, Dict, Optional
 import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# fill方法采样的矩形外围宽度（像素）
+FILL_BORDER = 5
+
+# fill方法的填充方式
+FILL_MODES = ('mean', 'sides', 'gradient')
+
+# inpaint方法的修复半径（像素）
+INPAINT_RADIUS = 3
+# inpaint方法：修复区域（ROI）在水印矩形外扩展的像素数，修复结果只依赖矩形附近的像素
+INPAINT_PADDING = 4 * INPAINT_RADIUS
+
+# 缓存的掩码和修复区域数量（按 图片宽高+矩形配置，同一批次的图片通常尺寸相同）
+GEOMETRY_CACHE_SIZE = 8
+
+# clone方法：匹配模板中水印矩形外围上下文的最小宽度（像素）
+CLONE_CONTEXT = 16
+# clone方法：粗搜索所在金字塔层的最大像素数（在该层灰度图上做一次全图匹配）
+CLONE_COARSE_PIXELS = 150000
+# clone方法：粗搜索保留并逐层细化的候选数
+CLONE_CANDIDATES = 6
+# clone方法：细化时参与计算的上下文像素上限（超过时等间隔抽样）
+CLONE_REFINE_SAMPLES = 8000
+
+# 批量处理进程中使用的去除器和水印配置（每个进程初始化一次）
+_worker_remover = None
+_worker_options = None
+
+def _init_watermark_worker(remover: 'WatermarkRemover', options: Dict) -> None:
+    """批量处理进程初始化：保存进程内复用的去除器和解析后的水印配置"""
+    global _worker_remover, _worker_options
+    _worker_remover = remover
+    _worker_options = options
+    # 并行度由进程数决定，每个进程内OpenCV只用一个线程，避免线程数超过CPU核数
+    cv2.setNumThreads(1)
+
+def _remove_worker(image_path: str, output_path: str) -> Tuple[bool, float, Optional[bool]]:
+    """在批量处理进程中处理单张图片，返回是否成功、耗时（秒）和是否命中掩码缓存"""
+    return _worker_remover._process_file(image_path, output_path, _worker_options)
+
 class WatermarkRemover:
     """图片水印去除器"""
     
-    def __init__(self):
-        """初始化水印去除器"""
+    def __init__(self, search_radius: Optional[int] = None, pyramid_levels: Optional[int] = None):
+        """
+        初始化水印去除器
+        
+        Args:
+            search_radius (Optional[int]): clone方法的搜索半径，源区域与水印矩形的距离不超过该值（默认搜索全图）
+            pyramid_levels (Optional[int]): clone方法粗搜索的金字塔层数（每层缩小一半，默认按图片尺寸自动选择）
+        """
+        self.search_radius = search_radius
+        self.pyramid_levels = pyramid_levels
+        # 掩码和修复区域缓存（LRU）及命中统计
+        self._geometry_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         # 支持的图片格式
         self.image_extensions = {
             '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.webp'
@@ -28,7 +82,7 @@ class WatermarkRemover:
     
     def remove_watermark_by_rectangles(self, image_path: str, output_path: str, 
                                      rectangles: List[Tuple[int, int, int, int]], 
-                                     method: str = 'inpaint') -> bool:
+                                     method: str = 'inpaint', fill_mode: str = 'mean') -> bool:
         """
         通过指定矩形区域去除水印
         
@@ -37,6 +91,7 @@ class WatermarkRemover:
             output_path (str): 输出图片路径
             rectangles (List[Tuple]): 矩形区域列表，每个矩形为 (x, y, width, height)
             method (str): 去除方法 ('inpaint', 'blur', 'fill', 'clone')
+            fill_mode (str): fill方法的填充方式 ('mean' 外围平均色, 'sides' 四边平均色渐变, 'gradient' 逐行逐列渐变)
             
         Returns:
             bool: 是否成功
@@ -47,7 +102,6 @@ class WatermarkRemover:
             if image is None:
                 print("OpenCV读取失败，尝试PIL...")
                 from PIL import Image
-                import numpy as np
                 pil_image = Image.open(image_path)
                 image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
                 print(f"PIL读取成功，图片尺寸: {image.shape}")
@@ -55,35 +109,44 @@ class WatermarkRemover:
             height, width = image.shape[:2]
             logger.info(f"图片尺寸: {width}x{height}")
             
-            # 创建掩码
-            mask = np.zeros((height, width), dtype=np.uint8)
+            # 图片范围内的矩形、修复区域和掩码（相同尺寸和矩形配置时复用缓存）
+            geometry = self._watermark_geometry(width, height, rectangles)
             
-            # 在掩码上绘制矩形区域
-            for rect in rectangles:
-                x, y, w, h = rect
-                # 确保矩形在图片范围内
-                x = max(0, min(x, width - 1))
-                y = max(0, min(y, height - 1))
-                w = min(w, width - x)
-                h = min(h, height - y)
-                
-                if w > 0 and h > 0:
-                    mask[y:y+h, x:x+w] = 255
-                    logger.info(f"添加矩形区域: ({x}, {y}, {w}, {h})")
-            
-            # 根据方法处理水印
+            # 根据方法处理水印（inpaint只处理矩形附近的区域，不需要整图掩码）
             if method == 'inpaint':
-                result = self._inpaint_watermark(image, mask)
-            elif method == 'blur':
-                result = self._blur_watermark(image, mask, rectangles)
+                result = self._inpaint_watermark(image, geometry['rectangles'], geometry['regions'])
+                return self._save_result(result, output_path)
+            
+            mask = self._geometry_mask(geometry, width, height)
+            
+            if method == 'blur':
+                result = self._blur_watermark(image, mask, geometry['rectangles'])
             elif method == 'fill':
-                result = self._fill_watermark(image, mask, rectangles)
+                result = self._fill_watermark(image, mask, geometry['rectangles'], fill_mode)
             elif method == 'clone':
-                result = self._clone_watermark(image, mask, rectangles)
+                result = self._clone_watermark(image, mask, geometry['rectangles'])
             else:
                 logger.error(f"不支持的方法: {method}")
                 return False
             
+            return self._save_result(result, output_path)
+            
+        except Exception as e:
+            logger.error(f"去除水印失败: {e}")
+            return False
+    
+    def _save_result(self, result: np.ndarray, output_path: str) -> bool:
+        """
+        保存处理结果（OpenCV保存失败时使用PIL）
+        
+        Args:
+            result (np.ndarray): 处理后的图片
+            output_path (str): 输出图片路径
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
             # 确保输出目录存在
             output_dir = os.path.dirname(output_path)
             if output_dir and not os.path.exists(output_dir):
@@ -94,7 +157,6 @@ class WatermarkRemover:
             if not success:
                 try:
                     from PIL import Image
-                    import numpy as np
                     # 转换BGR到RGB
                     rgb_result = cv2.cvtColor(result, cv2.COLOR_BGR2RGB)
                     pil_image = Image.fromarray(rgb_result)
@@ -112,21 +174,146 @@ class WatermarkRemover:
             logger.error(f"去除水印失败: {e}")
             return False
     
-    def _inpaint_watermark(self, image: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    def _watermark_geometry(self, width: int, height: int,
+                            rectangles: List[Tuple[int, int, int, int]]) -> Dict:
+        """
+        获取图片范围内的矩形和修复区域，按 (宽, 高, 矩形) 缓存，超过 GEOMETRY_CACHE_SIZE 时淘汰最久未使用的
+        
+        Args:
+            width (int): 图片宽度
+            height (int): 图片高度
+            rectangles (List[Tuple]): 矩形区域列表
+            
+        Returns:
+            Dict: rectangles（图片范围内的矩形）、regions（修复区域）、mask（整图掩码，首次使用时创建）
+        """
+        key = (width, height, tuple(tuple(rect) for rect in rectangles))
+        geometry = self._geometry_cache.get(key)
+        if geometry is not None:
+            self._geometry_cache.move_to_end(key)
+            self.cache_hits += 1
+            return geometry
+        
+        self.cache_misses += 1
+        clamped = self._clamp_rectangles(rectangles, width, height)
+        geometry = {
+            'rectangles': clamped,
+            'regions': self._inpaint_regions(clamped, width, height),
+            'mask': None,
+        }
+        self._geometry_cache[key] = geometry
+        if len(self._geometry_cache) > GEOMETRY_CACHE_SIZE:
+            self._geometry_cache.popitem(last=False)
+        return geometry
+    
+    def _geometry_mask(self, geometry: Dict, width: int, height: int) -> np.ndarray:
+        """
+        获取缓存的整图掩码，首次使用时创建（只读，各方法不修改掩码）
+        
+        Args:
+            geometry (Dict): _watermark_geometry 返回的缓存项
+            width (int): 图片宽度
+            height (int): 图片高度
+            
+        Returns:
+            np.ndarray: 掩码
+        """
+        if geometry['mask'] is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            for x, y, w, h in geometry['rectangles']:
+                mask[y:y+h, x:x+w] = 255
+            mask.flags.writeable = False
+            geometry['mask'] = mask
+        return geometry['mask']
+    
+    def _clamp_rectangles(self, rectangles: List[Tuple[int, int, int, int]],
+                          width: int, height: int) -> List[Tuple[int, int, int, int]]:
+        """
+        将矩形区域限制在图片范围内，去掉空矩形
+        
+        Args:
+            rectangles (List[Tuple]): 矩形区域列表
+            width (int): 图片宽度
+            height (int): 图片高度
+            
+        Returns:
+            List[Tuple[int, int, int, int]]: 图片范围内的矩形区域列表
+        """
+        clamped = []
+        for rect in rectangles:
+            x, y, w, h = rect
+            x = max(0, min(x, width - 1))
+            y = max(0, min(y, height - 1))
+            w = min(w, width - x)
+            h = min(h, height - y)
+            
+            if w > 0 and h > 0:
+                clamped.append((x, y, w, h))
+                logger.info(f"添加矩形区域: ({x}, {y}, {w}, {h})")
+        return clamped
+    
+    def _inpaint_regions(self, rectangles: List[Tuple[int, int, int, int]], width: int, height: int,
+                         padding: int = INPAINT_PADDING) -> List[Tuple[Tuple[int, int, int, int], List[Tuple[int, int, int, int]]]]:
+        """
+        将矩形外扩 padding 像素作为修复区域，相互重叠的区域合并为一个外接矩形
+        
+        Args:
+            rectangles (List[Tuple]): 图片范围内的矩形区域列表
+            width (int): 图片宽度
+            height (int): 图片高度
+            padding (int): 外扩像素数
+            
+        Returns:
+            List[Tuple]: 每个修复区域的 ((left, top, right, bottom), 区域内的矩形列表)
+        """
+        regions = []
+        for x, y, w, h in rectangles:
+            box = (max(0, x - padding), max(0, y - padding),
+                   min(width, x + w + padding), min(height, y + h + padding))
+            members = [(x, y, w, h)]
+            # 与已有区域重叠时合并，合并后的区域可能又与其他区域重叠，重复直到不再重叠
+            merged = True
+            while merged:
+                merged = False
+                for i, (other, other_members) in enumerate(regions):
+                    if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                        box = (min(box[0], other[0]), min(box[1], other[1]),
+                               max(box[2], other[2]), max(box[3], other[3]))
+                        members = other_members + members
+                        del regions[i]
+                        merged = True
+                        break
+            regions.append((box, members))
+        return regions
+    
+    def _inpaint_watermark(self, image: np.ndarray, rectangles: List[Tuple[int, int, int, int]],
+                           regions: Optional[List] = None) -> np.ndarray:
         """
         使用图像修复算法去除水印
         
+        只对每个矩形（或相邻矩形组）外扩后的区域调用 cv2.inpaint 并原地写回，
+        耗时取决于水印面积而不是图片尺寸。
+        
         Args:
-            image (np.ndarray): 输入图片
-            mask (np.ndarray): 掩码
+            image (np.ndarray): 输入图片（原地修改）
+            rectangles (List[Tuple]): 图片范围内的矩形区域列表
+            regions (Optional[List]): 预先计算的修复区域（_inpaint_regions 的结果），默认按矩形计算
             
         Returns:
             np.ndarray: 处理后的图片
         """
-        # 使用TELEA算法进行图像修复
-        result = cv2.inpaint(image, mask, 3, cv2.INPAINT_TELEA)
+        height, width = image.shape[:2]
+        if regions is None:
+            regions = self._inpaint_regions(rectangles, width, height)
+        for (left, top, right, bottom), members in regions:
+            roi = image[top:bottom, left:right]
+            roi_mask = np.zeros(roi.shape[:2], dtype=np.uint8)
+            for x, y, w, h in members:
+                roi_mask[y - top:y - top + h, x - left:x - left + w] = 255
+            # 使用TELEA算法进行图像修复
+            roi[...] = cv2.inpaint(roi, roi_mask, INPAINT_RADIUS, cv2.INPAINT_TELEA)
         logger.info("使用图像修复算法去除水印")
-        return result
+        return image
     
     def _blur_watermark(self, image: np.ndarray, mask: np.ndarray, 
                        rectangles: List[Tuple[int, int, int, int]]) -> np.ndarray:
@@ -136,7 +323,7 @@ class WatermarkRemover:
         Args:
             image (np.ndarray): 输入图片
             mask (np.ndarray): 掩码
-            rectangles (List[Tuple]): 矩形区域列表
+            rectangles (List[Tuple]): 图片范围内的矩形区域列表（_clamp_rectangles 的结果）
             
         Returns:
             np.ndarray: 处理后的图片
@@ -155,41 +342,145 @@ class WatermarkRemover:
         return result
     
     def _fill_watermark(self, image: np.ndarray, mask: np.ndarray, 
-                       rectangles: List[Tuple[int, int, int, int]]) -> np.ndarray:
+                       rectangles: List[Tuple[int, int, int, int]], fill_mode: str = 'mean') -> np.ndarray:
         """
         使用填充方法去除水印
         
         Args:
             image (np.ndarray): 输入图片
             mask (np.ndarray): 掩码
-            rectangles (List[Tuple]): 矩形区域列表
+            rectangles (List[Tuple]): 图片范围内的矩形区域列表（_clamp_rectangles 的结果）
+            fill_mode (str): 填充方式 ('mean', 'sides', 'gradient')
             
         Returns:
             np.ndarray: 处理后的图片
         """
+        if fill_mode not in FILL_MODES:
+            raise ValueError(f"不支持的填充方式: {fill_mode}")
         result = image.copy()
         
         for rect in rectangles:
             x, y, w, h = rect
             if w > 0 and h > 0:
-                # 计算周围区域的平均颜色
-                surrounding_pixels = []
-                
-                # 收集周围像素
-                for i in range(max(0, y-5), min(image.shape[0], y+h+5)):
-                    for j in range(max(0, x-5), min(image.shape[1], x+w+5)):
-                        if not (y <= i < y+h and x <= j < x+w):
-                            surrounding_pixels.append(image[i, j])
-                
-                if surrounding_pixels:
-                    # 计算平均颜色
-                    avg_color = np.mean(surrounding_pixels, axis=0)
-                    # 填充矩形区域
-                    result[y:y+h, x:x+w] = avg_color.astype(np.uint8)
+                if fill_mode == 'mean':
+                    # 填充为周围区域的平均颜色
+                    avg_color = self._ring_mean(image, x, y, w, h)
+                    if avg_color is not None:
+                        result[y:y+h, x:x+w] = avg_color.astype(np.uint8)
+                else:
+                    self._fill_interpolated(image, result, x, y, w, h, per_pixel=(fill_mode == 'gradient'))
         
         logger.info("使用填充方法去除水印")
         return result
     
+    def _ring_mean(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> Optional[np.ndarray]:
+        """
+        计算矩形外围 FILL_BORDER 像素环带的平均颜色
+        
+        Args:
+            image (np.ndarray): 输入图片
+            x, y, w, h (int): 矩形区域坐标和尺寸（在图片范围内）
+            
+        Returns:
+            Optional[np.ndarray]: 平均颜色，环带为空时返回None
+        """
+        height, width = image.shape[:2]
+        # 外框（环带超出图片的部分不参与计算）
+        top, bottom = max(0, y - FILL_BORDER), min(height, y + h + FILL_BORDER)
+        left, right = max(0, x - FILL_BORDER), min(width, x + w + FILL_BORDER)
+        
+        count = (bottom - top) * (right - left) - w * h
+        if count <= 0:
+            return None
+        
+        # 只对环带的上、下、左、右四段求和；整数求和后再相除，结果与逐像素求平均完全一致
+        bands = [
+            image[top:y, left:right],
+            image[y + h:bottom, left:right],
+            image[y:y + h, left:x],
+            image[y:y + h, x + w:right],
+        ]
+        total = sum(band.sum(axis=(0, 1), dtype=np.int64) for band in bands)
+        return total / count
+    
+    def _fill_interpolated(self, image: np.ndarray, result: np.ndarray, x: int, y: int, w: int, h: int,
+                           per_pixel: bool) -> None:
+        """
+        用矩形四边外侧的颜色向内插值填充（原地修改 result）
+        
+        上下两边在垂直方向插值、左右两边在水平方向插值，再按到最近边的距离加权合成，
+        靠近哪条边就更接近哪条边的颜色。
+        
+        Args:
+            image (np.ndarray): 输入图片
+            result (np.ndarray): 输出图片
+            x, y, w, h (int): 矩形区域坐标和尺寸（在图片范围内）
+            per_pixel (bool): True 时逐行逐列使用边缘颜色（gradient），False 时每条边只取平均色（sides）
+        """
+        left, top, right, bottom = x, y, x + w, y + h
+        
+        # 灰度图增加通道维（视图，不复制像素）
+        pixels = image if image.ndim == 3 else image[:, :, None]
+        
+        def strip(region: np.ndarray, axis: int, length: int) -> Optional[np.ndarray]:
+            # 边缘外侧的条带沿厚度方向求平均，得到 (length, 通道数) 的颜色曲线
+            if region.size == 0:
+                return None
+            profile = region.mean(axis=axis, dtype=np.float32)
+            if not per_pixel:
+                profile = np.broadcast_to(profile.mean(axis=0), (length, profile.shape[-1]))
+            return profile
+        
+        top_strip = strip(pixels[max(0, top - FILL_BORDER):top, left:right], 0, w)
+        bottom_strip = strip(pixels[bottom:bottom + FILL_BORDER, left:right], 0, w)
+        left_strip = strip(pixels[top:bottom, max(0, left - FILL_BORDER):left], 1, h)
+        right_strip = strip(pixels[top:bottom, right:right + FILL_BORDER], 1, h)
+        
+        # 像素中心到上边/左边的相对位置
+        t = ((np.arange(h, dtype=np.float32) + 0.5) / h)[:, None, None]
+        s = ((np.arange(w, dtype=np.float32) + 0.5) / w)[None, :, None]
+        
+        vertical = self._blend(top_strip, bottom_strip, t, axis=0)
+        horizontal = self._blend(left_strip, right_strip, s, axis=1)
+        if vertical is None and horizontal is None:
+            return
+        if vertical is None:
+            fill = horizontal
+        elif horizontal is None:
+            fill = vertical
+        else:
+            # 到最近的上下边、左右边的距离（像素）
+            distance_v = np.minimum(t, 1 - t) * h
+            distance_h = np.minimum(s, 1 - s) * w
+            fill = (vertical * distance_h + horizontal * distance_v) / (distance_v + distance_h)
+        
+        fill = np.broadcast_to(fill, (h, w, pixels.shape[2]))
+        fill = np.clip(np.rint(fill), 0, 255).astype(image.dtype)
+        result[top:bottom, left:right] = fill if image.ndim == 3 else fill[:, :, 0]
+    
+    def _blend(self, first: Optional[np.ndarray], second: Optional[np.ndarray],
+               position: np.ndarray, axis: int) -> Optional[np.ndarray]:
+        """
+        在两条对边的颜色曲线之间线性插值，缺少一边时直接使用另一边
+        
+        Args:
+            first (Optional[np.ndarray]): 上边（或左边）颜色曲线
+            second (Optional[np.ndarray]): 下边（或右边）颜色曲线
+            position (np.ndarray): 像素到第一条边的相对位置（0~1）
+            axis (int): 插值方向，0为垂直、1为水平
+            
+        Returns:
+            Optional[np.ndarray]: 可广播到 (h, w, 通道数) 的插值结果，两边都缺少时返回None
+        """
+        # 颜色曲线沿插值方向扩展一维
+        first = None if first is None else np.expand_dims(first, axis)
+        second = None if second is None else np.expand_dims(second, axis)
+        if first is None:
+            return second
+        if second is None:
+            return first
+        return first * (1 - position) + second * position
+    
     def _clone_watermark(self, image: np.ndarray, mask: np.ndarray, 
                         rectangles: List[Tuple[int, int, int, int]]) -> np.ndarray:
         """
@@ -198,63 +489,203 @@ class WatermarkRemover:
         Args:
             image (np.ndarray): 输入图片
             mask (np.ndarray): 掩码
-            rectangles (List[Tuple]): 矩形区域列表
+            rectangles (List[Tuple]): 图片范围内的矩形区域列表（_clamp_rectangles 的结果）
             
         Returns:
             np.ndarray: 处理后的图片
         """
         result = image.copy()
         
-        for rect in rectangles:
-            x, y, w, h = rect
-            if w > 0 and h > 0:
-                # 寻找最佳匹配区域
-                best_match = self._find_best_match(image, x, y, w, h)
-                if best_match:
-                    src_x, src_y = best_match
-                    # 复制匹配区域到水印位置
-                    result[y:y+h, x:x+w] = image[src_y:src_y+h, src_x:src_x+w]
+        for x, y, w, h in rectangles:
+            # 寻找最佳匹配区域
+            best_match = self._find_best_match(image, x, y, w, h, mask)
+            if best_match:
+                src_x, src_y = best_match
+                # 复制匹配区域到水印位置
+                result[y:y+h, x:x+w] = image[src_y:src_y+h, src_x:src_x+w]
         
         logger.info("使用克隆方法去除水印")
         return result
     
-    def _find_best_match(self, image: np.ndarray, x: int, y: int, w: int, h: int) -> Optional[Tuple[int, int]]:
+    def _find_best_match(self, image: np.ndarray, x: int, y: int, w: int, h: int,
+                         mask: Optional[np.ndarray] = None) -> Optional[Tuple[int, int]]:
         """
         寻找最佳匹配区域
         
+        以水印矩形外围的上下文（去掉所有水印像素）为模板，先在缩小的灰度图上做一次全图带掩码模板匹配，
+        保留若干候选后逐层放大、在候选附近用彩色图细化；与任何水印区域重叠的源区域都会被排除。
+        
         Args:
             image (np.ndarray): 输入图片
-            x, y, w, h (int): 水印区域坐标和尺寸
+            x, y, w, h (int): 水印区域坐标和尺寸（在图片范围内）
+            mask (Optional[np.ndarray]): 所有水印区域的掩码，默认只包含当前矩形
             
         Returns:
             Optional[Tuple[int, int]]: 最佳匹配区域的坐标
         """
         height, width = image.shape[:2]
-        best_score = float('inf')
-        best_match = None
-        
-        # 在图片中搜索最佳匹配区域
-        step = 10  # 搜索步长
-        for i in range(0, height - h, step):
-            for j in range(0, width - w, step):
-                # 跳过水印区域本身
-                if (y <= i < y+h and x <= j < x+w):
+        if mask is None:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            mask[y:y+h, x:x+w] = 255
+        
+        # 模板：水印矩形及外围上下文（裁剪到图片范围内），水印像素不参与匹配
+        context = max(CLONE_CONTEXT, min(w, h) // 4)
+        left, top = max(0, x - context), max(0, y - context)
+        right, bottom = min(width, x + w + context), min(height, y + h + context)
+        template_mask = np.where(mask[top:bottom, left:right] > 0, 0, 255).astype(np.uint8)
+        if not template_mask.any():
+            return None
+        
+        # 模板左上角的取值范围（源区域左上角 = 模板左上角 + (x-left, y-top)）
+        u_range = (0, width - (right - left))
+        v_range = (0, height - (bottom - top))
+        if self.search_radius is not None:
+            # 源区域与水印矩形的距离不超过 search_radius
+            radius = self.search_radius
+            u_range = (max(u_range[0], left - w - radius), min(u_range[1], left + w + radius))
+            v_range = (max(v_range[0], top - h - radius), min(v_range[1], top + h + radius))
+        
+        # 粗搜索层：像素数不超过 CLONE_COARSE_PIXELS（或按指定层数），且上下文和水印缩小后仍至少有2像素
+        coarse = 0
+        while (context >> (coarse + 1) >= 2 and min(w, h) >> (coarse + 1) >= 2
+               and (coarse < self.pyramid_levels if self.pyramid_levels is not None
+                    else (width >> coarse) * (height >> coarse) > CLONE_COARSE_PIXELS)):
+            coarse += 1
+        
+        # 图像金字塔（每层缩小一半，坐标右移一位）
+        images, masks = [image], [mask]
+        for _ in range(coarse):
+            size = (images[-1].shape[1] // 2, images[-1].shape[0] // 2)
+            images.append(cv2.resize(images[-1], size, interpolation=cv2.INTER_AREA))
+            masks.append(cv2.resize(masks[-1], size, interpolation=cv2.INTER_AREA))
+        
+        def level_geometry(level: int) -> dict:
+            """模板和源区域在指定层的位置、尺寸和可用像素"""
+            t_left, t_top = left >> level, top >> level
+            t_width, t_height = (right - left) >> level, (bottom - top) >> level
+            # 缩小后只保留完全不含水印的像素
+            t_mask = cv2.resize(template_mask, (t_width, t_height), interpolation=cv2.INTER_AREA) == 255
+            # 细化使用的上下文像素（过多时等间隔抽样），按该层图片展平后的下标保存
+            ys, xs = np.nonzero(t_mask)
+            step = max(1, len(ys) // CLONE_REFINE_SAMPLES)
+            samples = (t_top + ys[::step]) * images[level].shape[1] + (t_left + xs[::step])
+            return {
+                'box': (t_left, t_top, t_width, t_height),
+                'mask': t_mask,
+                'samples': samples,
+                'offset': ((x >> level) - t_left, (y >> level) - t_top),
+                # 源区域尺寸向上取整，重叠判断偏保守
+                'source': (-(-w // (1 << level)), -(-h // (1 << level))),
+                'u_range': (u_range[0] >> level, u_range[1] >> level),
+                'v_range': (v_range[0] >> level, v_range[1] >> level),
+            }
+        
+        candidates = self._coarse_match_candidates(images[coarse], masks[coarse], level_geometry(coarse))
+        
+        # 逐层细化：候选坐标放大一倍后在附近用彩色图重新计算差异，每层保留较好的一半候选
+        best = [(u, v, np.inf) for u, v in candidates]
+        previous = coarse
+        for level in (range(coarse - 1, -1, -1) if coarse > 0 else [0]):
+            geometry = level_geometry(level)
+            factor = 1 << (previous - level)
+            best = [self._refine_match(images[level], masks[level], geometry, u * factor, v * factor)
+                    for u, v, _ in best]
+            best.sort(key=lambda item: item[2])
+            best = best[:max(1, len(best) // 2)]
+            previous = level
+        
+        if not best or not np.isfinite(best[0][2]):
+            return None
+        u, v, _ = best[0]
+        return (u + x - left, v + y - top)
+    
+    def _coarse_match_candidates(self, image: np.ndarray, mask: np.ndarray, geometry: dict) -> List[Tuple[int, int]]:
+        """
+        在粗搜索层的灰度图上对整个搜索范围做一次带掩码模板匹配，取若干个彼此分开的候选
+        
+        Args:
+            image (np.ndarray): 粗搜索层图片
+            mask (np.ndarray): 粗搜索层水印掩码
+            geometry (dict): 模板和源区域在该层的几何信息
+            
+        Returns:
+            List[Tuple[int, int]]: 候选模板左上角坐标（该层坐标），按差异从小到大排列
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        t_left, t_top, t_width, t_height = geometry['box']
+        (u0, u1), (v0, v1) = geometry['u_range'], geometry['v_range']
+        if u0 > u1 or v0 > v1:
+            return []
+        template = image[t_top:t_top + t_height, t_left:t_left + t_width]
+        t_mask = geometry['mask'].astype(np.uint8) * 255
+        region = image[v0:v1 + t_height, u0:u1 + t_width]
+        scores = cv2.matchTemplate(region, template, cv2.TM_SQDIFF, mask=t_mask)
+        
+        # 源区域与任何水印区域重叠的位置无效（积分图一次求出所有位置的重叠像素数）
+        rows, cols = scores.shape
+        offset_x, offset_y = geometry['offset']
+        src_width, src_height = geometry['source']
+        blocked = np.pad((mask > 0).astype(np.uint8), ((0, src_height), (0, src_width)))
+        integral = cv2.integral(blocked)
+        r0, c0 = v0 + offset_y, u0 + offset_x
+        r1, c1 = r0 + src_height, c0 + src_width
+        overlap = (integral[r1:r1 + rows, c1:c1 + cols] - integral[r0:r0 + rows, c1:c1 + cols]
+                   - integral[r1:r1 + rows, c0:c0 + cols] + integral[r0:r0 + rows, c0:c0 + cols])
+        scores[overlap > 0] = np.inf
+        
+        # 非极小值抑制：每取一个候选，就排除其附近半个源区域范围内的位置
+        candidates = []
+        for _ in range(CLONE_CANDIDATES):
+            v, u = divmod(int(np.argmin(scores)), cols)
+            if not np.isfinite(scores[v, u]):
+                break
+            candidates.append((u0 + u, v0 + v))
+            scores[max(0, v - src_height // 2):v + src_height // 2 + 1,
+                   max(0, u - src_width // 2):u + src_width // 2 + 1] = np.inf
+        return candidates
+    
+    def _refine_match(self, image: np.ndarray, mask: np.ndarray, geometry: dict,
+                      u: int, v: int) -> Tuple[int, int, float]:
+        """
+        在上一层候选放大后的位置附近（-1 ~ +2 像素）逐个计算模板上下文的平方差之和
+        
+        Args:
+            image (np.ndarray): 当前层图片
+            mask (np.ndarray): 当前层水印掩码
+            geometry (dict): 模板和源区域在该层的几何信息
+            u, v (int): 放大后的候选模板左上角坐标
+            
+        Returns:
+            Tuple[int, int, float]: 最佳模板左上角坐标及差异（无有效位置时差异为inf）
+        """
+        t_left, t_top, _, _ = geometry['box']
+        offset_x, offset_y = geometry['offset']
+        src_width, src_height = geometry['source']
+        (u_min, u_max), (v_min, v_max) = geometry['u_range'], geometry['v_range']
+        
+        # 展平后按下标取像素，模板位置移动 (du, dv) 时下标整体加上 dv*宽度+du
+        width = image.shape[1]
+        pixels = image.reshape(width * image.shape[0], -1)
+        samples = geometry['samples']
+        template = np.take(pixels, samples, axis=0).astype(np.float32)
+        
+        best = (u, v, np.inf)
+        for pos_v in range(max(v_min, v - 1), min(v_max, v + 2) + 1):
+            for pos_u in range(max(u_min, u - 1), min(u_max, u + 2) + 1):
+                # 源区域与水印重叠的位置无效
+                r0, c0 = pos_v + offset_y, pos_u + offset_x
+                if mask[r0:r0 + src_height, c0:c0 + src_width].any():
                     continue
-                
-                # 计算区域相似度（这里使用简单的颜色差异）
-                region1 = image[y:y+h, x:x+w]
-                region2 = image[i:i+h, j:j+w]
-                
-                if region1.shape == region2.shape:
-                    diff = np.mean(np.abs(region1.astype(float) - region2.astype(float)))
-                    if diff < best_score:
-                        best_score = diff
-                        best_match = (j, i)
-        
-        return best_match
+                shift = (pos_v - t_top) * width + (pos_u - t_left)
+                diff = np.take(pixels, samples + shift, axis=0).astype(np.float32) - template
+                score = float(np.vdot(diff, diff))
+                if score < best[2]:
+                    best = (pos_u, pos_v, score)
+        return best
     
     def batch_remove_watermarks(self, source_directory: str, output_directory: str, 
-                               watermark_config: Dict) -> dict:
+                               watermark_config: Dict, workers: int = 1) -> dict:
         """
         批量去除水印
         
@@ -262,16 +693,19 @@ class WatermarkRemover:
             source_directory (str): 源目录路径
             output_directory (str): 输出目录路径
             watermark_config (Dict): 水印配置，包含矩形区域和方法
+            workers (int): 并行进程数（1表示在当前进程中逐张处理）
             
         Returns:
-            dict: 处理结果统计
+            dict: 处理结果统计（timings 为每张图片的处理耗时，单位秒；cache_hit_rate 为掩码缓存命中率，
+                  按进程统计：并行时每个进程第一次遇到某种尺寸都计为未命中，命中率低于串行）
         """
         # 获取所有图片文件
         image_files = self._get_image_files(source_directory)
         
         if not image_files:
             logger.warning("未找到任何图片文件")
-            return {'total': 0, 'success': 0, 'failed': 0}
+            return {'total': 0, 'success': 0, 'failed': 0, 'timings': {},
+                    'cache_hits': 0, 'cache_misses': 0, 'cache_hit_rate': 0.0}
         
         # 确保输出目录存在
         if not os.path.exists(output_directory):
@@ -282,44 +716,124 @@ class WatermarkRemover:
         stats = {
             'total': len(image_files),
             'success': 0,
-            'failed': 0
+            'failed': 0,
+            'timings': {},
+            'cache_hits': 0,
+            'cache_misses': 0
         }
         
-        logger.info(f"开始批量去除水印 {len(image_files)} 张图片...")
+        # 水印配置只解析一次（并行时随进程初始化传给每个进程）
+        options = {
+            'rectangles': [tuple(rect) for rect in watermark_config.get('rectangles', [])],
+            'method': watermark_config.get('method', 'inpaint'),
+            'fill_mode': watermark_config.get('fill_mode', 'mean'),
+        }
         
-        for i, image_path in enumerate(image_files, 1):
-            try:
-                # 获取文件名
-                filename = os.path.basename(image_path)
-                name, ext = os.path.splitext(filename)
-                
-                # 生成输出文件名
-                output_filename = f"{name}_no_watermark{ext}"
-                output_path = os.path.join(output_directory, output_filename)
-                
-                logger.info(f"处理第 {i}/{len(image_files)} 张图片: {filename}")
-                
-                # 去除水印
-                rectangles = watermark_config.get('rectangles', [])
-                method = watermark_config.get('method', 'inpaint')
-                
-                if self.remove_watermark_by_rectangles(image_path, output_path, rectangles, method):
-                    stats['success'] += 1
-                else:
-                    stats['failed'] += 1
-                    
-            except Exception as e:
-                logger.error(f"处理图片失败 {image_path}: {e}")
-                stats['failed'] += 1
+        if workers > 1:
+            logger.info(f"开始批量去除水印 {len(image_files)} 张图片（{workers} 个进程）...")
+            self._parallel_remove(image_files, output_directory, options, workers, stats)
+        else:
+            logger.info(f"开始批量去除水印 {len(image_files)} 张图片...")
+            self._serial_remove(image_files, output_directory, options, stats)
+        
+        lookups = stats['cache_hits'] + stats['cache_misses']
+        stats['cache_hit_rate'] = stats['cache_hits'] / lookups if lookups else 0.0
         
         # 输出统计结果
         logger.info(f"批量去除水印完成:")
         logger.info(f"  总计: {stats['total']}")
         logger.info(f"  成功: {stats['success']}")
         logger.info(f"  失败: {stats['failed']}")
+        if stats['timings']:
+            logger.info(f"  平均耗时: {sum(stats['timings'].values()) / len(stats['timings']):.2f} 秒/张")
+        logger.info(f"  掩码缓存命中率: {stats['cache_hit_rate']:.1%}")
         
         return stats
     
+    def _output_path(self, image_path: str, output_directory: str) -> str:
+        """输出文件路径：原文件名加 _no_watermark 后缀"""
+        name, ext = os.path.splitext(os.path.basename(image_path))
+        return os.path.join(output_directory, f"{name}_no_watermark{ext}")
+    
+    def _process_file(self, image_path: str, output_path: str, options: Dict) -> Tuple[bool, float, Optional[bool]]:
+        """
+        处理单张图片，任何异常都视为失败
+        
+        Args:
+            image_path (str): 输入图片路径
+            output_path (str): 输出图片路径
+            options (Dict): 解析后的水印配置
+            
+        Returns:
+            Tuple[bool, float, Optional[bool]]: 是否成功、耗时（秒）、是否命中掩码缓存（未读取到图片时为None）
+        """
+        hits, misses = self.cache_hits, self.cache_misses
+        start = time.perf_counter()
+        try:
+            success = self.remove_watermark_by_rectangles(image_path, output_path, **options)
+        except Exception as e:
+            logger.error(f"处理图片失败 {image_path}: {e}")
+            success = False
+        seconds = time.perf_counter() - start
+        
+        if self.cache_hits > hits:
+            cache_hit = True
+        elif self.cache_misses > misses:
+            cache_hit = False
+        else:
+            cache_hit = None
+        return success, seconds, cache_hit
+    
+    def _record_result(self, stats: dict, image_path: str, success: bool, seconds: float,
+                       cache_hit: Optional[bool]) -> None:
+        """将单张图片的处理结果计入统计"""
+        stats['success' if success else 'failed'] += 1
+        stats['timings'][image_path] = seconds
+        if cache_hit is not None:
+            stats['cache_hits' if cache_hit else 'cache_misses'] += 1
+    
+    def _serial_remove(self, image_files: List[str], output_directory: str, options: Dict, stats: dict) -> None:
+        """
+        在当前进程中逐张去除水印
+        
+        Args:
+            image_files (List[str]): 图片文件路径列表
+            output_directory (str): 输出目录路径
+            options (Dict): 解析后的水印配置
+            stats (dict): 处理结果统计（原地更新）
+        """
+        for i, image_path in enumerate(image_files, 1):
+            logger.info(f"处理第 {i}/{len(image_files)} 张图片: {os.path.basename(image_path)}")
+            result = self._process_file(image_path, self._output_path(image_path, output_directory), options)
+            self._record_result(stats, image_path, *result)
+    
+    def _parallel_remove(self, image_files: List[str], output_directory: str, options: Dict,
+                         workers: int, stats: dict) -> None:
+        """
+        用进程池去除水印，按输入顺序汇总结果和输出进度
+        
+        Args:
+            image_files (List[str]): 图片文件路径列表
+            output_directory (str): 输出目录路径
+            options (Dict): 解析后的水印配置
+            workers (int): 进程数
+            stats (dict): 处理结果统计（原地更新）
+        """
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_watermark_worker,
+                                 initargs=(self, options)) as executor:
+            futures = [
+                executor.submit(_remove_worker, image_path, self._output_path(image_path, output_directory))
+                for image_path in image_files
+            ]
+            for i, (image_path, future) in enumerate(zip(image_files, futures), 1):
+                try:
+                    self._record_result(stats, image_path, *future.result())
+                except Exception as e:
+                    # 进程异常退出等情况只影响对应的图片
+                    logger.error(f"处理图片失败 {image_path}: {e}")
+                    stats['failed'] += 1
+                logger.info(f"已完成 {i}/{len(image_files)} 张图片: {os.path.basename(image_path)}")
+    
     def _get_image_files(self, directory: str) -> List[str]:
         """
         获取指定目录下的所有图片文件